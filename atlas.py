@@ -0,0 +1,125 @@
+# atlas.py - Упаковка мелких картинок экспорта в текстурные атласы
+import os
+from PySide6.QtCore import Qt, QRect
+from PySide6.QtGui import QImage, QPainter
+
+from bake import png_bytes
+
+ATLAS_SIZE = 2048
+MAX_SPRITE = 512
+PADDING = 2
+
+# --- MAXRECTS (лучшее совпадение по короткой стороне) ---
+# Детерминированно: одинаковый вход (размеры и ключи) -> одинаковая раскладка.
+class MaxRectsBin:
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.free = [QRect(0, 0, width, height)]
+        self.used = []
+
+    def find(self, w, h):
+        best, best_key = None, None
+        for r in self.free:
+            if r.width() >= w and r.height() >= h:
+                key = (min(r.width() - w, r.height() - h), max(r.width() - w, r.height() - h), r.y(), r.x())
+                if best_key is None or key < best_key: best, best_key = QRect(r.x(), r.y(), w, h), key
+        return best
+
+    def place(self, rect):
+        new_free = []
+        for r in self.free:
+            if not r.intersects(rect): new_free.append(r); continue
+            if rect.left() > r.left(): new_free.append(QRect(r.left(), r.top(), rect.left() - r.left(), r.height()))
+            if rect.right() < r.right(): new_free.append(QRect(rect.right() + 1, r.top(), r.right() - rect.right(), r.height()))
+            if rect.top() > r.top(): new_free.append(QRect(r.left(), r.top(), r.width(), rect.top() - r.top()))
+            if rect.bottom() < r.bottom(): new_free.append(QRect(r.left(), rect.bottom() + 1, r.width(), r.bottom() - rect.bottom()))
+        # Убираем свободные прямоугольники, целиком лежащие в других
+        self.free = [r for i, r in enumerate(new_free)
+                     if not any(j != i and o.contains(r) and (o != r or j < i) for j, o in enumerate(new_free))]
+        self.used.append(rect)
+
+def pack(sizes, atlas_size=ATLAS_SIZE, padding=PADDING):
+    order = sorted(sizes, key=lambda s: (-max(s[1], s[2]), -s[1] * s[2], s[0]))
+    bins, placements = [], {}
+    for key, w, h in order:
+        pw, ph = w + 2 * padding, h + 2 * padding
+        for n, b in enumerate(bins):
+            rect = b.find(pw, ph)
+            if rect is not None: break
+        else:
+            b = MaxRectsBin(atlas_size, atlas_size); bins.append(b); n = len(bins) - 1
+            rect = b.find(pw, ph)
+        b.place(rect)
+        placements[key] = (n, rect.x() + padding, rect.y() + padding, w, h)
+    return bins, placements
+
+# --- СБОРКА АТЛАСОВ ---
+# images: {ключ: QImage}. Возвращает ({путь в архиве: png}, {ключ: (путь, x, y, w, h)}, отчёт)
+def build_atlases(images, atlas_size=ATLAS_SIZE, padding=PADDING):
+    sizes = [(key, img.width(), img.height()) for key, img in images.items()]
+    bins, placements = pack(sizes, atlas_size, padding)
+    files, regions, report = {}, {}, []
+    for n, b in enumerate(bins):
+        # Атлас обрезается по фактически занятой области
+        w = max(r.right() + 1 for r in b.used); h = max(r.bottom() + 1 for r in b.used)
+        atlas = QImage(w, h, QImage.Format_ARGB32_Premultiplied)
+        atlas.fill(Qt.transparent)
+        p = QPainter(atlas)
+        p.setCompositionMode(QPainter.CompositionMode_Source)
+        keys = sorted(k for k, pl in placements.items() if pl[0] == n)
+        used = 0
+        for key in keys:
+            _, x, y, sw, sh = placements[key]
+            img = images[key]
+            p.drawImage(x, y, img)
+            # Края дублируются в поле отступа, чтобы фильтрация не тянула соседей
+            if padding:
+                p.drawImage(QRect(x - padding, y, padding, sh), img, QRect(0, 0, 1, sh))
+                p.drawImage(QRect(x + sw, y, padding, sh), img, QRect(sw - 1, 0, 1, sh))
+                p.drawImage(QRect(x, y - padding, sw, padding), img, QRect(0, 0, sw, 1))
+                p.drawImage(QRect(x, y + sh, sw, padding), img, QRect(0, sh - 1, sw, 1))
+            used += sw * sh
+        p.end()
+        path = f"atlas/atlas_{n}.png"
+        files[path] = png_bytes(atlas)
+        for key in keys: regions[key] = (path,) + placements[key][1:]
+        report.append({"atlas": path, "width": w, "height": h, "sprites": len(keys), "fill": used / float(w * h)})
+    return files, regions, report
+
+# --- ПРИМЕНЕНИЕ К ЭКСПОРТУ ---
+# Мелкие bg_image (файлы с диска и запечённые слои) переносятся в атласы; стиль
+# виджета получает bg_image атласа и под-прямоугольник atlas_x/atlas_y/atlas_w/atlas_h.
+# Виджет, уже ссылающийся на атлас (повторный экспорт), упаковывается своим вырезом.
+def sprite_key(style):
+    rect = tuple(int(style.get(k, 0)) for k in ('atlas_x', 'atlas_y', 'atlas_w', 'atlas_h'))
+    return (style.get('bg_image', ''),) + (rect if rect[2] > 0 and rect[3] > 0 else (0, 0, 0, 0))
+
+def apply_atlases(widgets, files, max_sprite=MAX_SPRITE, atlas_size=ATLAS_SIZE, padding=PADDING):
+    images, sources = {}, {}
+    for w in widgets:
+        key = sprite_key(w.get('style', {}))
+        path = key[0]
+        if not path or key in images: continue
+        if path not in sources:
+            img = QImage()
+            if path in files: img.loadFromData(files[path])
+            elif os.path.exists(path): img = QImage(path)
+            sources[path] = img
+        img = sources[path]
+        if key[3] > 0: img = img.copy(QRect(*key[1:]))
+        limit = atlas_size - 2 * padding if key[3] > 0 else min(max_sprite, atlas_size - 2 * padding)
+        if img.isNull() or max(img.width(), img.height()) > limit: continue
+        images[key] = img.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+    if not images: return files, []
+    atlas_files, regions, report = build_atlases(images, atlas_size, padding)
+    for w in widgets:
+        style = w.get('style', {})
+        region = regions.get(sprite_key(style))
+        if region is None: continue
+        style['bg_image'], style['atlas_x'], style['atlas_y'], style['atlas_w'], style['atlas_h'] = region
+    # Старые атласы и упакованные файлы уходят из архива, если на них больше никто не ссылается
+    packed = {key[0] for key in regions}
+    still_used = {w.get('style', {}).get('bg_image', '') for w in widgets}
+    files = {k: v for k, v in files.items() if k not in packed or k in still_used}
+    files.update(atlas_files)
+    return files, report
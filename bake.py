@@ -0,0 +1,116 @@
+# bake.py - Запекание статичных слоёв при экспорте WGT
+import copy
+from PySide6.QtCore import Qt, QRectF, QBuffer, QByteArray, QIODevice
+from PySide6.QtGui import QImage, QPainter, QTransform
+from PySide6.QtWidgets import QStyleOptionGraphicsItem
+
+from config import WIDGET_TEMPLATES
+from items import WidgetItem, is_live
+
+# Порядок отрисовки: родитель, затем дети по возрастанию z
+def paint_order(root):
+    out = []
+    def walk(item):
+        for child in sorted((c for c in item.childItems() if isinstance(c, WidgetItem) and c.isVisible()), key=lambda c: c.zValue()):
+            out.append(child); walk(child)
+    walk(root)
+    return out
+
+def item_is_live(item):
+    if is_live(item.data_model): return True
+    if item.data_model.get('type') == 'component':
+        renderer = item.component_renderer()
+        return renderer is not None and bool(renderer.live_ids)
+    return False
+
+def painted_rect(item):
+    rect = item.mapRectToScene(item.rect())
+    proxy = getattr(item, 'content_proxy', None)
+    if proxy is not None and not proxy.document().isEmpty(): rect = rect.united(proxy.sceneBoundingRect())
+    border = int(item.data_model.get('style', {}).get('border_width', 0))
+    return rect.adjusted(-border, -border, border, border)
+
+# Собственная отрисовка элемента (без детей) тем же кодом, что и в редакторе
+def paint_item(painter, item, view):
+    option = QStyleOptionGraphicsItem()
+    painter.save()
+    painter.setTransform(item.sceneTransform() * view)
+    item.paint(painter, option, None)
+    painter.restore()
+    proxy = getattr(item, 'content_proxy', None)
+    if proxy is not None and not proxy.document().isEmpty():
+        painter.save()
+        painter.setTransform(proxy.sceneTransform() * view)
+        proxy.paint(painter, option, None)
+        painter.restore()
+
+def render_layer(items, area, scale):
+    bounds = QRectF()
+    for item in items: bounds = bounds.united(painted_rect(item))
+    bounds = bounds.intersected(area).toAlignedRect()
+    if bounds.isEmpty(): return None, None
+    img = QImage(max(1, round(bounds.width() * scale)), max(1, round(bounds.height() * scale)), QImage.Format_ARGB32_Premultiplied)
+    img.fill(Qt.transparent)
+    p = QPainter(img)
+    p.setRenderHint(QPainter.Antialiasing); p.setRenderHint(QPainter.SmoothPixmapTransform); p.setRenderHint(QPainter.TextAntialiasing)
+    view = QTransform().scale(scale, scale).translate(-bounds.left(), -bounds.top())
+    for item in items: paint_item(p, item, view)
+    p.end()
+    return img, QRectF(bounds)
+
+def png_bytes(img):
+    data = QByteArray(); buf = QBuffer(data); buf.open(QIODevice.WriteOnly)
+    img.save(buf, "PNG"); buf.close()
+    return bytes(data)
+
+def layer_widget(name, path, rect, z):
+    data = copy.deepcopy(WIDGET_TEMPLATES['image'])
+    data.update({"id": name, "name": name, "parent_id": "root", "z_index": z, "baked": True,
+                 "x": int(rect.x()), "y": int(rect.y()), "width": int(rect.width()), "height": int(rect.height())})
+    data['style'].update({"bg_image": path, "bg_w": int(rect.width()), "bg_h": int(rect.height())})
+    return data
+
+# --- ЗАПЕКАНИЕ ---
+# Список отрисовки делится на сегменты: живые виджеты и статичные слои. Статичный
+# виджет опускается в самый ранний слой, если ни один более поздний сегмент его не
+# пересекает — порядок наложения при этом не меняется, а слоёв становится меньше.
+def plan_segments(order):
+    segments = []   # [живой?, элементы, объединённый прямоугольник]
+    for item in order:
+        rect = painted_rect(item)
+        if item_is_live(item):
+            segments.append([True, [item], rect]); continue
+        b = len(segments) - 1
+        while b >= 0 and not segments[b][2].intersects(rect): b -= 1
+        target = next((s for s in segments[max(b, 0):] if not s[0]), None)
+        if target is None: segments.append([False, [item], rect])
+        else: target[1].append(item); target[2] = target[2].united(rect)
+    return segments
+
+# Живые виджеты остаются как есть (в координатах корня), статичные сегменты становятся
+# PNG-слоями шаблона image. Возвращает (виджеты, {путь в архиве: png}).
+def bake(root, scale=1.0):
+    scene = root.scene()
+    selected = [i for i in scene.selectedItems()] if scene else []
+    for i in selected: i.setSelected(False)
+    area = root.mapRectToScene(root.rect())
+    origin = area.topLeft()
+    widgets, files = [], {}
+    try:
+        for live, items, _ in plan_segments(paint_order(root)):
+            if live:
+                item = items[0]
+                item.update_model()
+                data = copy.deepcopy(item.data_model)
+                pos = item.scenePos() - origin
+                data.update({"x": int(pos.x()), "y": int(pos.y()), "parent_id": "root", "z_index": len(widgets), "is_container": False})
+                widgets.append(data); continue
+            img, rect = render_layer(items, area, scale)
+            if img is None: continue
+            name = f"layer_{len(files)}"
+            path = f"layers/{name}.png"
+            files[path] = png_bytes(img)
+            widgets.append(layer_widget(name, path, rect.translated(-origin), len(widgets)))
+    finally:
+        for i in selected: i.setSelected(True)
+    return widgets, files
@@ -0,0 +1,117 @@
+# batch.py - Пакетная конвертация и экспорт проектов без окна и QApplication
+# Пример: python batch.py "projects/*.json" "imports/*.wgt" --out dist/ --jobs 8
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from config import APP_VERSION, WIDGET_TEMPLATES
+from project import read_project, wgt_files, validate, migrate, product_data, write_wgt, write_project
+
+CACHE_NAME = ".batch_cache.json"
+
+# Хэш учитывает и содержимое файла, и то, что влияет на результат: версию и шаблоны
+def content_hash(path, target, sparse=False):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""): h.update(chunk)
+    h.update(json.dumps([APP_VERSION, target, sparse, WIDGET_TEMPLATES], sort_keys=True).encode('utf-8'))
+    return h.hexdigest()
+
+# Результат повторяет путь входа относительно общего корня всех входов:
+# a/x.json и b/x.json не затирают друг друга
+def output_path(path, root, out_dir, target):
+    rel = os.path.relpath(os.path.abspath(path), root)
+    return os.path.join(out_dir, f"{os.path.splitext(rel)[0]}.{target}")
+
+# Выполняется в дочернем процессе
+def convert(job):
+    path, out_path, target, sparse = job
+    t0 = time.perf_counter()
+    try:
+        # WGT -> WGT: картинки архива идут в результат как есть, под теми же путями;
+        # WGT -> JSON: распаковываются рядом с результатом, в <имя>_assets/
+        from_wgt = path.lower().endswith('.wgt')
+        data = read_project(path, extract=target == 'json', base=out_path)
+        errors = validate(data)
+        if errors: return {"path": path, "status": "invalid", "errors": errors, "ms": (time.perf_counter() - t0) * 1000}
+        data = migrate(data)
+        if target == 'wgt': write_wgt(product_data(data), out_path, wgt_files(path) if from_wgt else None)
+        else: write_project(data, out_path, sparse=sparse)
+        return {"path": path, "status": "ok", "widgets": len(data.get('widgets', [])), "ms": (time.perf_counter() - t0) * 1000}
+    except Exception as e:
+        return {"path": path, "status": "error", "errors": [str(e)], "ms": (time.perf_counter() - t0) * 1000}
+
+def load_cache(out_dir):
+    try:
+        with open(os.path.join(out_dir, CACHE_NAME), 'r', encoding='utf-8') as f: return json.load(f)
+    except (OSError, ValueError): return {}
+
+def save_cache(out_dir, cache):
+    with open(os.path.join(out_dir, CACHE_NAME), 'w', encoding='utf-8') as f: json.dump(cache, f, indent=1)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Пакетный экспорт проектов ChronoDash Builder")
+    ap.add_argument("inputs", nargs="+", help="пути или маски *.json / *.wgt")
+    ap.add_argument("--out", required=True, help="папка для результатов")
+    ap.add_argument("--to", choices=("wgt", "json"), default="wgt", help="формат результата")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--force", action="store_true", help="игнорировать кэш хэшей")
+    ap.add_argument("--sparse", action="store_true", help="писать только отличия от шаблонов (только --to json)")
+    args = ap.parse_args(argv)
+    if args.sparse and args.to != 'json': ap.error("--sparse применим только к --to json: WGT всегда плотный")
+
+    paths = []
+    for pattern in args.inputs:
+        for p in sorted(glob.glob(pattern, recursive=True)) or ([pattern] if os.path.isfile(pattern) else []):
+            if p.lower().endswith(('.json', '.wgt')) and p not in paths: paths.append(p)
+    if not paths:
+        print("Нет входных файлов", file=sys.stderr); return 2
+    os.makedirs(args.out, exist_ok=True)
+
+    # x.json и x.wgt рядом дают один и тот же результат: ошибка до запуска заданий
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths])
+    outputs = {}
+    for p in paths: outputs.setdefault(output_path(p, root, args.out, args.to), []).append(p)
+    clashes = {out: ps for out, ps in outputs.items() if len(ps) > 1}
+    if clashes:
+        for out, ps in clashes.items(): print(f"Один результат {out} у файлов: {', '.join(ps)}", file=sys.stderr)
+        return 2
+
+    cache = {} if args.force else load_cache(args.out)
+    jobs, hashes, results = [], {}, []
+    for out_path, (p,) in outputs.items():
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        key = os.path.abspath(p)
+        hashes[key] = content_hash(p, args.to, args.sparse)
+        if cache.get(key) == hashes[key] and os.path.exists(out_path):
+            results.append({"path": p, "status": "skipped", "ms": 0.0})
+        else: jobs.append((p, out_path, args.to, args.sparse))
+
+    t0 = time.perf_counter()
+    if len(jobs) > 1 and args.jobs > 1:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(jobs))) as pool: results.extend(pool.map(convert, jobs))
+    else: results.extend(convert(j) for j in jobs)
+    wall = (time.perf_counter() - t0) * 1000
+
+    for r in results:
+        key = os.path.abspath(r['path'])
+        if r['status'] == 'ok': cache[key] = hashes[key]
+        elif r['status'] != 'skipped': cache.pop(key, None)
+    save_cache(args.out, cache)
+
+    order = {p: i for i, p in enumerate(paths)}
+    for r in sorted(results, key=lambda r: order[r['path']]):
+        print(f"{r['status']:<8}{r['ms']:>10.1f} ms  {r['path']}")
+        for e in r.get('errors', []): print(f"          {e}")
+    counts = {s: sum(1 for r in results if r['status'] == s) for s in ("ok", "skipped", "invalid", "error")}
+    print(f"\nВсего {len(results)}: " + ", ".join(f"{k} {v}" for k, v in counts.items()) +
+          f"; {wall:.1f} ms, процессов: {min(args.jobs, max(1, len(jobs)))}")
+    return 1 if counts['invalid'] or counts['error'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+# bench.py - Headless-бенчмарки редактора
+# Пример: python bench.py --widgets 2000 --depth 3 --out bench.json --compare base.json
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import copy
+
+from PySide6 import __version__ as PYSIDE_VERSION
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import Qt, QRectF
+from PySide6.QtGui import QImage, QPainter, QColor, QLinearGradient
+
+from config import WIDGET_TEMPLATES, APP_VERSION, SCREEN_WIDTH, SCREEN_HEIGHT
+
+CONTAINER_TYPES = [k for k, v in WIDGET_TEMPLATES.items() if v.get('is_container')]
+LEAF_TYPES = [k for k, v in WIDGET_TEMPLATES.items() if not v.get('is_container') and k != 'component']
+BENCHMARKS = []
+
+def benchmark(name, repeat=None):
+    def register(func):
+        BENCHMARKS.append((name, func, repeat))
+        return func
+    return register
+
+# --- ГЕНЕРАТОР СИНТЕТИЧЕСКИХ ПРОЕКТОВ ---
+def make_assets(asset_dir, count=4, size=1024):
+    paths = []
+    for i in range(count):
+        img = QImage(size, size, QImage.Format_ARGB32)
+        p = QPainter(img)
+        grad = QLinearGradient(0, 0, size, size)
+        grad.setColorAt(0, QColor.fromHsv(i * 80 % 360, 200, 230)); grad.setColorAt(1, QColor("#202020"))
+        p.fillRect(img.rect(), grad); p.end()
+        path = os.path.join(asset_dir, f"asset_{i}.png")
+        img.save(path)
+        paths.append(path)
+    return paths
+
+def generate_project(count, depth=3, image_mix=0.1, gradient_mix=0.3, seed=0, assets=()):
+    rnd = random.Random(seed)
+    root = {"id": "root", "type": "root_frame", "name": "Root Frame", "x": 0, "y": 0,
+            "width": SCREEN_WIDTH, "height": SCREEN_HEIGHT, "z_index": 0,
+            "style": {"bg_color": "#ffffff", "opacity": 1.0, "radius": 0, "border_width": 1}}
+    containers = [("root", SCREEN_WIDTH, SCREEN_HEIGHT, 0)]
+    widgets = []
+    for n in range(count):
+        parent_id, pw, ph, level = rnd.choice(containers)
+        can_nest = level + 1 < depth
+        w_type = rnd.choice(CONTAINER_TYPES if can_nest and rnd.random() < 0.3 else LEAF_TYPES)
+        data = copy.deepcopy(WIDGET_TEMPLATES[w_type])
+        w = max(20, min(data['width'], int(pw * 0.6))); h = max(20, min(data['height'], int(ph * 0.6)))
+        data.update({"id": f"w{n}", "name": f"{data['name']} {n}", "parent_id": parent_id, "z_index": n,
+                     "width": w, "height": h, "x": rnd.randint(0, max(0, pw - w)), "y": rnd.randint(0, max(0, ph - h))})
+        style, content = data['style'], data['content']
+        if assets and 'bg_image' in style and rnd.random() < image_mix: style['bg_image'] = rnd.choice(assets)
+        if rnd.random() < gradient_mix:
+            for d, key in ((style, 'use_gradient'), (content, 'use_gradient'), (content, 'use_text_gradient')):
+                if key in d: d[key] = True
+        widgets.append(data)
+        if data['is_container'] and can_nest: containers.append((data['id'], w, h, level + 1))
+    return {"version": APP_VERSION, "root": root, "widgets": widgets}
+
+# --- КОНТЕКСТ ---
+class BenchContext:
+    def __init__(self, args, workdir):
+        from main import GridScene, ProjectManager
+        from items import RootFrameItem
+        self.args = args
+        self.workdir = workdir
+        self.pm = ProjectManager
+        self.assets = make_assets(workdir) if args.images > 0 else []
+        self.project = generate_project(args.widgets, args.depth, args.images, args.gradients, args.seed, self.assets)
+        self.project_path = os.path.join(workdir, "project.json")
+        with open(self.project_path, 'w', encoding='utf-8') as f: json.dump(self.project, f, ensure_ascii=False)
+        self.wgt_path = os.path.join(workdir, "project.wgt")
+        self.scene = GridScene(2500, 1500)
+        self.root_frame = RootFrameItem(QRectF(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.scene.addItem(self.root_frame)
+        self.pm.load_project_data(self.project, self.root_frame, self.scene)
+
+    def widgets(self):
+        from items import WidgetItem
+        return [i for i in self.scene.items() if isinstance(i, WidgetItem)]
+
+    def render(self, scale=1.0):
+        rect = self.scene.sceneRect()
+        img = QImage(int(rect.width() * scale), int(rect.height() * scale), QImage.Format_ARGB32_Premultiplied)
+        img.fill(Qt.transparent)
+        p = QPainter(img)
+        p.setRenderHint(QPainter.Antialiasing); p.setRenderHint(QPainter.SmoothPixmapTransform)
+        self.scene.render(p, QRectF(img.rect()), rect)
+        p.end()
+
+# --- СЦЕНАРИИ ---
+@benchmark("save_project")
+def bench_save(ctx):
+    ctx.pm.save_project(os.path.join(ctx.workdir, "saved.json"), ctx.root_frame)
+
+@benchmark("load_project")
+def bench_load(ctx):
+    ok, msg = ctx.pm.load_project(ctx.project_path, ctx.root_frame, ctx.scene)
+    if not ok: raise RuntimeError(msg)
+
+@benchmark("export_product_wgt")
+def bench_export(ctx):
+    ctx.pm.export_product_wgt(ctx.wgt_path, ctx.root_frame)
+
+@benchmark("import_wgt")
+def bench_import(ctx):
+    if not os.path.exists(ctx.wgt_path): ctx.pm.export_product_wgt(ctx.wgt_path, ctx.root_frame)
+    ok, msg = ctx.pm.import_wgt(ctx.wgt_path, ctx.root_frame, ctx.scene)
+    if not ok: raise RuntimeError(msg)
+
+# Потоковый импорт не сбрасывает историю: команды над прежними виджетами должны
+# отменяться и после того, как загрузчик снял их со сцены (раньше здесь был segfault)
+@benchmark("stream_import_undo", repeat=1)
+def bench_stream_import_undo(ctx):
+    from PySide6.QtGui import QUndoStack
+    from loading import ProjectLoader
+    from main import PropertyCommand
+    from items import WidgetItem
+    widgets = ctx.widgets()
+    item = next((i for i in widgets if isinstance(i.parentItem(), WidgetItem)), widgets[0])   # вложенный, если есть
+    old = item.data_model.get('name')
+    stack = QUndoStack(); stack.push(PropertyCommand(item, "name", old, "renamed", None))
+    loader = ProjectLoader(ctx.root_frame, ctx.scene); result = []
+    loader.finished.connect(lambda ok, msg: result.append((ok, msg)))
+    loader.start(ctx.project_path)
+    while not result: QApplication.processEvents()
+    if not result[0][0]: raise RuntimeError(result[0][1])
+    stack.undo()
+    if item.data_model.get('name') != old: raise RuntimeError("отмена после импорта не вернула значение")
+    stack.redo(); stack.clear(); loader.release_retired()
+
+@benchmark("render_full_scene")
+def bench_render(ctx):
+    ctx.render()
+
+@benchmark("render_zoom_10")
+def bench_render_zoomed_out(ctx):
+    ctx.render(scale=0.1)
+
+@benchmark("hierarchy_refresh")
+def bench_tree(ctx):
+    from ui import HierarchyTree
+    if not hasattr(ctx, 'tree'): ctx.tree = HierarchyTree()
+    ctx.tree.refresh(ctx.root_frame)
+
+@benchmark("properties_set_item")
+def bench_props(ctx):
+    from ui import PropertiesPanel
+    if not hasattr(ctx, 'props'): ctx.props = PropertiesPanel()
+    seen = {}
+    for item in ctx.widgets(): seen.setdefault(item.data_model.get('type'), item)
+    for item in seen.values(): ctx.props.set_item(item)
+    ctx.props.set_item(None)
+    QApplication.processEvents()
+
+@benchmark("clock_ticks_1s")
+def bench_ticks(ctx):
+    for item in ctx.widgets(): item.on_tick()
+
+# --- ЗАПУСК ---
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+        return out.stdout.strip() or None
+    except Exception: return None
+
+def run_case(ctx, func, repeat):
+    func(ctx)  # прогрев
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter(); func(ctx); times.append((time.perf_counter() - t0) * 1000)
+    return {"runs": repeat, "min_ms": round(min(times), 3), "median_ms": round(statistics.median(times), 3),
+            "mean_ms": round(statistics.mean(times), 3), "max_ms": round(max(times), 3)}
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, 'r', encoding='utf-8') as f: base = json.load(f).get('results', {})
+    regressions = []
+    print(f"\n{'case':<28}{'base, ms':>12}{'now, ms':>12}{'delta':>10}")
+    for name, res in results.items():
+        if name not in base or 'median_ms' not in res or 'median_ms' not in base[name]: continue
+        b, n = base[name]['median_ms'], res['median_ms']
+        delta = (n - b) / b if b else 0.0
+        mark = " !" if delta > threshold else ""
+        print(f"{name:<28}{b:>12.3f}{n:>12.3f}{delta:>+9.1%}{mark}")
+        if delta > threshold: regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Headless-бенчмарки ChronoDash Builder")
+    ap.add_argument("--widgets", type=int, default=500)
+    ap.add_argument("--depth", type=int, default=3, help="максимальная вложенность контейнеров")
+    ap.add_argument("--images", type=float, default=0.1, help="доля виджетов с фоновой картинкой")
+    ap.add_argument("--gradients", type=float, default=0.3, help="доля виджетов с градиентом")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--only", nargs="*", help="запустить только указанные сценарии")
+    ap.add_argument("--out", help="путь к JSON с результатами (по умолчанию stdout)")
+    ap.add_argument("--compare", help="JSON предыдущего прогона для сравнения")
+    ap.add_argument("--threshold", type=float, default=0.2, help="допустимый рост медианы при сравнении")
+    ap.add_argument("--widget-kb", type=float, help="бюджет собственной памяти виджета, КБ (код возврата 1 при превышении)")
+    args = ap.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        t0 = time.perf_counter()
+        ctx = BenchContext(args, workdir)
+        results["setup"] = {"runs": 1, "median_ms": round((time.perf_counter() - t0) * 1000, 3)}
+        for name, func, repeat in BENCHMARKS:
+            if args.only and name not in args.only: continue
+            results[name] = run_case(ctx, func, repeat or args.repeat)
+            print(f"{name:<28}{results[name]['median_ms']:>12.3f} ms", file=sys.stderr)
+        from memory import report as memory_report
+        mem = memory_report(ctx.root_frame, budgets={"budget_widget_kb": args.widget_kb} if args.widget_kb else None, top=0)
+        memory = {k: mem[k] for k in ("subsystems", "total_kb", "widget_count", "mean_widget_kb", "max_widget_kb", "budget_widget_kb", "over_budget")}
+
+    report = {"meta": {"commit": git_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "app_version": APP_VERSION, "python": platform.python_version(), "pyside": PYSIDE_VERSION,
+                       "platform": platform.platform(),
+                       "params": {k: getattr(args, k) for k in ("widgets", "depth", "images", "gradients", "seed", "repeat")}},
+              "results": results, "memory": memory}
+    text = json.dumps(report, indent=4, ensure_ascii=False)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f: f.write(text)
+    else: print(text)
+    if args.compare and compare(results, args.compare, args.threshold): return 1
+    if args.widget_kb and memory['over_budget']:
+        print(f"Сверх бюджета памяти ({args.widget_kb} КБ): {len(memory['over_budget'])}", file=sys.stderr); return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
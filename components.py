@@ -0,0 +1,229 @@
+# components.py
+import copy
+import json
+import math
+import uuid
+import hashlib
+from collections import OrderedDict
+from PySide6.QtCore import QObject, Signal, QRectF, Qt
+from PySide6.QtGui import QImage, QPixmap, QPixmapCache, QPainter
+from PySide6.QtWidgets import QGraphicsScene, QStyleOptionGraphicsItem
+
+from items import WidgetItem, LIVE_TYPES
+from images import cache_pixmap
+OVERRIDE_KEYS = {"content": ("text", "format", "color", "font_family", "font_size", "value", "max_value", "bar_color"),
+                 "style": ("bg_color", "bg_image", "border_color")}
+MAX_RENDERERS = 32
+
+def digest(data):
+    return hashlib.sha1(json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+# --- БИБЛИОТЕКА КОМПОНЕНТОВ ---
+# Определение хранит дерево виджетов один раз; экземпляр (виджет типа "component")
+# хранит только component_id и словарь переопределений {id виджета: {style/content: {...}}}.
+class ComponentLibrary(QObject):
+    definition_changed = Signal(str)
+
+    def __init__(self):
+        super().__init__()
+        self.definitions = {}
+        self.digests = {}
+
+    def add_definition(self, name, width, height, widgets, def_id=None):
+        def_id = def_id or str(uuid.uuid4())
+        self.set_definition({"id": def_id, "name": name, "width": int(width), "height": int(height), "widgets": widgets})
+        return def_id
+
+    def set_definition(self, definition):
+        def_id = definition['id']
+        self.definitions[def_id] = definition
+        self.digests[def_id] = digest(definition)
+        self.definition_changed.emit(def_id)
+
+    def get(self, def_id): return self.definitions.get(def_id)
+
+    def renderer(self, def_id):
+        definition = self.definitions.get(def_id)
+        if definition is None: return None
+        return component_renderer(self.digests[def_id], definition, self)
+
+    def to_data(self): return copy.deepcopy(self.definitions)
+
+    def load_data(self, data):
+        self.definitions.clear(); self.digests.clear()
+        for definition in (data or {}).values(): self.set_definition(copy.deepcopy(definition))
+
+# Поддерево виджета (включая сам виджет) -> список данных определения с координатами от (0, 0)
+def definition_widgets(top):
+    widgets = []
+    def collect(item, parent_id):
+        item.update_model()
+        data = copy.deepcopy(item.data_model)
+        data['parent_id'] = parent_id; data['z_index'] = item.zValue()
+        if parent_id is None: data['x'] = 0; data['y'] = 0
+        widgets.append(data)
+        if getattr(item, 'is_container', False):
+            for child in sorted(item.childItems(), key=lambda c: c.zValue()):
+                if isinstance(child, WidgetItem): collect(child, data['id'])
+    collect(top, None)
+    return widgets
+
+# --- РАЗВЁРНУТЫЙ ЧЕРНОВИК ---
+# Черновик экземпляра: свежие id (два развёрнутых экземпляра не делят uid в индексах
+# сцены) и переопределения экземпляра поверх определения. ids: новый id -> id в определении.
+def draft_definition(definition, overrides):
+    draft = copy.deepcopy(definition)
+    fresh = {w['id']: str(uuid.uuid4()) for w in draft.get('widgets', [])}
+    for w in draft.get('widgets', []):
+        for section, values in (overrides or {}).get(w['id'], {}).items():
+            if isinstance(values, dict): w.setdefault(section, {}).update(values)
+        w['id'] = fresh[w['id']]
+        if w.get('parent_id') is not None: w['parent_id'] = fresh.get(w['parent_id'], w['parent_id'])
+    return draft, {new: old for old, new in fresh.items()}
+
+# Обратно в определение: id возвращаются, значения, равные переопределению, остаются
+# переопределением экземпляра, изменённые в черновике поля уходят в определение
+def merge_draft(widgets, ids, definition, overrides):
+    base = {w['id']: w for w in definition.get('widgets', [])}
+    overrides = copy.deepcopy(overrides or {})
+    for w in widgets:
+        w['id'] = ids.get(w['id'], w['id'])
+        if w.get('parent_id') is not None: w['parent_id'] = ids.get(w['parent_id'], w['parent_id'])
+        orig = base.get(w['id'], {})
+        for section, values in overrides.get(w['id'], {}).items():
+            if not isinstance(values, dict): continue
+            current, original = w.setdefault(section, {}), orig.get(section, {})
+            for key, val in list(values.items()):
+                if current.get(key) != val: del values[key]
+                elif key in original: current[key] = original[key]
+                else: current.pop(key, None)
+    overrides = {lid: {s: v for s, v in sections.items() if v} for lid, sections in overrides.items()}
+    return widgets, {lid: sections for lid, sections in overrides.items() if sections}
+
+# Определение -> живые элементы; верхние кладутся в parent (элемент или сцену)
+def build_items(definition, parent):
+    items = {}
+    widgets = definition.get('widgets', [])
+    for w_data in widgets:
+        item = WidgetItem(w_data.get('type', 'rect'), w_data.get('x', 0), w_data.get('y', 0), None)
+        item.apply_data(w_data)
+        items[w_data['id']] = item
+    for w_data in widgets:
+        item = items[w_data['id']]
+        owner = items.get(w_data.get('parent_id'))
+        if owner is not None: item.setParentItem(owner)
+        elif isinstance(parent, QGraphicsScene): parent.addItem(item)
+        else: item.setParentItem(parent)
+        item.setZValue(w_data.get('z_index', 0))
+        item.setPos(w_data.get('x', 0), w_data.get('y', 0))
+    return items
+
+# --- ОБЩИЙ РЕНДЕР ОПРЕДЕЛЕНИЯ ---
+# Один набор Qt-элементов на определение, общий для всех экземпляров (и вкладок).
+# Вложенные компоненты разрешаются по библиотеке того, кто рисует: она привязывается
+# к рендеру при каждом запросе. Статичная часть рисуется в QPixmapCache по ключу
+# (определение, вложенные определения, переопределения, размер), живые часы/даты
+# дорисовываются поверх на каждом кадре.
+_renderers = OrderedDict()
+
+def component_renderer(key, definition, library):
+    renderer = _renderers.get(key)
+    if renderer is None:
+        renderer = ComponentRenderer(key, definition, library)
+        _renderers[key] = renderer
+        while len(_renderers) > MAX_RENDERERS: _renderers.popitem(last=False)
+    else: _renderers.move_to_end(key); renderer.scene.components = library
+    return renderer
+
+# Дайджесты вложенных определений (на любую глубину) в библиотеке
+def nested_digests(library, def_ids, seen=None):
+    seen = set() if seen is None else seen
+    out = []
+    for cid in def_ids:
+        if cid in seen: continue
+        seen.add(cid)
+        out.append(library.digests.get(cid, ""))
+        inner = library.get(cid)
+        if inner is not None: out.extend(nested_digests(library, component_ids(inner), seen))
+    return out
+
+def component_ids(definition):
+    return [w.get('content', {}).get('component_id') for w in definition.get('widgets', []) if w.get('type') == 'component']
+
+def scale_tier(lod):
+    return min(4.0, max(0.125, 2.0 ** math.ceil(math.log2(max(lod, 1e-3)))))
+
+class ComponentRenderer:
+    def __init__(self, key, definition, library):
+        self.key = key
+        self.width = max(1, definition.get('width', 100)); self.height = max(1, definition.get('height', 100))
+        self.scene = QGraphicsScene(0, 0, self.width, self.height)
+        self.scene.components = library
+        self.items = build_items(definition, self.scene)
+        self.base = {w['id']: copy.deepcopy(w) for w in definition.get('widgets', [])}
+        for item in self.items.values():
+            if item.timer is not None: item.timer.stop()
+        self.live_ids = [w['id'] for w in definition.get('widgets', []) if w.get('type') in LIVE_TYPES]
+        self.nested_ids = component_ids(definition)
+
+    def apply_overrides(self, overrides):
+        for lid, sections in overrides.items():
+            item = self.items.get(lid)
+            if item is None: continue
+            for section, values in sections.items():
+                if isinstance(values, dict): item.data_model.setdefault(section, {}).update(values)
+            item.refresh_content()
+
+    def restore(self, overrides):
+        for lid in overrides:
+            item = self.items.get(lid)
+            if item is None: continue
+            item.data_model = copy.deepcopy(self.base[lid])
+            item.refresh_content()
+
+    def static_pixmap(self, w, h, overrides):
+        nested = digest(nested_digests(self.scene.components, self.nested_ids)) if self.nested_ids else ""
+        key = f"cmp:{self.key}:{nested}:{digest(overrides) if overrides else ''}:{w}x{h}"
+        pixmap = QPixmapCache.find(key)
+        if pixmap is None:
+            img = QImage(w, h, QImage.Format_ARGB32_Premultiplied)
+            img.fill(Qt.transparent)
+            p = QPainter(img)
+            p.setRenderHint(QPainter.Antialiasing); p.setRenderHint(QPainter.SmoothPixmapTransform)
+            self.apply_overrides(overrides)
+            for lid in self.live_ids: self.items[lid].setVisible(False)
+            self.scene.render(p, QRectF(0, 0, w, h), QRectF(0, 0, self.width, self.height), Qt.IgnoreAspectRatio)
+            for lid in self.live_ids: self.items[lid].setVisible(True)
+            self.restore(overrides)
+            p.end()
+            pixmap = QPixmap.fromImage(img)
+            cache_pixmap(key, pixmap)
+        return pixmap
+
+    def paint(self, painter, target, overrides, lod=1.0):
+        scale = scale_tier(lod)
+        w = max(1, math.ceil(target.width() * scale)); h = max(1, math.ceil(target.height() * scale))
+        pixmap = self.static_pixmap(w, h, overrides)
+        painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
+        if self.live_ids: self.paint_live(painter, target, overrides)
+
+    def paint_live(self, painter, target, overrides):
+        option = QStyleOptionGraphicsItem()
+        painter.save()
+        painter.translate(target.topLeft())
+        painter.scale(target.width() / self.width, target.height() / self.height)
+        for lid in self.live_ids:
+            item = self.items[lid]
+            own = {lid: overrides[lid]} if lid in overrides else {}
+            self.apply_overrides(own)
+            item.refresh_content()
+            painter.save()
+            painter.setTransform(item.sceneTransform(), True)
+            item.paint(painter, option, None)
+            proxy = item.content_proxy
+            if proxy is not None and not proxy.document().isEmpty():
+                painter.translate(proxy.pos())
+                proxy.paint(painter, option, None)
+            painter.restore()
+            self.restore(own)
+        painter.restore()
@@ -18,6 +18,54 @@ def set_setting(key, value):
     s = QSettings("Overl1te", "ChronoBuilder")
     s.setValue(key, value)
 
+# --- ХОЛСТ И ЭКРАНЫ ---
+# Раскладка: "1920x1080" или несколько экранов через запятую. Экран без смещения
+# ставится справа от предыдущего, "WxH+X+Y" задаёт позицию явно.
+CANVAS_DEFAULT = (2500, 1500)
+CANVAS_MARGIN = 100
+SCREENS_DEFAULT = f"{SCREEN_WIDTH}x{SCREEN_HEIGHT}"
+
+def parse_screens(spec):
+    screens, right = [], 0
+    for part in spec.replace(' ', '').split(','):
+        if not part: continue
+        size, _, pos = part.partition('+')
+        w, h = (int(v) for v in size.lower().split('x'))
+        if pos: x, y = (int(v) for v in pos.split('+'))
+        else: x, y = right, 0
+        if w <= 0 or h <= 0 or x < 0 or y < 0: raise ValueError(part)
+        screens.append((x, y, w, h)); right = max(right, x + w)
+    if not screens: raise ValueError(spec)
+    return screens
+
+def screen_layout():
+    try: return parse_screens(get_setting("screens", SCREENS_DEFAULT, type=str))
+    except ValueError: return parse_screens(SCREENS_DEFAULT)
+
+def canvas_size(screens):
+    w = max(x + sw for x, _, sw, _ in screens) + 2 * CANVAS_MARGIN
+    h = max(y + sh for _, y, _, sh in screens) + 2 * CANVAS_MARGIN
+    return (max(w, get_setting("canvas_width", CANVAS_DEFAULT[0], type=int)),
+            max(h, get_setting("canvas_height", CANVAS_DEFAULT[1], type=int)))
+
+# --- УРОВНИ ДЕТАЛИЗАЦИИ ---
+# Масштаб вида, ниже которого текст рисуется плашками, градиенты — сплошной
+# заливкой, а картинки — уменьшенными копиями. Значения хранятся в настройках.
+LOD_DEFAULTS = {"lod_text": 0.35, "lod_gradient": 0.25, "lod_image": 0.5}
+LOD_TIERS = dict(LOD_DEFAULTS)
+
+def load_lod_tiers():
+    for key, default in LOD_DEFAULTS.items(): LOD_TIERS[key] = get_setting(key, default, type=float)
+    return LOD_TIERS
+
+# --- БЮДЖЕТЫ ПРОИЗВОДИТЕЛЬНОСТИ (.wgt на рабочем столе) ---
+BUDGET_DEFAULTS = {"budget_refreshing": 10, "budget_image_mb": 32.0, "budget_gradients": 20, "budget_clips": 100,
+                   "budget_text_per_tick": 10, "budget_paint_ms": 8.0, "budget_widget_ms": 1.0, "budget_widget_image_mb": 8.0,
+                   "budget_widget_kb": 64.0}
+
+def load_budgets():
+    return {key: get_setting(key, default, type=type(default)) for key, default in BUDGET_DEFAULTS.items()}
+
 # --- ТЕМЫ (VS Code Style) ---
 THEMES = {
     "Dark": """
@@ -138,5 +186,11 @@ WIDGET_TEMPLATES = {
             "format": "%A, %d %b", "font_family": "Arial", "font_size": 18, "color": "#000000",
             "use_text_gradient": False, "text_grad_start": "#000000", "text_grad_end": "#555555", "text_grad_angle": 90
         }
+    },
+    "component": {
+        "type": "component", "name": "Компонент", "width": 200, "height": 200,
+        "is_container": False, "z_index": 0,
+        "style": {"opacity": 1.0},
+        "content": {"component_id": "", "overrides": {}}
     }
 }
\ No newline at end of file
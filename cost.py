@@ -0,0 +1,166 @@
+# cost.py - Оценка стоимости виджета на рабочем столе и проверка бюджетов
+# Пример (CI): python cost.py project.json --calibrate --budget budget_paint_ms=6
+import os
+import sys
+import time
+import json
+import argparse
+
+from PySide6.QtCore import Qt, QRectF
+from PySide6.QtGui import QImage, QImageReader, QPainter
+
+from config import BUDGET_DEFAULTS
+from items import WidgetItem, paints_fill, is_live, LIVE_TYPES
+
+# Модель стоимости отрисовки, мс. Абсолютные значения грубые; калибровка по
+# реальному headless-рендеру масштабирует их под конкретную машину.
+COST_WIDGET = 0.004
+COST_FILL_MPX = 0.6
+COST_GRADIENT_MPX = 2.0
+COST_IMAGE_MPX = 1.5
+COST_CLIP = 0.01
+COST_TEXT = 0.04
+
+METRICS = [("refreshing", "Обновляются каждую секунду", "budget_refreshing"),
+           ("image_mb", "Декодированные картинки, МБ", "budget_image_mb"),
+           ("gradients", "Градиенты", "budget_gradients"),
+           ("clips", "Clip-пути", "budget_clips"),
+           ("text_per_tick", "Раскладок текста за тик", "budget_text_per_tick"),
+           ("paint_ms", "Оценка полной отрисовки, мс", "budget_paint_ms")]
+
+def image_size(path, cache):
+    if path not in cache:
+        size = QImageReader(path).size() if os.path.exists(path) else None
+        cache[path] = (size.width(), size.height()) if size is not None and size.isValid() else (0, 0)
+    return cache[path]
+
+# --- ОЦЕНКА ОДНОГО ВИДЖЕТА ---
+def widget_cost(item, sizes):
+    data = item.data_model
+    style, content = data.get('style', {}), data.get('content', {})
+    w, h = item.rect().width(), item.rect().height()
+    mpx = w * h / 1e6
+    live = is_live(data)
+    c = {"refreshing": int(live), "image_bytes": 0, "gradients": 0, "clips": 0, "text_per_tick": 0, "model_ms": COST_WIDGET}
+    if paints_fill(style):
+        c['clips'] += 1
+        c['model_ms'] += COST_CLIP + COST_FILL_MPX * mpx
+    if style.get('bg_image'):
+        sw, sh = image_size(style['bg_image'], sizes)
+        bw, bh = int(style.get('bg_w', 0)), int(style.get('bg_h', 0))
+        scaled = (bw * bh) if bw > 0 and bh > 0 else (w * h if sw and sh else 0)
+        c['image_bytes'] += scaled * 4
+        c['model_ms'] += COST_IMAGE_MPX * scaled / 1e6
+    for d, key in ((style, 'use_gradient'), (content, 'use_gradient'), (content, 'use_text_gradient')):
+        if d.get(key):
+            c['gradients'] += 1
+            c['model_ms'] += COST_GRADIENT_MPX * mpx
+    if data.get('type') == 'progress':
+        c['clips'] += 1
+        c['model_ms'] += COST_CLIP
+    if data.get('type') in ('text',) + LIVE_TYPES:
+        c['model_ms'] += COST_TEXT
+        if live: c['text_per_tick'] += 1
+    return c
+
+def walk(root):
+    out = []
+    def visit(item):
+        for child in sorted((c for c in item.childItems() if isinstance(c, WidgetItem)), key=lambda c: c.zValue()):
+            out.append(child); visit(child)
+    visit(root)
+    return out
+
+# Время реального рендера области корневого фрейма (без фона сцены и сетки)
+def measure_render(root, repeat=3):
+    scene = root.scene()
+    area = root.mapRectToScene(root.rect())
+    img = QImage(max(1, int(area.width())), max(1, int(area.height())), QImage.Format_ARGB32_Premultiplied)
+    times = []
+    for _ in range(repeat + 1):
+        img.fill(Qt.transparent)
+        p = QPainter(img)
+        p.setRenderHint(QPainter.Antialiasing); p.setRenderHint(QPainter.SmoothPixmapTransform)
+        t0 = time.perf_counter()
+        scene.render(p, QRectF(img.rect()), area)
+        times.append((time.perf_counter() - t0) * 1000)
+        p.end()
+    return min(times[1:])
+
+# --- ОЦЕНКА ПРОЕКТА ---
+def estimate(root, budgets=None, calibrate=False):
+    budgets = dict(BUDGET_DEFAULTS, **(budgets or {}))
+    sizes = {}
+    rows = []
+    for item in walk(root):
+        rows.append((item, widget_cost(item, sizes)))
+    unique_images = {p: s for p, s in sizes.items() if s[0]}
+    source_bytes = sum(w * h * 4 for w, h in unique_images.values())
+    model_total = sum(c['model_ms'] for _, c in rows) or 1e-9
+    measured = measure_render(root) if calibrate else None
+    factor = measured / model_total if measured else 1.0
+    totals = {"refreshing": sum(c['refreshing'] for _, c in rows),
+              "image_mb": round((source_bytes + sum(c['image_bytes'] for _, c in rows)) / 2 ** 20, 2),
+              "gradients": sum(c['gradients'] for _, c in rows),
+              "clips": sum(c['clips'] for _, c in rows),
+              "text_per_tick": sum(c['text_per_tick'] for _, c in rows),
+              "paint_ms": round(measured if measured else model_total, 3)}
+    over = [key for key, _, budget in METRICS if totals[key] > budgets[budget]]
+    widgets = []
+    for item, c in rows:
+        ms = c['model_ms'] * factor
+        flags = []
+        if ms > budgets['budget_widget_ms']: flags.append("paint_ms")
+        if c['image_bytes'] / 2 ** 20 > budgets['budget_widget_image_mb']: flags.append("image_mb")
+        widgets.append({"item": item, "id": item.data_model.get('id'), "name": item.data_model.get('name', ''),
+                        "type": item.data_model.get('type', ''), "paint_ms": round(ms, 4),
+                        "image_mb": round(c['image_bytes'] / 2 ** 20, 3), "refreshing": bool(c['refreshing']), "flags": flags})
+    widgets.sort(key=lambda w: w['paint_ms'], reverse=True)
+    return {"totals": totals, "budgets": budgets, "over_budget": over, "calibrated": measured is not None,
+            "calibration_factor": round(factor, 4), "widgets": widgets}
+
+def report_json(result):
+    out = dict(result)
+    out['widgets'] = [{k: v for k, v in w.items() if k != 'item'} for w in result['widgets']]
+    return out
+
+# --- CLI ---
+def main(argv=None):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    ap = argparse.ArgumentParser(description="Оценка стоимости виджета и проверка бюджетов")
+    ap.add_argument("project", help="проект .json или .wgt")
+    ap.add_argument("--calibrate", action="store_true", help="замерить реальный headless-рендер")
+    ap.add_argument("--budget", action="append", default=[], metavar="KEY=VALUE", help="переопределить бюджет")
+    ap.add_argument("--json", action="store_true", help="вывести отчёт в JSON")
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args(argv)
+
+    budgets = {}
+    for spec in args.budget:
+        key, _, value = spec.partition("=")
+        if key not in BUDGET_DEFAULTS: ap.error(f"неизвестный бюджет {key}")
+        budgets[key] = type(BUDGET_DEFAULTS[key])(float(value))
+
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    from main import GridScene, ProjectManager
+    from items import RootFrameItem
+    from project import read_project
+    from config import SCREEN_WIDTH, SCREEN_HEIGHT
+    scene = GridScene(2500, 1500)
+    root = RootFrameItem(QRectF(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)); scene.addItem(root)
+    ProjectManager.load_project_data(read_project(args.project), root, scene)
+    result = estimate(root, budgets, args.calibrate)
+
+    if args.json: print(json.dumps(report_json(result), indent=4, ensure_ascii=False))
+    else:
+        for key, label, budget in METRICS:
+            mark = "  ПРЕВЫШЕН" if key in result['over_budget'] else ""
+            print(f"{label:<32}{result['totals'][key]:>10} / {result['budgets'][budget]}{mark}")
+        flagged = [w for w in result['widgets'] if w['flags']][:args.top]
+        if flagged: print("\nВиджеты сверх бюджета:")
+        for w in flagged: print(f"  {w['name']:<28}{w['type']:<10}{w['paint_ms']:>8.3f} ms{w['image_mb']:>8.2f} MB  {','.join(w['flags'])}")
+    return 1 if result['over_budget'] or any(w['flags'] for w in result['widgets']) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
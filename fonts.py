@@ -0,0 +1,93 @@
+# fonts.py
+import threading
+from PySide6.QtCore import QObject, Signal, QStringListModel, Qt
+from PySide6.QtGui import QFont, QFontDatabase, QFontInfo
+from PySide6.QtWidgets import QComboBox, QStyledItemDelegate, QStyleOptionViewItem
+
+# --- ОБЩАЯ БАЗА ШРИФТОВ ---
+# Список семейств перечисляется один раз в фоновом потоке и отдаётся всем
+# выпадающим спискам через общую модель; превью рисуется только для видимых строк.
+class FontDatabase(QObject):
+    loaded = Signal()
+    families_ready = Signal(list)
+
+    def __init__(self):
+        super().__init__()
+        self.model = QStringListModel(self)
+        self.is_loaded = False
+        self.loading = False
+        self.fonts = {}
+        self.preview_fonts = {}
+        self.substitutions = {}
+        self.families_ready.connect(self.on_families_ready)
+
+    def load_async(self):
+        if self.is_loaded or self.loading: return
+        self.loading = True
+        threading.Thread(target=lambda: self.families_ready.emit(QFontDatabase.families()), daemon=True).start()
+
+    def on_families_ready(self, families):
+        self.model.setStringList(families)
+        self.is_loaded = True; self.loading = False
+        self.loaded.emit()
+
+    def resolve(self, family, size=12):
+        key = (family, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = QFont(family, size)
+            actual = QFontInfo(font).family()
+            if actual.lower() != family.lower(): self.substitutions[family] = actual
+            self.fonts[key] = font
+        return font
+
+    def preview_font(self, family):
+        font = self.preview_fonts.get(family)
+        if font is None:
+            font = QFont(family)
+            self.preview_fonts[family] = font
+        return font
+
+_font_db = None
+
+def font_database():
+    global _font_db
+    if _font_db is None: _font_db = FontDatabase()
+    return _font_db
+
+class FontPreviewDelegate(QStyledItemDelegate):
+    def paint(self, painter, option, index):
+        opt = QStyleOptionViewItem(option)
+        opt.font = font_database().preview_font(index.data(Qt.DisplayRole))
+        super().paint(painter, opt, index)
+
+# --- ВЫБОР ШРИФТА ---
+class FontPicker(QComboBox):
+    family_chosen = Signal(str)
+
+    def __init__(self, family="", parent=None):
+        super().__init__(parent)
+        db = font_database()
+        self.setEditable(True)
+        self.setInsertPolicy(QComboBox.NoInsert)
+        self.setModel(db.model)
+        self.setItemDelegate(FontPreviewDelegate(self))
+        self.view().setUniformItemSizes(True)
+        self.set_family(family)
+        self.activated.connect(lambda i: self.choose(self.itemText(i)))
+        self.lineEdit().editingFinished.connect(lambda: self.choose(self.currentText()))
+        db.loaded.connect(self.restore_text)
+        db.load_async()
+
+    def restore_text(self): self.setEditText(self.family)
+
+    def set_family(self, family):
+        self.family = family
+        self.setEditText(family)
+        sub = font_database().substitutions.get(family)
+        self.setToolTip(f"Нет в системе, используется: {sub}" if sub else "")
+
+    def choose(self, family):
+        if not family or family == self.family: return
+        self.set_family(family)
+        self.family_chosen.emit(family)
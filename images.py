@@ -0,0 +1,148 @@
+# images.py
+import math
+import threading
+from PySide6.QtCore import QObject, QRunnable, QThread, QThreadPool, QRectF, Qt, Signal
+from PySide6.QtGui import QImage, QImageReader, QPixmap, QPixmapCache, QPainter
+from PySide6.QtSvg import QSvgRenderer
+
+MIN_DECODE = 32
+LOD_DECODE = 128           # сторона картинки ниже порога lod_image
+SVG_MAX = 4096             # предел стороны растра для векторных картинок
+CACHE_LIMIT_KB = 64 * 1024
+
+CACHED_KEYS = set()        # ключи, положенные в QPixmapCache (для отчёта о памяти)
+PRUNE_KEYS = 256
+
+def is_vector(path): return path.lower().endswith(('.svg', '.svgz'))
+
+def decode(path, src=None, size=None):
+    reader = QImageReader(path)
+    if src is not None: reader.setClipRect(src)
+    if size is not None: reader.setScaledSize(size)
+    return reader.read()
+
+# Сторона декода округляется вверх до степени двойки: при зуме соседние масштабы
+# используют один и тот же декод, а не запускают новый.
+def bucket(side, limit):
+    side = max(MIN_DECODE, 1 << max(0, math.ceil(math.log2(max(1, side)))))
+    return min(side, limit)
+
+# SVG разбирается один раз в QSvgRenderer и растрируется под нужный размер;
+# один рендерер не используется из двух потоков одновременно
+class VectorSource:
+    def __init__(self, path):
+        self.renderer = QSvgRenderer(path)
+        self.lock = threading.Lock()
+    def size(self): return self.renderer.defaultSize()
+    def render(self, size):
+        image = QImage(size, QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.transparent)
+        with self.lock:
+            p = QPainter(image)
+            p.setRenderHint(QPainter.Antialiasing); p.setRenderHint(QPainter.SmoothPixmapTransform)
+            self.renderer.render(p, QRectF(image.rect()))
+            p.end()
+        return image
+
+class DecodeTask(QRunnable):
+    def __init__(self, loader, key, path, src, size):
+        super().__init__()
+        self.loader, self.key, self.path, self.src, self.size = loader, key, path, src, size
+    def run(self): self.loader.decoded.emit(self.key, self.loader.decode(self.path, self.src, self.size))
+
+# --- ФОНОВОЕ ДЕКОДИРОВАНИЕ ---
+# Картинки декодируются в пуле потоков сразу в размере, нужном на экране
+# (QImageReader.setScaledSize). Пока декод не готов, виджет рисует заглушку или
+# последний готовый вариант этой картинки; по готовности перерисовываются только
+# ожидавшие виджеты. Рендер в QImage/QPixmap (экспорт, превью) декодирует синхронно.
+class ImageLoader(QObject):
+    decoded = Signal(str, QImage)
+
+    def __init__(self):
+        super().__init__()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(2, QThread.idealThreadCount() - 1))
+        self.sizes = {}      # путь -> размер источника (читается только заголовок)
+        self.vectors = {}    # путь -> VectorSource
+        self.vector_lock = threading.Lock()
+        self.pending = {}    # ключ -> ((путь, src), ожидающие виджеты)
+        self.latest = {}     # (путь, src) -> ключ последнего готового декода
+        self.failed = set()
+        self.decoded.connect(self.on_decoded)
+        QPixmapCache.setCacheLimit(max(QPixmapCache.cacheLimit(), CACHE_LIMIT_KB))
+
+    def vector(self, path):
+        with self.vector_lock:
+            source = self.vectors.get(path)
+            if source is None: source = self.vectors[path] = VectorSource(path)
+        return source
+
+    def source_size(self, path, src=None):
+        if src is not None: return src.size()
+        size = self.sizes.get(path)
+        if size is None: size = self.sizes[path] = self.vector(path).size() if is_vector(path) else QImageReader(path).size()
+        return size
+
+    # Растр декодируется не крупнее источника; вектор — в любом ярусе до SVG_MAX
+    def decode_size(self, path, src, target):
+        source = self.source_size(path, src)
+        longest = max(source.width(), source.height())
+        wanted = math.ceil(max(target.width(), target.height()))
+        if src is None and is_vector(path): return source.scaled(bucket(wanted, SVG_MAX), bucket(wanted, SVG_MAX), Qt.KeepAspectRatio)
+        side = bucket(wanted, longest)
+        return None if side >= longest else source.scaled(side, side, Qt.KeepAspectRatio)
+
+    def decode(self, path, src, size):
+        if src is None and is_vector(path): return self.vector(path).render(size)
+        return decode(path, src, size)
+
+    # Возвращает QPixmap (возможно, пустой при ошибке чтения) или None, пока декод в пути
+    def pixmap(self, path, src, target, item=None):
+        size = self.decode_size(path, src, target)
+        base = (path, None if src is None else (src.x(), src.y(), src.width(), src.height()))
+        key = f"img:{path}:{base[1]}:{'full' if size is None else f'{size.width()}x{size.height()}'}"
+        pixmap = QPixmapCache.find(key)
+        if pixmap is not None: return pixmap
+        if key in self.failed: return QPixmap()
+        if item is None:
+            image = self.decode(path, src, size)
+            pixmap = QPixmap.fromImage(image)
+            if image.isNull(): self.failed.add(key)
+            else: cache_pixmap(key, pixmap); self.latest[base] = key
+            return pixmap
+        waiting = self.pending.get(key)
+        if waiting is None:
+            self.pending[key] = (base, [item])
+            self.pool.start(DecodeTask(self, key, path, src, size))
+        elif item not in waiting[1]: waiting[1].append(item)
+        return QPixmapCache.find(self.latest.get(base, ""))
+
+    def on_decoded(self, key, image):
+        base, items = self.pending.pop(key, (None, []))
+        if image.isNull(): self.failed.add(key)
+        else:
+            cache_pixmap(key, QPixmap.fromImage(image))
+            self.latest[base] = key
+        for item in items:
+            try: item.update()
+            except RuntimeError: pass
+
+# QPixmapCache не перечисляет содержимое, поэтому ключи запоминаются при вставке.
+# Вытесненные отсеиваются при чтении отчёта и при вставке, когда набор вырос вдвое
+# с прошлой чистки: так он не растёт без предела и в среднем стоит O(1) на вставку.
+_prune_at = PRUNE_KEYS
+
+def cache_pixmap(key, pixmap):
+    global _prune_at
+    QPixmapCache.insert(key, pixmap)
+    CACHED_KEYS.add(key)
+    if len(CACHED_KEYS) >= _prune_at:
+        for k in [k for k in CACHED_KEYS if QPixmapCache.find(k) is None]: CACHED_KEYS.discard(k)
+        _prune_at = max(PRUNE_KEYS, 2 * len(CACHED_KEYS))
+
+_loader = None
+
+def image_loader():
+    global _loader
+    if _loader is None: _loader = ImageLoader()
+    return _loader
@@ -5,11 +5,53 @@ import os
 import math
 import copy
 from datetime import datetime
-from PySide6.QtWidgets import QGraphicsRectItem, QGraphicsItem, QGraphicsTextItem, QGraphicsObject
-from PySide6.QtCore import Qt, QPointF, QTimer, QRectF, QRect, Signal
-from PySide6.QtGui import QBrush, QPen, QColor, QFont, QLinearGradient, QPixmap, QPainter, QPainterPath
+from PySide6.QtWidgets import QApplication, QWidget, QGraphicsRectItem, QGraphicsItem, QGraphicsTextItem, QGraphicsObject, QStyleOptionGraphicsItem
+from PySide6.QtCore import Qt, QPointF, QTimer, QRectF, QRect, QSizeF, Signal
+from PySide6.QtGui import QBrush, QPen, QColor, QLinearGradient, QPainter, QPainterPath
 
-from config import WIDGET_TEMPLATES
+from config import WIDGET_TEMPLATES, LOD_TIERS, get_setting
+from fonts import font_database
+from snapping import snap_position, snap_size
+from images import image_loader, LOD_DECODE
+
+# --- ЖИВОЙ КОНТЕНТ ---
+# Виджеты, содержимое которых меняется во время работы (время, дата, системные плейсхолдеры)
+LIVE_TYPES = ("clock", "date")
+PLACEHOLDERS = ("{cpu}", "{ram}", "{bat}")
+TEXT_KEYS = ("font_family", "font_size", "color", "use_text_gradient", "text_grad_start", "text_grad_end", "text_grad_angle")
+
+def is_live(data):
+    t = data.get('type')
+    if t in LIVE_TYPES: return True
+    if t == 'text': return any(p in data.get('content', {}).get('text', '') for p in PLACEHOLDERS)
+    return False
+
+# --- ШАБЛОНЫ ---
+# Шаблон сериализуется один раз на процесс (общий для всех вкладок); новый виджет
+# получает свою копию разбором готовой строки
+_template_json = {}
+
+def template_copy(key):
+    text = _template_json.get(key)
+    if text is None: text = _template_json[key] = json.dumps(WIDGET_TEMPLATES.get(key, {}))
+    return json.loads(text)
+
+# --- УРОВЕНЬ ДЕТАЛИЗАЦИИ ---
+def level_of_detail(painter):
+    return QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+
+def paints_fill(style):
+    if float(style.get('opacity', 1.0)) <= 0: return False
+    return style.get('bg_color', '#ffffff') != 'transparent' or bool(style.get('bg_image')) or bool(style.get('use_gradient'))
+
+def mix_colors(a, b):
+    ca, cb = QColor(a), QColor(b)
+    return QColor((ca.red() + cb.red()) // 2, (ca.green() + cb.green()) // 2, (ca.blue() + cb.blue()) // 2, (ca.alpha() + cb.alpha()) // 2)
+
+# Под-прямоугольник картинки в атласе (экспорт с упаковкой атласов)
+def atlas_rect(style):
+    if int(style.get('atlas_w', 0)) <= 0: return None
+    return QRect(int(style['atlas_x']), int(style['atlas_y']), int(style['atlas_w']), int(style['atlas_h']))
 
 # --- УЛУЧШЕННАЯ РУЧКА ---
 class HandleItem(QGraphicsRectItem):
@@ -38,39 +80,57 @@ class HandleItem(QGraphicsRectItem):
 class BaseResizableItem(QGraphicsObject):
     interaction_started = Signal(object)
     interaction_finished = Signal(object)
+    searchable = False   # попадает ли элемент в поисковый индекс сцены
 
     def __init__(self, x, y, w, h, parent=None):
         super().__init__(parent)
-        self.rect_geom = QRectF(0, 0, w, h)
+        self.rect_geom = QRectF(0, 0, w, h); self.bounds = self.rect_geom.adjusted(-8, -8, 8, 8)
         self.setPos(x, y)
         self.setFlags(QGraphicsItem.ItemIsMovable | QGraphicsItem.ItemIsSelectable | QGraphicsItem.ItemSendsGeometryChanges)
         self.setAcceptHoverEvents(True)
-        self.resize_handle = HandleItem(self)
-        self.update_handle_pos()
-        self.resize_handle.hide()
+        self.resize_handle = None   # создаётся при первом выделении, снимается при снятии выделения
         self.uid = str(uuid.uuid4())
         self.data_model = {"id": self.uid}
         self.is_locked = False 
+        self.snap_options = None
 
     def rect(self): return self.rect_geom
     def setRect(self, x, y, w, h):
-        self.rect_geom = QRectF(x, y, w, h)
         self.prepareGeometryChange()
+        self.rect_geom = QRectF(x, y, w, h); self.bounds = self.rect_geom.adjusted(-8, -8, 8, 8)
         self.update()
-    def boundingRect(self): 
-        return self.rect_geom.adjusted(-8, -8, 8, 8)
+        self.index_moved()
+    # Вызывается индексом сцены для каждого дочернего элемента при каждом запросе
+    def boundingRect(self): return self.bounds
     def update_handle_pos(self): 
-        self.resize_handle.setPos(self.rect().width(), self.rect().height())
+        if self.resize_handle is not None: self.resize_handle.setPos(self.rect().width(), self.rect().height())
+    def show_handle(self):
+        if self.resize_handle is None: self.resize_handle = HandleItem(self)
+        self.update_handle_pos()
+        self.resize_handle.show()
+    def release_handle(self):
+        handle, self.resize_handle = self.resize_handle, None
+        if handle is None: return
+        if handle.scene() is not None: handle.scene().removeItem(handle)
+        handle.setParentItem(None)
+    def dirty_rect(self):
+        return self.mapRectToScene(self.boundingRect() | self.childrenBoundingRect())
+    def invalidate(self, old_rect=None):
+        scene = self.scene()
+        if scene is None: return
+        if hasattr(scene, 'invalidate_item'): scene.invalidate_item(self, old_rect)
+        else: self.update()
+        self.reindex()
     
     def update_flags(self):
         if self.is_locked:
             self.setFlag(QGraphicsItem.ItemIsMovable, False)
             self.setFlag(QGraphicsItem.ItemIsSelectable, False) 
-            self.resize_handle.hide()
+            self.release_handle()
         else:
             self.setFlag(QGraphicsItem.ItemIsMovable, True)
             self.setFlag(QGraphicsItem.ItemIsSelectable, True)
-            if self.isSelected(): self.resize_handle.show()
+            if self.isSelected(): self.show_handle()
 
     def mousePressEvent(self, event):
         if not self.is_locked: self.notify_interaction_start()
@@ -78,15 +138,57 @@ class BaseResizableItem(QGraphicsObject):
     def mouseReleaseEvent(self, event):
         super().mouseReleaseEvent(event)
         if not self.is_locked: self.notify_interaction_end()
-    def notify_interaction_start(self): self.interaction_started.emit(self)
-    def notify_interaction_end(self): self.interaction_finished.emit(self)
+    def notify_interaction_start(self):
+        self.begin_snap()
+        self.interaction_started.emit(self)
+    def notify_interaction_end(self):
+        self.end_snap()
+        self.interaction_finished.emit(self)
+
+    # --- ПРИВЯЗКА ---
+    # Настройки читаются один раз на жест; Alt временно отключает привязку
+    def begin_snap(self):
+        scene = self.scene()
+        if scene is None or not hasattr(scene, 'snap_index'): return
+        grid = getattr(scene, 'grid_size', 0) if get_setting("snap_to_grid", True, type=bool) else 0
+        objects = get_setting("snap_to_objects", True, type=bool)
+        self.snap_options = {"grid_size": grid, "to_objects": objects} if grid or objects else None
+    def end_snap(self):
+        self.snap_options = None
+        scene = self.scene()
+        if scene is not None and hasattr(scene, 'set_guides'): scene.set_guides([])
+    def snap_active(self):
+        if not self.snap_options or QApplication.keyboardModifiers() & Qt.AltModifier: return False
+        return len(self.scene().selectedItems()) <= 1
+    def show_guides(self, lines):
+        if hasattr(self.scene(), 'set_guides'): self.scene().set_guides(lines)
+    def index_moved(self):
+        scene = self.scene()
+        if scene is not None and hasattr(scene, 'snap_index'): scene.snap_index.item_moved(self)
+    def reindex(self):
+        scene = self.scene()
+        if self.searchable and scene is not None and hasattr(scene, 'touch_search'): scene.touch_search(self)
 
     def itemChange(self, change, value):
         if change == QGraphicsItem.ItemSelectedChange:
-            if value and not self.is_locked: self.resize_handle.show()
-            else: self.resize_handle.hide()
+            if value and not self.is_locked: self.show_handle()
+            else: self.release_handle()
         if change == QGraphicsItem.ItemPositionChange and self.scene():
+            if self.snap_active():
+                value, lines = snap_position(self, value, **self.snap_options)
+                self.show_guides(lines)
             return self.constrain_position(value)
+        if change == QGraphicsItem.ItemPositionHasChanged: self.index_moved()
+        if change == QGraphicsItem.ItemSelectedHasChanged and hasattr(self.scene(), 'track_selection'):
+            self.scene().track_selection(self, bool(value))
+        if change == QGraphicsItem.ItemSceneChange and hasattr(self.scene(), 'track_selection'):
+            self.scene().track_selection(self, False)
+            if self.searchable and hasattr(self.scene(), 'search_index'): self.scene().search_index.remove(self)
+        if change == QGraphicsItem.ItemSceneHasChanged and hasattr(value, 'track_selection'):
+            if self.isSelected(): value.track_selection(self, True)
+            if self.searchable and hasattr(value, 'touch_search'): value.touch_search(self)
+        if change in (QGraphicsItem.ItemChildAddedChange, QGraphicsItem.ItemChildRemovedChange) and self.scene() and isinstance(value, BaseResizableItem):
+            if hasattr(self.scene(), 'snap_index'): self.scene().snap_index.container_changed(self)
         return super().itemChange(change, value)
 
     def constrain_position(self, pos):
@@ -105,6 +207,9 @@ class BaseResizableItem(QGraphicsObject):
         local_pos = self.mapFromScene(scene_pos)
         new_w = max(20, local_pos.x())
         new_h = max(20, local_pos.y())
+        if self.snap_active():
+            new_w, new_h, lines = snap_size(self, new_w, new_h, **self.snap_options)
+            self.show_guides(lines)
         if self.parentItem():
             p_rect = self.parentItem().rect() if hasattr(self.parentItem(), 'rect') else self.parentItem().boundingRect()
             if self.x() + new_w > p_rect.width(): new_w = p_rect.width() - self.x()
@@ -118,6 +223,7 @@ class BaseResizableItem(QGraphicsObject):
         self.data_model['y'] = int(self.y())
         self.data_model['width'] = int(self.rect().width())
         self.data_model['height'] = int(self.rect().height())
+        self.reindex()
 
     def apply_data(self, data):
         self.data_model = copy.deepcopy(data)
@@ -127,19 +233,33 @@ class BaseResizableItem(QGraphicsObject):
         self.setRect(0, 0, data.get('width', 100), data.get('height', 100))
         self.update_handle_pos()
         if hasattr(self, 'refresh_content'): self.refresh_content()
-        self.update()
+        self.update(); self.reindex()
 
     def clone_state(self): return copy.deepcopy(self.data_model)
 
     def draw_styled_shape(self, painter, rect, style, is_circle=False):
-        painter.save()
         path = QPainterPath()
         if is_circle:
             path.addEllipse(rect)
         else:
             radius = int(style.get('radius', 0))
             path.addRoundedRect(rect, radius, radius)
+        # Невидимый фон (например, opacity 0 у шаблона text) не проходит clip-and-fill
+        if paints_fill(style): self.fill_styled_shape(painter, rect, style, path)
+        b_width = int(style.get('border_width', 0))
+        if b_width > 0:
+            b_color = QColor(style.get('border_color', '#000000'))
+            pen = QPen(b_color, b_width)
+            painter.setPen(pen); painter.setBrush(Qt.NoBrush); painter.drawPath(path)
             
+        if self.isSelected():
+            pen = QPen(QColor("#007fd4"), 1, Qt.DashLine)
+            painter.setPen(pen); painter.setBrush(Qt.NoBrush)
+            painter.drawRect(self.boundingRect().adjusted(1,1,-1,-1))
+
+    def fill_styled_shape(self, painter, rect, style, path):
+        lod = level_of_detail(painter)
+        painter.save()
         painter.setClipPath(path)
         painter.setOpacity(float(style.get('opacity', 1.0)))
         
@@ -148,19 +268,11 @@ class BaseResizableItem(QGraphicsObject):
         else: painter.fillPath(path, QColor(bg_col_str))
 
         bg_image = style.get('bg_image', '')
-        if bg_image and os.path.exists(bg_image):
-            pixmap = QPixmap(bg_image)
-            if not pixmap.isNull():
-                bg_x = int(style.get('bg_x', 0)); bg_y = int(style.get('bg_y', 0))
-                bg_w = int(style.get('bg_w', 0)); bg_h = int(style.get('bg_h', 0))
-                if bg_w <= 0 or bg_h <= 0:
-                    scaled = pixmap.scaled(rect.size().toSize(), Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
-                    painter.drawPixmap(0, 0, scaled)
-                else:
-                    scaled = pixmap.scaled(bg_w, bg_h, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
-                    painter.drawPixmap(bg_x, bg_y, scaled)
-
-        if style.get('use_gradient', False):
+        if bg_image and os.path.exists(bg_image): self.draw_bg_image(painter, rect, style, path, bg_image, lod)
+
+        if style.get('use_gradient', False) and lod < LOD_TIERS['lod_gradient']:
+            painter.fillPath(path, mix_colors(style.get('grad_start', '#ffffff'), style.get('grad_end', '#000000')))
+        elif style.get('use_gradient', False):
             start_c = QColor(style.get('grad_start', '#ffffff'))
             end_c = QColor(style.get('grad_end', '#000000'))
             angle = int(style.get('grad_angle', 90))
@@ -174,17 +286,30 @@ class BaseResizableItem(QGraphicsObject):
             gradient.setColorAt(0, start_c); gradient.setColorAt(1, end_c)
             painter.fillPath(path, QBrush(gradient))
 
-        painter.restore() 
-        b_width = int(style.get('border_width', 0))
-        if b_width > 0:
-            b_color = QColor(style.get('border_color', '#000000'))
-            pen = QPen(b_color, b_width)
-            painter.setPen(pen); painter.setBrush(Qt.NoBrush); painter.drawPath(path)
-            
-        if self.isSelected():
-            pen = QPen(QColor("#007fd4"), 1, Qt.DashLine)
-            painter.setPen(pen); painter.setBrush(Qt.NoBrush)
-            painter.drawRect(self.boundingRect().adjusted(1,1,-1,-1))
+        painter.restore()
+
+    # Картинка декодируется в экранном размере; на холсте и в тайлах вида — в фоне (до
+    # готовности рисуется заглушка, готовый декод перерисовывает виджет и сбрасывает его
+    # тайлы), при прочем рендере в QImage/QPixmap (экспорт, запекание) — сразу
+    def draw_bg_image(self, painter, rect, style, path, bg_image, lod):
+        loader = image_loader()
+        src = atlas_rect(style)
+        source = loader.source_size(bg_image, src)
+        if not source.isValid(): return
+        bg_w = int(style.get('bg_w', 0)); bg_h = int(style.get('bg_h', 0))
+        if bg_w <= 0 or bg_h <= 0:
+            size = source.scaled(rect.size().toSize(), Qt.KeepAspectRatioByExpanding)
+            target = QRectF(0, 0, size.width(), size.height())
+        else: target = QRectF(int(style.get('bg_x', 0)), int(style.get('bg_y', 0)), bg_w, bg_h)
+        device = target.size() * lod * painter.device().devicePixelRatioF()
+        if lod < LOD_TIERS['lod_image']: device = device.boundedTo(QSizeF(LOD_DECODE, LOD_DECODE))
+        scene = self.scene()
+        requester = self if isinstance(painter.device(), QWidget) or getattr(scene, 'rendering_tiles', False) else None
+        pixmap = loader.pixmap(bg_image, src, device, requester)
+        if pixmap is None: painter.fillPath(path, QColor(128, 128, 128, 40))
+        elif not pixmap.isNull():
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
 
 class RootFrameItem(BaseResizableItem):
     def __init__(self, screen_rect):
@@ -226,11 +351,14 @@ class GradientTextItem(QGraphicsTextItem):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.gradient_data = None
+        self.state = None
     def set_gradient_data(self, data):
         self.gradient_data = data
         self.update()
     def paint(self, painter, option, widget):
-        if self.gradient_data and self.gradient_data.get('use_text_gradient'):
+        if self.gradient_data and level_of_detail(painter) < LOD_TIERS['lod_text']:
+            if not self.document().isEmpty(): self.paint_placeholder(painter)
+        elif self.gradient_data and self.gradient_data.get('use_text_gradient'):
             rect = self.boundingRect()
             start_c = QColor(self.gradient_data.get('text_grad_start', '#000000'))
             end_c = QColor(self.gradient_data.get('text_grad_end', '#000000'))
@@ -249,23 +377,47 @@ class GradientTextItem(QGraphicsTextItem):
             super().paint(painter, option, widget)
         else: super().paint(painter, option, widget)
 
+    def paint_placeholder(self, painter):
+        rect = self.boundingRect()
+        if self.gradient_data.get('use_text_gradient'):
+            color = mix_colors(self.gradient_data.get('text_grad_start', '#000000'), self.gradient_data.get('text_grad_end', '#000000'))
+        else: color = QColor(self.gradient_data.get('color', '#000000'))
+        color.setAlphaF(color.alphaF() * 0.6)
+        bar_h = rect.height() * 0.4
+        painter.fillRect(QRectF(rect.x() + 4, rect.center().y() - bar_h / 2, max(0, rect.width() - 8), bar_h), color)
+
 class WidgetItem(BaseResizableItem):
+    searchable = True
+
     def __init__(self, template_key, x, y, parent_item):
         tpl = WIDGET_TEMPLATES.get(template_key, {})
         w = tpl.get('width', 100); h = tpl.get('height', 100)
         super().__init__(x, y, w, h, parent=parent_item)
         self.is_container = tpl.get('is_container', False)
-        self.data_model = json.loads(json.dumps(tpl))
+        self.data_model = template_copy(template_key)
         self.data_model['x'] = int(x); self.data_model['y'] = int(y)
         self.data_model['id'] = self.uid
         self.data_model['z_index'] = tpl.get('z_index', 0)
-        self.content_proxy = GradientTextItem(self)
+        self.content_proxy = None   # только пока у виджета есть текст
         self.timer = QTimer()
-        self.timer.timeout.connect(self.refresh_content)
+        self.timer.timeout.connect(self.on_tick)
         self.timer.start(1000)
         self.refresh_content()
         self.setZValue(self.data_model['z_index'])
 
+    def on_tick(self): self.refresh_content()
+
+    # --- ТЕКСТОВЫЙ ПРОКСИ ---
+    # QGraphicsTextItem держит QTextDocument, поэтому у прямоугольников, групп и картинок его нет
+    def ensure_text_proxy(self):
+        if self.content_proxy is None: self.content_proxy = GradientTextItem(self)
+        return self.content_proxy
+    def release_text_proxy(self):
+        proxy, self.content_proxy = self.content_proxy, None
+        if proxy is None: return
+        if proxy.scene() is not None: proxy.scene().removeItem(proxy)
+        proxy.setParentItem(None)
+
     def paint(self, painter, option, widget):
         type_ = self.data_model.get('type', 'rect')
         style = self.data_model.get('style', {})
@@ -289,7 +441,9 @@ class WidgetItem(BaseResizableItem):
             path.addRoundedRect(fill_rect, radius, radius)
             painter.setClipPath(path)
             
-            if content.get('use_gradient', False):
+            if content.get('use_gradient', False) and level_of_detail(painter) < LOD_TIERS['lod_gradient']:
+                painter.fillPath(path, mix_colors(content.get('grad_start', '#00ff00'), content.get('grad_end', '#007700')))
+            elif content.get('use_gradient', False):
                 start_c = QColor(content.get('grad_start', '#00ff00'))
                 end_c = QColor(content.get('grad_end', '#007700'))
                 gradient = QLinearGradient(0, 0, fill_w, 0)
@@ -302,8 +456,29 @@ class WidgetItem(BaseResizableItem):
             if self.isSelected():
                 painter.setPen(QPen(QColor("#007fd4"), 2, Qt.DashLine)); painter.setBrush(Qt.NoBrush); painter.drawRect(self.rect())
                 
+        elif type_ == 'component':
+            self.paint_component(painter, style)
+
         else: # Rect, Image, Text containers
             self.draw_styled_shape(painter, self.rect(), style)
+
+    def component_renderer(self):
+        library = getattr(self.scene(), 'components', None)
+        if library is None: return None
+        return library.renderer(self.data_model.get('content', {}).get('component_id', ''))
+
+    def paint_component(self, painter, style):
+        renderer = self.component_renderer()
+        if renderer is None:
+            painter.setPen(QPen(QColor("#e74c3c"), 1, Qt.DashLine)); painter.setBrush(Qt.NoBrush); painter.drawRect(self.rect())
+        else:
+            painter.save()
+            painter.setOpacity(float(style.get('opacity', 1.0)))
+            renderer.paint(painter, self.rect(), self.data_model.get('content', {}).get('overrides', {}), level_of_detail(painter))
+            painter.restore()
+        if self.isSelected():
+            painter.setPen(QPen(QColor("#007fd4"), 1, Qt.DashLine)); painter.setBrush(Qt.NoBrush)
+            painter.drawRect(self.boundingRect().adjusted(1,1,-1,-1))
     
     def refresh_content(self):
         content = self.data_model.get('content', {})
@@ -320,33 +495,43 @@ class WidgetItem(BaseResizableItem):
             except: text = "Error"
         elif type_ == 'text': 
             text = content.get('text', 'Text')
-            text = text.replace("{cpu}", "15%").replace("{ram}", "4GB").replace("{bat}", "80%")
+            for p, sample in zip(PLACEHOLDERS, ("15%", "4GB", "80%")): text = text.replace(p, sample)
+        elif type_ == 'component':
+            renderer = self.component_renderer()
+            if renderer is not None and renderer.live_ids: self.update()
         
         if text:
-            font = QFont(content.get('font_family', 'Arial'), int(content.get('font_size', 12)))
-            self.content_proxy.setFont(font)
-            self.content_proxy.setPlainText(text)
+            proxy = self.ensure_text_proxy()
+            # Тик таймера без изменений не трогает документ и не перерисовывает виджет
+            state = (text, self.rect().width(), self.rect().height()) + tuple(content.get(k) for k in TEXT_KEYS)
+            if proxy.state == state: return
+            proxy.state = state
+            font = font_database().resolve(content.get('font_family', 'Arial'), int(content.get('font_size', 12)))
+            proxy.setFont(font)
+            proxy.setPlainText(text)
             if not content.get('use_text_gradient'):
-                self.content_proxy.setDefaultTextColor(QColor(content.get('color', '#000000')))
-            self.content_proxy.set_gradient_data(content)
-            br = self.content_proxy.boundingRect()
-            self.content_proxy.setPos(self.rect().width()/2 - br.width()/2, self.rect().height()/2 - br.height()/2)
-        else: self.content_proxy.setPlainText("")
+                proxy.setDefaultTextColor(QColor(content.get('color', '#000000')))
+            proxy.set_gradient_data(content)
+            br = proxy.boundingRect()
+            proxy.setPos(self.rect().width()/2 - br.width()/2, self.rect().height()/2 - br.height()/2)
+        else: self.release_text_proxy()
 
+# Геометрия гизмо берётся из заголовка файла (source_size), а сама картинка — из общего
+# фонового декодера под текущий размер, как у виджета
 class BgImageGizmo(QGraphicsRectItem):
     def __init__(self, target_item, image_path, scene):
         super().__init__()
         self.target = target_item
-        self.pixmap = QPixmap(image_path)
+        self.image_path = image_path
         self.scene_ref = scene
         st = target_item.data_model['style']
         w = int(st.get('bg_w', 0)); h = int(st.get('bg_h', 0))
         x = int(st.get('bg_x', 0)); y = int(st.get('bg_y', 0))
         if w <= 0 or h <= 0:
-            rect = target_item.rect()
-            w = int(rect.width()); h = int(rect.height())
-            self.pixmap = self.pixmap.scaled(w, h, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
-        else: self.pixmap = self.pixmap.scaled(w, h, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+            source = image_loader().source_size(image_path, atlas_rect(st))
+            size = target_item.rect().size().toSize()
+            if source.isValid(): size = source.scaled(size, Qt.KeepAspectRatioByExpanding)
+            w = size.width(); h = size.height()
         self.setRect(0, 0, w, h)
         target_pos = target_item.mapToScene(0, 0)
         self.setPos(target_pos.x() + x, target_pos.y() + y)
@@ -355,7 +540,11 @@ class BgImageGizmo(QGraphicsRectItem):
         self.resize_handle = HandleItem(self)
         self.resize_handle.setPos(w, h)
     def paint(self, painter, option, widget):
-        painter.setOpacity(0.5); painter.drawPixmap(self.rect().toRect(), self.pixmap)
+        device = self.rect().size() * level_of_detail(painter) * painter.device().devicePixelRatioF()
+        pixmap = image_loader().pixmap(self.image_path, atlas_rect(self.target.data_model['style']), device, self)
+        painter.setOpacity(0.5)
+        if pixmap is None: painter.fillRect(self.rect(), QColor(128, 128, 128, 40))
+        elif not pixmap.isNull(): painter.drawPixmap(self.rect(), pixmap, QRectF(pixmap.rect()))
         painter.setPen(QPen(Qt.yellow, 2, Qt.DashLine)); painter.setBrush(Qt.NoBrush); painter.drawRect(self.rect())
     def itemChange(self, change, value):
         if change == QGraphicsItem.ItemPositionChange and self.scene():
@@ -366,7 +555,7 @@ class BgImageGizmo(QGraphicsRectItem):
             if self.target.data_model['style']['bg_w'] == 0:
                  self.target.data_model['style']['bg_w'] = int(self.rect().width())
                  self.target.data_model['style']['bg_h'] = int(self.rect().height())
-            self.target.update()
+            self.target.invalidate()
         return super().itemChange(change, value)
     def handle_resize(self, scene_pos):
         local_pos = self.mapFromScene(scene_pos)
@@ -374,6 +563,4 @@ class BgImageGizmo(QGraphicsRectItem):
         self.setRect(0, 0, new_w, new_h); self.resize_handle.setPos(new_w, new_h)
         self.target.data_model['style']['bg_w'] = int(new_w)
         self.target.data_model['style']['bg_h'] = int(new_h)
-        orig = QPixmap(self.target.data_model['style']['bg_image'])
-        self.pixmap = orig.scaled(int(new_w), int(new_h), Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
-        self.target.update(); self.update()
\ No newline at end of file
+        self.target.invalidate(); self.update()
\ No newline at end of file
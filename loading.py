@@ -0,0 +1,128 @@
+# loading.py - Потоковая загрузка проекта
+import copy
+import threading
+from PySide6.QtCore import QObject, QTimer, QElapsedTimer, Signal
+from PySide6.QtWidgets import QGraphicsRectItem
+
+from items import WidgetItem
+from project import read_project
+
+SLICE_MS = 8     # порция наполнения сцены; остальное время кадра — на отрисовку и ввод
+
+# Родители раньше детей: сначала верхний уровень, затем слой за слоем.
+# Виджеты с несуществующим родителем идут на корень, как и раньше.
+def build_order(widgets):
+    ids = {w.get('id') for w in widgets}
+    children = {}
+    for w in widgets:
+        parent = w.get('parent_id', 'root')
+        children.setdefault(parent if parent in ids else 'root', []).append(w)
+    out, level = [], children.get('root', [])
+    while level:
+        out.extend(level)
+        level = [c for w in level for c in children.pop(w.get('id'), [])]
+    seen = {id(w) for w in out}
+    return out + [w for w in widgets if id(w) not in seen]   # циклы parent_id
+
+def build_widget(w_data, root_frame, widgets_map):
+    parent = widgets_map.get(w_data.get('parent_id', 'root'), root_frame)
+    item = WidgetItem(w_data.get('type', 'rect'), w_data['x'], w_data['y'], parent)
+    item.apply_data(w_data)
+    item.setZValue(w_data.get('z_index', 0))
+    item.setPos(w_data['x'], w_data['y'])
+    widgets_map[w_data['id']] = item
+    return item
+
+# --- ПОТОКОВАЯ ЗАГРУЗКА ---
+# JSON разбирается в фоновом потоке, сцена наполняется на GUI-потоке порциями по
+# SLICE_MS. Прежние виджеты на время загрузки переносятся в скрытый держатель на той
+# же сцене (повторное добавление снятого со сцены поддерева роняет PySide): отмена
+# возвращает их на корень вместе с его данными и компонентами.
+class ProjectLoader(QObject):
+    parsed = Signal(object)
+    started = Signal()         # прежняя сцена снята, начинается наполнение
+    built = Signal(list)       # виджеты, созданные очередной порцией
+    progress = Signal(int, int)
+    finished = Signal(bool, str)
+
+    def __init__(self, root_frame, scene):
+        super().__init__()
+        self.root_frame, self.scene = root_frame, scene
+        self.active = False
+        self.token = 0
+        self.previous = None
+        self.retired = []
+        self.queue, self.done, self.widgets_map = [], 0, {}
+        self.timer = QTimer(self); self.timer.setInterval(0)
+        self.timer.timeout.connect(self.step)
+        self.parsed.connect(self.on_parsed)
+
+    def start(self, path):
+        if self.active: return False
+        self.active = True; self.token += 1
+        token = self.token
+        def work():
+            try: data = read_project(path)
+            except Exception as e: data = e
+            self.parsed.emit((token, data))
+        threading.Thread(target=work, daemon=True).start()
+        return True
+
+    def on_parsed(self, payload):
+        token, data = payload
+        if token != self.token or not self.active: return
+        if isinstance(data, Exception) or not isinstance(data, dict):
+            self.active = False
+            return self.finished.emit(False, str(data) if isinstance(data, Exception) else "Неверный формат проекта")
+        root, scene = self.root_frame, self.scene
+        root.update_model()
+        components = scene.components.to_data() if hasattr(scene, 'components') else None
+        holder = QGraphicsRectItem(); holder.setVisible(False); holder.setEnabled(False)
+        scene.addItem(holder)
+        for child in [c for c in root.childItems() if isinstance(c, WidgetItem)]: child.setParentItem(holder)
+        self.previous = (copy.deepcopy(root.data_model), holder, components)
+        if 'root' in data: root.apply_data(data['root'])
+        if hasattr(scene, 'components'): scene.components.load_data(data.get('components'))
+        self.queue, self.done, self.widgets_map = build_order(data.get('widgets', [])), 0, {}
+        self.started.emit()
+        self.progress.emit(0, len(self.queue))
+        self.timer.start()
+
+    def step(self):
+        clock = QElapsedTimer(); clock.start()
+        built = []
+        try:
+            while self.done < len(self.queue) and clock.elapsed() < SLICE_MS:
+                built.append(build_widget(self.queue[self.done], self.root_frame, self.widgets_map))
+                self.done += 1
+        except Exception as e: return self.cancel(str(e))
+        self.built.emit(built)
+        self.progress.emit(self.done, len(self.queue))
+        if self.done < len(self.queue): return
+        self.timer.stop(); self.active = False
+        # Держатель с прежними виджетами уходит со сцены целиком и живёт в retired: команды
+        # отмены (импорт WGT историю не сбрасывает) могут ссылаться на любой виджет поддерева,
+        # в том числе вложенный, а удаление предка удалило бы и его
+        holder = self.previous[1]
+        self.scene.removeItem(holder); self.retired.append(holder)
+        self.previous = None; self.queue, self.widgets_map = [], {}
+        self.finished.emit(True, "OK")
+
+    # Вызывается, когда история отмены очищена и на прежние сцены больше никто не ссылается
+    def release_retired(self): self.retired.clear()
+
+    # Отмена (и ошибка посреди загрузки) возвращает прежнюю сцену
+    def cancel(self, message=""):
+        if not self.active: return
+        self.active = False; self.token += 1
+        self.timer.stop()
+        if self.previous is not None:
+            root, scene = self.root_frame, self.scene
+            for child in [c for c in root.childItems() if isinstance(c, WidgetItem)]: scene.removeItem(child)
+            data, holder, components = self.previous
+            root.apply_data(data)
+            if hasattr(scene, 'components'): scene.components.load_data(components)
+            for child in holder.childItems(): child.setParentItem(root)
+            scene.removeItem(holder)
+        self.previous = None; self.queue, self.widgets_map = [], {}
+        self.finished.emit(False, message)
@@ -1,23 +1,30 @@
 # main.py
 import sys
+import startup
+# Флаги разбираются только при запуске редактора: bench/cost/memory/batch импортируют main со своими argv
+if __name__ == "__main__": startup.enable(sys.argv)
 import json
-import zipfile
 import uuid
 import os
-import tempfile
 import copy
-from PySide6.QtWidgets import (QApplication, QMainWindow, QDockWidget, QListWidget, 
+from PySide6.QtWidgets import (QApplication, QInputDialog, QMainWindow, QDockWidget, QListWidget, 
                                QGraphicsScene, QGraphicsRectItem, QGraphicsTextItem, 
                                QGraphicsView, 
                                QFileDialog, QWidget, QVBoxLayout, QMessageBox, QLabel,
-                               QToolBar, QStyle)
-from PySide6.QtCore import Qt, QMimeData, QRectF, QStandardPaths, QUrl, QTimer, QSize
-from PySide6.QtGui import QDrag, QBrush, QColor, QPen, QAction, QDesktopServices, QIcon, QKeySequence, QUndoStack, QUndoCommand
-from PySide6.QtNetwork import QNetworkAccessManager, QNetworkRequest
+                               QToolBar, QStyle, QProgressBar, QPushButton, QLineEdit, QTabWidget)
+from PySide6.QtCore import Qt, QMimeData, QRectF, QStandardPaths, QUrl, QTimer, QSize, QEvent
+from PySide6.QtGui import QDrag, QBrush, QColor, QPen, QAction, QDesktopServices, QIcon, QKeySequence, QUndoStack, QUndoGroup, QUndoCommand, QRegion
 
-from config import SCREEN_WIDTH, SCREEN_HEIGHT, WIDGET_TEMPLATES, APP_NAME, APP_VERSION, GITHUB_REPO_URL, get_setting, THEMES
+from config import CANVAS_MARGIN, screen_layout, canvas_size, WIDGET_TEMPLATES, APP_NAME, APP_VERSION, GITHUB_REPO_URL, get_setting, THEMES, load_lod_tiers, load_budgets
 from items import RootFrameItem, WidgetItem
+from components import ComponentLibrary, definition_widgets, build_items, draft_definition, merge_draft
+from snapping import SnapIndex
+from search import SearchIndex, SEARCH_CHUNK
+from project import write_wgt, write_project, unpack_project, read_project
+from loading import ProjectLoader, build_order, build_widget
+from fonts import font_database
 from ui import EditorView, PropertiesPanel, HierarchyTree, SettingsDialog
+startup.mark("импорты")
 
 # --- UNDO COMMANDS ---
 class CreateCommand(QUndoCommand):
@@ -59,12 +66,48 @@ class MoveResizeCommand(QUndoCommand):
     def redo(self): self.apply(self.new_state)
     def undo(self): self.apply(self.old_state)
     def apply(self, state):
+        old_rect = self.item.dirty_rect()
         self.item.setPos(state['x'], state['y'])
         self.item.setRect(0, 0, state['w'], state['h'])
         self.item.update_handle_pos()
         self.item.update_model()
+        self.item.invalidate(old_rect)
         if self.signal: self.signal.emit(self.item)
 
+class DefinitionCommand(QUndoCommand):
+    def __init__(self, library, old_def, new_def):
+        super().__init__("Edit component")
+        self.library = library
+        self.old_def = old_def; self.new_def = new_def
+    def redo(self): self.apply(self.new_def)
+    def undo(self): self.apply(self.old_def)
+    def apply(self, definition):
+        if definition is not None: self.library.set_definition(copy.deepcopy(definition))
+        elif self.new_def['id'] in self.library.definitions:
+            del self.library.definitions[self.new_def['id']]; self.library.definition_changed.emit(self.new_def['id'])
+
+def get_property(item, path):
+    if path == 'z_index': return item.zValue()
+    ref = item.data_model
+    for k in path.split('.'): ref = ref[k]
+    return ref
+
+def set_property(item, path, val):
+    keys = path.split('.'); ref = item.data_model
+    old_rect = item.dirty_rect()
+    try:
+        for k in keys[:-1]: ref = ref[k]
+        ref[keys[-1]] = val
+    except: return False
+    if keys[-1] == 'z_index': item.setZValue(val)
+    elif keys[-1] in ['x','y','width','height']:
+        item.setRect(0,0, item.data_model['width'], item.data_model['height'])
+        item.setPos(item.data_model['x'], item.data_model['y'])
+        item.update_handle_pos()
+    if hasattr(item, 'refresh_content'): item.refresh_content()
+    item.invalidate(old_rect)
+    return True
+
 class PropertyCommand(QUndoCommand):
     def __init__(self, item, path, old_val, new_val, signal):
         super().__init__(f"Change {path}")
@@ -74,19 +117,25 @@ class PropertyCommand(QUndoCommand):
     def redo(self): self.apply(self.new_val)
     def undo(self): self.apply(self.old_val)
     def apply(self, val):
-        keys = self.path.split('.'); ref = self.item.data_model
-        try:
-            for k in keys[:-1]: ref = ref[k]
-            ref[keys[-1]] = val
-        except: return
-        if keys[-1] == 'z_index': self.item.setZValue(val)
-        elif keys[-1] in ['x','y','width','height']:
-            self.item.setRect(0,0, self.item.data_model['width'], self.item.data_model['height'])
-            self.item.setPos(self.item.data_model['x'], self.item.data_model['y'])
-            self.item.update_handle_pos()
-        if hasattr(self.item, 'refresh_content'): self.item.refresh_content()
-        self.item.update()
-        if self.signal: self.signal.emit(self.item)
+        if set_property(self.item, self.path, val) and self.signal: self.signal.emit(self.item)
+
+# Одно свойство у всего выделения: прежние значения запоминаются поштучно, каждый
+# элемент обновляется один раз, перерисовка копится сценой в один регион, а панель
+# свойств перестраивается одним сигналом на всю пачку
+class BatchPropertyCommand(QUndoCommand):
+    def __init__(self, items, path, new_val, signal):
+        super().__init__(f"Change {path} ({len(items)})")
+        self.path = path; self.new_val = new_val
+        self.signal = signal
+        self.old_vals = {}
+        for item in items:
+            try: self.old_vals[item] = get_property(item, path)
+            except (KeyError, TypeError): pass
+    def redo(self): self.apply({item: self.new_val for item in self.old_vals})
+    def undo(self): self.apply(self.old_vals)
+    def apply(self, values):
+        changed = [item for item, val in values.items() if set_property(item, self.path, val)]
+        if changed and self.signal: self.signal.emit(changed[0])
 
 # --- PROJECT MANAGER ---
 class ProjectManager:
@@ -105,31 +154,21 @@ class ProjectManager:
                     project_data['widgets'].append(data)
                     if getattr(child, 'is_container', False): collect(child, data['id'])
         collect(root_frame, "root")
+        library = getattr(root_frame.scene(), 'components', None)
+        if library is not None and library.definitions: project_data['components'] = library.to_data()
         try:
-            with open(filepath, 'w', encoding='utf-8') as f: json.dump(project_data, f, indent=4, ensure_ascii=False)
+            write_project(project_data, filepath, sparse=get_setting("sparse_files", False, type=bool))
             return True
         except Exception as e: return False
 
     @staticmethod
     def load_project_data(data, root_frame, scene):
+        data = unpack_project(data)
         for child in root_frame.childItems(): scene.removeItem(child)
         if 'root' in data: root_frame.apply_data(data['root'])
+        if hasattr(scene, 'components'): scene.components.load_data(data.get('components'))
         widgets_map = {}
-        widgets_data = data.get('widgets', [])
-        for w_data in widgets_data:
-            w_type = w_data.get('type', 'rect')
-            item = WidgetItem(w_type, w_data['x'], w_data['y'], root_frame)
-            item.apply_data(w_data)
-            widgets_map[w_data['id']] = item
-        for w_data in widgets_data:
-            item = widgets_map.get(w_data['id'])
-            if not item: continue
-            parent_id = w_data.get('parent_id', 'root')
-            z_idx = w_data.get('z_index', 0)
-            if parent_id == 'root': item.setParentItem(root_frame)
-            elif parent_id in widgets_map: item.setParentItem(widgets_map[parent_id])
-            item.setZValue(z_idx)
-            item.setPos(w_data['x'], w_data['y'])
+        for w_data in build_order(data.get('widgets', [])): build_widget(w_data, root_frame, widgets_map)
         return True, "OK"
 
     @staticmethod
@@ -141,18 +180,17 @@ class ProjectManager:
 
     @staticmethod
     def import_wgt(filepath, root_frame, scene):
-        try:
-            with tempfile.TemporaryDirectory() as tmpdir:
-                with zipfile.ZipFile(filepath, 'r') as zf: zf.extractall(tmpdir)
-                json_path = os.path.join(tmpdir, 'widget.json')
-                if not os.path.exists(json_path): return False, "widget.json not found"
-                with open(json_path, 'r', encoding='utf-8') as f: data = json.load(f)
-                return ProjectManager.load_project_data(data, root_frame, scene)
+        try: return ProjectManager.load_project_data(read_project(filepath), root_frame, scene)
         except Exception as e: return False, str(e)
 
     @staticmethod
-    def export_product_wgt(filepath, root_frame):
+    def export_product_wgt(filepath, root_frame, bake_layers=False, scale=1.0, atlas=False, max_sprite=512, padding=2):
         data = {"root": root_frame.data_model, "widgets": []}
+        files = {}
+        if bake_layers:
+            from bake import bake
+            data['widgets'], files = bake(root_frame, scale)
+            data['baked'] = True
         def collect(parent_item, parent_id):
             children = list(parent_item.childItems())
             children.sort(key=lambda x: x.zValue())
@@ -163,16 +201,79 @@ class ProjectManager:
                     w_data['z_index'] = child.zValue()
                     data['widgets'].append(w_data)
                     if getattr(child, 'is_container', False): collect(child, w_data.get('id', str(id(child))))
-        collect(root_frame, "root")
-        json_str = json.dumps(data, indent=4, ensure_ascii=False)
-        html = """<!DOCTYPE html><html><body><h1>WGT Export</h1></body></html>"""
-        with zipfile.ZipFile(filepath, 'w') as zf:
-            zf.writestr('widget.json', json_str)
-            zf.writestr('index.html', html)
+        if not bake_layers: collect(root_frame, "root")
+        library = getattr(root_frame.scene(), 'components', None)
+        if library is not None and library.definitions: data['components'] = library.to_data()
+        report = []
+        if atlas:
+            from atlas import apply_atlases
+            data['widgets'] = copy.deepcopy(data['widgets'])
+            files, report = apply_atlases(data['widgets'], files, max_sprite=max_sprite, padding=padding)
+        write_wgt(data, filepath, files)
+        return report
 
 # --- MAIN ---
 class GridScene(QGraphicsScene):
-    def __init__(self, w, h): super().__init__(0, 0, w, h); self.grid_size = 50
+    def __init__(self, w, h):
+        super().__init__(0, 0, w, h); self.grid_size = 50
+        self.dirty_rects = []
+        self.dirty_timer = QTimer(); self.dirty_timer.setSingleShot(True); self.dirty_timer.setInterval(16)
+        self.dirty_timer.timeout.connect(self.flush_dirty)
+        self.components = ComponentLibrary()
+        self.components.definition_changed.connect(self.on_component_changed)
+        self.snap_index = SnapIndex(); self.guides = []
+        self.search_index = SearchIndex()
+        self.search_timer = QTimer(); self.search_timer.setInterval(30)
+        self.search_timer.timeout.connect(self.flush_search)
+        self.selection = {}
+        self.rendering_tiles = False   # направляющие не попадают в тайловый кэш вида
+
+    # Выделение ведётся поштучно из itemChange, без обхода selectedItems()
+    def track_selection(self, item, selected):
+        if selected: self.selection[item] = True
+        else: self.selection.pop(item, None)
+
+    def selected_widgets(self): return list(self.selection)
+
+    # Поисковый индекс дозаполняется в простое небольшими порциями, поэтому первый
+    # запрос после загрузки большого проекта не переиндексирует всё разом
+    def touch_search(self, item):
+        self.search_index.touch(item)
+        if not self.search_timer.isActive(): self.search_timer.start()
+
+    def flush_search(self):
+        self.search_index.flush(SEARCH_CHUNK)
+        if not self.search_index.dirty: self.search_timer.stop()
+
+    def on_component_changed(self, def_id):
+        for item in self.items():
+            if isinstance(item, WidgetItem) and item.data_model.get('content', {}).get('component_id') == def_id: item.invalidate()
+
+    # Изменения копятся до следующего кадра и перерисовываются одним объединённым регионом
+    def invalidate_item(self, item, old_rect=None):
+        self.dirty_rects.append(item.dirty_rect())
+        if old_rect is not None: self.dirty_rects.append(old_rect)
+        if not self.dirty_timer.isActive(): self.dirty_timer.start()
+
+    def flush_dirty(self):
+        if not self.dirty_rects: return
+        region = QRegion()
+        for r in self.dirty_rects: region += r.toAlignedRect().adjusted(-1, -1, 1, 1)
+        self.dirty_rects = []
+        for r in region: self.update(QRectF(r))
+
+    def set_guides(self, lines):
+        if not lines and not self.guides: return
+        for line in self.guides + lines: self.update(QRectF(line.p1(), line.p2()).normalized().adjusted(-1, -1, 1, 1))
+        self.guides = lines
+
+    def drawForeground(self, painter, rect):
+        if not self.guides or self.rendering_tiles: return
+        painter.save()
+        painter.setPen(QPen(QColor("#ff2d95"), 0, Qt.DashLine))
+        for line in self.guides: painter.drawLine(line)
+        painter.restore()
+
     def drawBackground(self, painter, rect):
         is_dark = get_setting("theme", "Light", type=str) == "Dark"
         bg = QColor("#1e1e1e") if is_dark else QColor("#FAFAFA")
@@ -184,45 +285,242 @@ class GridScene(QGraphicsScene):
         for x in range(left, int(rect.right()), self.grid_size): painter.drawLine(x, int(rect.top()), x, int(rect.bottom()))
         for y in range(top, int(rect.bottom()), self.grid_size): painter.drawLine(int(rect.left()), y, int(rect.right()), y)
 
+# --- ДОКУМЕНТ ---
+# Вкладка редактора: своя сцена, корневой фрейм, вид, история отмены и загрузчик.
+# Декодированные картинки (QPixmapCache), шрифты, шаблоны и рендеры компонентов
+# общие для процесса, поэтому вторая вкладка с теми же ассетами их не декодирует.
+# Неактивная вкладка останавливает таймеры виджетов и отдаёт тайловый кэш вида.
+class Document:
+    count = 0
+
+    def __init__(self, screens):
+        Document.count += 1; self.number = Document.count
+        self.scene = GridScene(*canvas_size(screens))
+        self.screen_items = []; self.screen_rect = QRectF()
+        self.build_screens(screens)
+        self.root_frame = RootFrameItem(self.screen_rect); self.scene.addItem(self.root_frame)
+        self.view = EditorView(self.scene, self.root_frame)
+        self.view.set_tile_cache(get_setting("tile_cache", True, type=bool))
+        self.undo_stack = QUndoStack()
+        self.loader = ProjectLoader(self.root_frame, self.scene)
+        self.path = None; self.load_path = None; self.load_clears_undo = True
+        self.suspended = False
+
+    def title(self):
+        name = os.path.basename(self.path) if self.path else f"Без имени {self.number}"
+        return name if self.undo_stack.isClean() else name + " *"
+
+    def widgets(self): return [i for i in self.scene.items() if isinstance(i, WidgetItem)]
+
+    def is_blank(self):
+        return (self.path is None and not self.loader.active and self.undo_stack.count() == 0
+                and not any(isinstance(c, WidgetItem) for c in self.root_frame.childItems()))
+
+    # Рамки экранов; root_frame ограничивается их общим прямоугольником
+    def build_screens(self, screens):
+        for item in self.screen_items: self.scene.removeItem(item)
+        self.screen_items = []
+        rect = QRectF()
+        for n, (x, y, w, h) in enumerate(screens):
+            r = QRectF(CANVAS_MARGIN + x, CANVAS_MARGIN + y, w, h)
+            screen_item = QGraphicsRectItem(r); screen_item.setPen(QPen(Qt.black, 1, Qt.DashLine)); screen_item.setZValue(0)
+            self.scene.addItem(screen_item); self.screen_items.append(screen_item)
+            label = f"Screen {n + 1}: {w}x{h}" if len(screens) > 1 else f"Screen {w}x{h}"
+            lbl = QGraphicsTextItem(label, screen_item); lbl.setDefaultTextColor(QColor("#999")); lbl.setPos(r.x(), r.y() - 30)
+            rect = rect.united(r)
+        self.screen_rect = rect
+
+    def apply_layout(self, screens):
+        w, h = canvas_size(screens)
+        self.scene.setSceneRect(0, 0, w, h)
+        self.build_screens(screens)
+        self.root_frame.screen_rect = self.screen_rect
+        self.root_frame.setPos(self.root_frame.constrain_position(self.root_frame.pos()))
+        self.view.set_tile_cache(get_setting("tile_cache", True, type=bool))
+        if self.suspended and self.view.tiles is not None: self.view.tiles.clear()
+
+    def suspend(self):
+        if self.suspended: return
+        self.suspended = True
+        for item in self.widgets(): item.timer.stop()
+        self.scene.search_timer.stop()
+        if self.view.tiles is not None: self.view.tiles.clear()
+
+    def resume(self):
+        if not self.suspended: return
+        self.suspended = False
+        for item in self.widgets():
+            item.timer.start(1000); item.refresh_content()
+        if self.scene.search_index.dirty: self.scene.search_timer.start()
+        self.view.viewport().update()
+
+    # Загрузка в фоновую вкладку: новые виджеты сразу засыпают
+    def adopt(self, items):
+        if self.suspended:
+            for item in items: item.timer.stop()
+
 class App(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle(f"{APP_NAME} {APP_VERSION}")
         self.resize(1400, 900)
-        self.network_manager = QNetworkAccessManager(self); self.clipboard_data = None 
-        self.undo_stack = QUndoStack(self); self.temp_move_state = {} 
-
-        self.scene = GridScene(2500, 1500)
-        self.screen_rect = QRectF(100, 100, SCREEN_WIDTH, SCREEN_HEIGHT)
-        screen_item = QGraphicsRectItem(self.screen_rect); screen_item.setPen(QPen(Qt.black, 1, Qt.DashLine)); screen_item.setZValue(0)
-        self.scene.addItem(screen_item); self.screen_item = screen_item 
-        self.screen_lbl = QGraphicsTextItem("Screen 1920x1080", screen_item); self.screen_lbl.setDefaultTextColor(QColor("#999")); self.screen_lbl.setPos(100, 70)
-
-        self.root_frame = RootFrameItem(self.screen_rect); self.scene.addItem(self.root_frame)
-        self.view = EditorView(self.scene, self.root_frame); self.setCentralWidget(self.view)
-
-        self.create_docks(); self.create_menus(); self.create_toolbar()
+        self._network_manager = None; self.clipboard_data = None 
+        self.profiler = None; self.dock_profiler = None; self.dock_overdraw = None; self.dock_cost = None; self.dock_memory = None; self.watchdog = None; self.ui_ready = False
+        self.undo_group = QUndoGroup(self); self.temp_move_state = {} 
+        self.documents = []; self.doc = None; self.flash_repaints = False
+        load_lod_tiers()
+
+        self.tabs = QTabWidget(); self.tabs.setDocumentMode(True); self.tabs.setTabsClosable(True); self.tabs.setMovable(True)
+        self.tabs.tabBar().setAutoHide(True)
+        self.tabs.currentChanged.connect(self.on_tab_changed); self.tabs.tabCloseRequested.connect(self.close_document)
+        self.setCentralWidget(self.tabs)
         self.statusBar().showMessage("Готов")
+        self.load_bar = QProgressBar(); self.load_bar.setMaximumWidth(220); self.load_bar.hide()
+        self.load_cancel = QPushButton("Отмена"); self.load_cancel.clicked.connect(lambda: self.loader.cancel()); self.load_cancel.hide()
+        self.statusBar().addPermanentWidget(self.load_bar); self.statusBar().addPermanentWidget(self.load_cancel)
+        self.add_document()
+        self.apply_theme(get_setting("theme", "Light", type=str))
+        startup.mark("App: сцена и холст")
+
+        # Доки, меню и панели строятся после первой отрисовки холста
+        self.view.viewport().installEventFilter(self)
+        QTimer.singleShot(1000, self.on_ui_timeout)
+
+    # Сцена, фрейм, вид, история и загрузчик активной вкладки
+    @property
+    def scene(self): return self.doc.scene
+    @property
+    def root_frame(self): return self.doc.root_frame
+    @property
+    def view(self): return self.doc.view
+    @property
+    def undo_stack(self): return self.doc.undo_stack
+    @property
+    def loader(self): return self.doc.loader
+    @property
+    def screen_items(self): return self.doc.screen_items
+
+    # --- ВКЛАДКИ ---
+    def add_document(self):
+        doc = Document(screen_layout())
+        self.documents.append(doc)
+        self.undo_group.addStack(doc.undo_stack)
+        doc.undo_stack.cleanChanged.connect(lambda clean, d=doc: self.update_tab_title(d))
+        doc.loader.progress.connect(lambda done, total, d=doc: self.on_load_progress(d, done, total))
+        doc.loader.finished.connect(lambda ok, msg, d=doc: self.on_load_finished(d, ok, msg))
+        doc.loader.started.connect(lambda d=doc: d.view.tiles and d.view.tiles.set_hold(True))
+        doc.loader.built.connect(lambda items, d=doc: self.on_items_built(d, items))
+        doc.view.set_flash_repaints(self.flash_repaints)
+        if self.ui_ready: self.connect_document(doc)
+        self.tabs.addTab(doc.view, doc.title())
+        self.tabs.setCurrentWidget(doc.view)
+        return doc
+
+    # Сигналы вида идут в общие панели только от активной вкладки
+    def connect_document(self, doc):
+        doc.view.selection_changed.connect(lambda sel, d=doc: d is self.doc and self.props.set_selection(sel))
+        doc.view.hierarchy_changed.connect(lambda d=doc: d is self.doc and self.tree_widget.refresh(d.root_frame))
+        doc.view.request_properties.connect(self.show_properties_dock)
+
+    def document_at(self, index):
+        view = self.tabs.widget(index)
+        return next((d for d in self.documents if d.view is view), None)
+
+    def update_tab_title(self, doc):
+        index = self.tabs.indexOf(doc.view)
+        if index >= 0: self.tabs.setTabText(index, doc.title()); self.tabs.setTabToolTip(index, doc.path or "")
+
+    def on_tab_changed(self, index):
+        doc = self.document_at(index)
+        if doc is None or doc is self.doc: return
+        if self.doc is not None: self.doc.suspend()
+        self.doc = doc; doc.resume()
+        self.undo_group.setActiveStack(doc.undo_stack)
+        self.temp_move_state.clear()
+        if not self.ui_ready: return
+        self.props.set_selection(doc.scene.selected_widgets())
+        self.tree_widget.refresh(doc.root_frame)
+        if self.search_box.text().strip(): self.run_search()
+        loading = doc.loader.active
+        self.set_editing_enabled(not loading)
+        self.load_bar.setVisible(loading); self.load_cancel.setVisible(loading)
+        self.statusBar().showMessage(doc.path or doc.title(), 3000)
+        for dock in (self.dock_overdraw, self.dock_cost, self.dock_memory):
+            if dock is not None and dock.isVisible(): dock.widget().refresh()
+
+    # Последняя вкладка не закрывается, а заменяется пустой
+    def close_document(self, index=None):
+        doc = self.document_at(self.tabs.currentIndex() if index is None else index)
+        if doc is None: return
+        if not doc.undo_stack.isClean() and QMessageBox.question(self, "Закрыть", f"Закрыть «{doc.title()}» без сохранения?",
+                                                                 QMessageBox.Yes | QMessageBox.No) != QMessageBox.Yes: return
+        if doc.loader.active: doc.loader.cancel()
+        if len(self.documents) == 1: self.add_document()
+        doc.suspend()
+        if doc is self.doc: self.doc = None
+        self.tabs.removeTab(self.tabs.indexOf(doc.view))
+        if self.doc is None: self.on_tab_changed(self.tabs.currentIndex())
+        self.documents.remove(doc)
+        self.undo_group.removeStack(doc.undo_stack)
+        doc.view.deleteLater()
+
+    def set_flash_repaints(self, on):
+        self.flash_repaints = on
+        for doc in self.documents: doc.view.set_flash_repaints(on)
+
+    def apply_layout(self):
+        screens = screen_layout()
+        for doc in self.documents: doc.apply_layout(screens)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and obj is self.view.viewport() and not self.ui_ready:
+            QTimer.singleShot(0, self.on_first_paint)
+        return super().eventFilter(obj, event)
+
+    def on_first_paint(self):
+        if self.ui_ready: return
+        startup.mark("первая отрисовка")
+        self.finish_ui()
+        startup.mark("доки, меню, панели")
+        startup.finish()
+
+    # Запасной путь, если холст так и не отрисовался (окно свёрнуто, offscreen)
+    def on_ui_timeout(self):
+        if self.ui_ready: return
+        startup.mark("таймер (без отрисовки)")
+        self.finish_ui()
+        startup.mark("доки, меню, панели")
+        startup.finish()
+
+    def finish_ui(self):
+        if self.ui_ready: return
+        self.ui_ready = True
+        self.view.viewport().removeEventFilter(self)
+        self.create_docks(); self.create_menus(); self.create_toolbar()
         self.tree_widget.refresh(self.root_frame)
 
-        self.view.item_selected.connect(self.props.set_item)
-        self.props.data_changed.connect(lambda item: self.scene.update())
+        for doc in self.documents: self.connect_document(doc)
+        self.props.data_changed.connect(lambda item: item.invalidate())
         
-        self.view.hierarchy_changed.connect(lambda: self.tree_widget.refresh(self.root_frame))
         self.tree_widget.item_clicked_in_tree.connect(self.select_from_tree)
-        self.tree_widget.hierarchy_reordered.connect(lambda: self.scene.update())
-        self.view.request_properties.connect(self.show_properties_dock)
-        self.props.request_bg_edit.connect(self.view.start_bg_edit)
+        self.tree_widget.hierarchy_reordered.connect(lambda: self.scene.flush_dirty())
+        self.props.request_bg_edit.connect(lambda item: self.view.start_bg_edit(item))
         
         self.props.property_committed.connect(self.on_property_committed)
+        self.props.properties_committed.connect(self.on_properties_committed)
         self.props.undo_refresh_requested.connect(self.on_undo_refresh)
-        
-        self.connect_items_signals()
-        
-        # Apply theme last
-        self.apply_theme(get_setting("theme", "Light", type=str))
+
+        QTimer.singleShot(500, font_database().load_async)
+        self.apply_watchdog()
         QTimer.singleShot(2000, self.check_updates)
 
+    @property
+    def network_manager(self):
+        if self._network_manager is None:
+            from PySide6.QtNetwork import QNetworkAccessManager
+            self._network_manager = QNetworkAccessManager(self)
+        return self._network_manager
+
     def connect_items_signals(self):
         for item in self.scene.items():
             if isinstance(item, WidgetItem):
@@ -234,13 +532,18 @@ class App(QMainWindow):
                 item.interaction_finished.connect(self.on_item_interaction_end)
 
     def on_property_committed(self, path, old, new):
-        if self.props.current_item:
-            cmd = PropertyCommand(self.props.current_item, path, old, new, self.props.undo_refresh_requested)
+        targets = self.props.targets()
+        if len(targets) > 1: self.undo_stack.push(BatchPropertyCommand(targets, path, new, self.props.undo_refresh_requested))
+        elif targets:
+            cmd = PropertyCommand(targets[0], path, old, new, self.props.undo_refresh_requested)
             self.undo_stack.push(cmd)
+    def on_properties_committed(self, label, changes):
+        self.undo_stack.beginMacro(label)
+        for path, old, new in changes: self.on_property_committed(path, old, new)
+        self.undo_stack.endMacro()
 
     def on_undo_refresh(self, item):
-        self.scene.update()
-        if self.props.current_item == item: self.props.set_item(item)
+        if item in self.props.targets(): self.props.set_item(self.props.current_item)
 
     def on_item_interaction_start(self, item):
         self.temp_move_state[item] = {'x': item.x(), 'y': item.y(), 'w': item.rect().width(), 'h': item.rect().height()}
@@ -259,9 +562,17 @@ class App(QMainWindow):
         container = QWidget(); layout = QVBoxLayout(container)
         list_w = QListWidget()
         for k, v in WIDGET_TEMPLATES.items():
+            if k == 'component': continue
             item = list_w.addItem(v['name']); list_w.item(list_w.count()-1).setData(Qt.UserRole, k)
         list_w.setDragEnabled(True); list_w.startDrag = lambda actions: self.start_drag(list_w)
         layout.addWidget(list_w)
+        self.search_box = QLineEdit(); self.search_box.setClearButtonEnabled(True)
+        self.search_box.setPlaceholderText("Поиск: type:text opacity<0.5")
+        self.search_timer = QTimer(self); self.search_timer.setSingleShot(True); self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.run_search)
+        self.search_box.textChanged.connect(self.search_timer.start)
+        self.search_box.returnPressed.connect(self.run_search)
+        layout.addWidget(self.search_box)
         self.tree_widget = HierarchyTree(); layout.addWidget(self.tree_widget)
         dock_left.setWidget(container); self.addDockWidget(Qt.LeftDockWidgetArea, dock_left)
         self.dock_left = dock_left
@@ -274,30 +585,45 @@ class App(QMainWindow):
         mb = self.menuBar()
         file_m = mb.addMenu("Файл")
         file_m.addAction(QAction("Новый проект", self, shortcut="Ctrl+N", triggered=self.new_file))
+        file_m.addAction(QAction("Закрыть вкладку", self, shortcut="Ctrl+W", triggered=lambda: self.close_document()))
         file_m.addAction(QAction("Открыть...", self, shortcut="Ctrl+O", triggered=self.open_file))
         file_m.addAction(QAction("Импорт WGT...", self, triggered=self.import_wgt))
         file_m.addAction(QAction("Сохранить", self, shortcut="Ctrl+S", triggered=self.save_file))
         file_m.addSeparator(); file_m.addAction(QAction("Экспорт WGT", self, triggered=self.export_product))
+        file_m.addAction(QAction("Экспорт WGT с оптимизацией...", self, triggered=self.export_optimized))
         file_m.addSeparator(); file_m.addAction(QAction("Выход", self, triggered=self.close))
         edit_m = mb.addMenu("Правка")
-        edit_m.addAction(self.undo_stack.createUndoAction(self, "Отменить"))
-        edit_m.addAction(self.undo_stack.createRedoAction(self, "Повторить"))
+        edit_m.addAction(self.undo_group.createUndoAction(self, "Отменить"))
+        edit_m.addAction(self.undo_group.createRedoAction(self, "Повторить"))
         edit_m.addSeparator()
         edit_m.addAction(QAction("Копировать", self, shortcut="Ctrl+C", triggered=self.copy_item))
         edit_m.addAction(QAction("Вставить", self, shortcut="Ctrl+V", triggered=self.paste_item))
         edit_m.addSeparator()
         edit_m.addAction(QAction("Сгруппировать", self, shortcut="Ctrl+G", triggered=self.group_items))
         edit_m.addAction(QAction("Разгруппировать", self, shortcut="Ctrl+U", triggered=self.ungroup_items))
+        edit_m.addAction(QAction("Найти...", self, shortcut="Ctrl+F", triggered=self.focus_search))
         del_action = QAction("Удалить", self); del_action.setShortcut(QKeySequence.Delete); del_action.triggered.connect(self.delete_selected)
         self.addAction(del_action); edit_m.addAction(del_action)
         view_m = mb.addMenu("Вид")
         view_m.addAction(self.dock_left.toggleViewAction()); view_m.addAction(self.dock_right.toggleViewAction())
         view_m.addAction(QAction("Предпросмотр (F5)", self, shortcut="F5", triggered=self.toggle_preview))
         settings_m = mb.addMenu("Настройки"); settings_m.addAction(QAction("Параметры...", self, triggered=self.open_settings))
+        comp_m = mb.addMenu("Компоненты")
+        comp_m.addAction(QAction("Создать из выделения", self, triggered=self.create_component))
+        comp_m.addAction(QAction("Вставить экземпляр...", self, triggered=self.insert_component))
+        comp_m.addSeparator()
+        comp_m.addAction(QAction("Редактировать определение", self, triggered=self.edit_component))
+        comp_m.addAction(QAction("Применить к определению", self, triggered=self.apply_component_edit))
+        debug_m = mb.addMenu("Отладка")
+        debug_m.addAction(QAction("Профилировщик отрисовки", self, triggered=self.show_profiler))
+        debug_m.addAction(QAction("Подсвечивать перерисовку", self, checkable=True, toggled=self.set_flash_repaints))
+        debug_m.addAction(QAction("Карта перерисовки", self, triggered=self.show_overdraw))
+        debug_m.addAction(QAction("Бюджет производительности", self, triggered=self.show_cost))
+        debug_m.addAction(QAction("Память", self, triggered=self.show_memory))
 
     def create_toolbar(self):
         toolbar = QToolBar("Инструменты"); toolbar.setIconSize(QSize(16, 16)); self.addToolBar(toolbar)
-        toolbar.addAction(self.undo_stack.createUndoAction(self, "")); toolbar.addAction(self.undo_stack.createRedoAction(self, ""))
+        toolbar.addAction(self.undo_group.createUndoAction(self, "")); toolbar.addAction(self.undo_group.createRedoAction(self, ""))
         toolbar.addSeparator(); toolbar.addAction(QAction("Группа", self, triggered=self.group_items))
         toolbar.addAction(QAction("Разгруппировать", self, triggered=self.ungroup_items))
 
@@ -312,7 +638,7 @@ class App(QMainWindow):
             if dx or dy:
                 for item in sel:
                     if isinstance(item, WidgetItem) and not item.is_locked: item.setPos(item.x() + dx, item.y() + dy); item.update_model()
-                self.props.set_item(sel[0] if sel else None)
+                self.props.set_item((self.props.current_item or sel[0]) if sel else None)
                 return
         super().keyPressEvent(event)
 
@@ -352,57 +678,243 @@ class App(QMainWindow):
         for item in items: self.undo_stack.push(DeleteCommand(self.scene, item, self.view.hierarchy_changed))
         self.undo_stack.endMacro(); self.props.set_item(None)
 
+    # --- КОМПОНЕНТЫ ---
+    def selected_widget(self):
+        sel = [i for i in self.scene.selectedItems() if isinstance(i, WidgetItem)]
+        return sel[0] if len(sel) == 1 else None
+
+    def place_instance(self, def_id, parent, x, y, replace=None, overrides=None):
+        definition = self.scene.components.get(def_id)
+        item = WidgetItem("component", x, y, parent)
+        data = item.clone_state()
+        data.update({"name": definition['name'], "x": x, "y": y, "width": definition['width'], "height": definition['height']})
+        data['content'].update({"component_id": def_id, "overrides": overrides or {}})
+        if replace is not None: data['z_index'] = replace.zValue()
+        item.apply_data(data)
+        if replace is not None: self.undo_stack.push(DeleteCommand(self.scene, replace, self.view.hierarchy_changed))
+        self.undo_stack.push(CreateCommand(self.scene, item, parent, self.view.hierarchy_changed))
+        self.scene.clearSelection(); item.setSelected(True); self.connect_items_signals()
+        return item
+
+    def create_component(self):
+        item = self.selected_widget()
+        if item is None or item.data_model.get('type') == 'component':
+            return self.statusBar().showMessage("Выделите один виджет или группу", 3000)
+        name, ok = QInputDialog.getText(self, "Компонент", "Имя компонента:", text=item.data_model.get('name', ''))
+        if not ok or not name: return
+        r = item.rect()
+        definition = {"id": str(uuid.uuid4()), "name": name, "width": int(r.width()), "height": int(r.height()), "widgets": definition_widgets(item)}
+        self.undo_stack.beginMacro("Create component")
+        self.undo_stack.push(DefinitionCommand(self.scene.components, None, definition))
+        self.place_instance(definition['id'], item.parentItem(), item.x(), item.y(), replace=item)
+        self.undo_stack.endMacro()
+
+    def insert_component(self):
+        lib = self.scene.components
+        if not lib.definitions: return self.statusBar().showMessage("Компонентов нет", 3000)
+        names = [d['name'] for d in lib.definitions.values()]
+        name, ok = QInputDialog.getItem(self, "Компонент", "Определение:", names, 0, False)
+        if not ok: return
+        def_id = list(lib.definitions)[names.index(name)]
+        self.undo_stack.beginMacro("Insert component")
+        self.place_instance(def_id, self.root_frame, 20, 20)
+        self.undo_stack.endMacro()
+
+    # Экземпляр разворачивается в обычную группу-черновик; "Применить" записывает её в определение
+    def edit_component(self):
+        item = self.selected_widget()
+        if item is None or item.data_model.get('type') != 'component': return
+        content = item.data_model['content']
+        definition = self.scene.components.get(content.get('component_id'))
+        if definition is None: return
+        draft, ids = draft_definition(definition, content.get('overrides', {}))
+        items = build_items(draft, item.parentItem())
+        top = items[next(w['id'] for w in draft['widgets'] if w.get('parent_id') is None)]
+        top.setPos(item.pos()); top.update_model()
+        top.data_model['component_source'] = {"id": definition['id'], "overrides": content.get('overrides', {}), "ids": ids}
+        self.undo_stack.beginMacro("Edit component")
+        self.undo_stack.push(DeleteCommand(self.scene, item, self.view.hierarchy_changed))
+        self.undo_stack.push(CreateCommand(self.scene, top, item.parentItem(), self.view.hierarchy_changed))
+        self.undo_stack.endMacro()
+        self.scene.clearSelection(); top.setSelected(True); self.connect_items_signals()
+
+    def apply_component_edit(self):
+        item = self.selected_widget()
+        source = item.data_model.get('component_source') if item is not None else None
+        if not source: return self.statusBar().showMessage("Выделите развёрнутый компонент", 3000)
+        lib = self.scene.components
+        old_def = lib.get(source['id'])
+        if old_def is None: return
+        del item.data_model['component_source']
+        r = item.rect()
+        widgets, overrides = merge_draft(definition_widgets(item), source.get('ids', {}), old_def, source['overrides'])
+        new_def = dict(old_def, width=int(r.width()), height=int(r.height()), widgets=widgets)
+        self.undo_stack.beginMacro("Apply component")
+        self.undo_stack.push(DefinitionCommand(lib, copy.deepcopy(old_def), new_def))
+        self.place_instance(source['id'], item.parentItem(), item.x(), item.y(), replace=item, overrides=overrides)
+        self.undo_stack.endMacro()
+
     def toggle_preview(self):
         is_preview = not self.dock_left.isVisible()
         self.dock_left.setVisible(is_preview); self.dock_right.setVisible(is_preview)
         self.menuBar().setVisible(is_preview)
-        self.screen_item.setVisible(is_preview); self.screen_lbl.setVisible(is_preview)
+        for screen_item in self.screen_items: screen_item.setVisible(is_preview)
         for item in self.scene.items():
             if isinstance(item, WidgetItem):
                 item.setFlag(QGraphicsRectItem.ItemIsSelectable, is_preview)
                 item.setFlag(QGraphicsRectItem.ItemIsMovable, is_preview)
-                if not is_preview: item.resize_handle.hide()
+                if not is_preview: item.release_handle()
         if not is_preview: self.scene.clearSelection(); self.view.setDragMode(QGraphicsView.ScrollHandDrag)
         else: self.view.setDragMode(QGraphicsView.NoDrag)
 
     def apply_theme(self, theme_name):
         self.setStyleSheet(THEMES.get(theme_name, ""))
-        self.scene.update()
+        for doc in self.documents: doc.scene.update()
 
     def start_drag(self, list_widget):
         item = list_widget.currentItem()
         key = item.data(Qt.UserRole); drag = QDrag(list_widget)
         mime = QMimeData(); mime.setText(key); drag.setMimeData(mime); drag.exec(Qt.CopyAction)
+    # --- ПОИСК ---
+    # Результаты выделяются на холсте и в дереве; запрос разбирается search.parse_query
+    def focus_search(self):
+        self.dock_left.setVisible(True); self.dock_left.raise_()
+        self.search_box.setFocus(); self.search_box.selectAll()
+    def find_widgets(self, query): return self.scene.search_index.query(query)
+    def run_search(self):
+        self.search_timer.stop()
+        query = self.search_box.text().strip()
+        if not query: return self.tree_widget.highlight([])
+        try: found = self.find_widgets(query)
+        except ValueError as e: return self.statusBar().showMessage(f"Ошибка запроса: {e}", 3000)
+        self.scene.clearSelection()
+        for item in found:
+            if not item.is_locked: item.setSelected(True)
+        self.tree_widget.highlight(found)
+        if found: self.view.ensureVisible(found[0])
+        self.statusBar().showMessage(f"Найдено: {len(found)}", 3000)
     def select_from_tree(self, item): self.scene.clearSelection(); item.setSelected(True); self.view.setFocus()
     def show_properties_dock(self): self.dock_right.setVisible(True); self.dock_right.raise_()
+    def show_profiler(self):
+        if not self.dock_profiler:
+            from profiler import PaintProfiler
+            from ui import ProfilerPanel
+            self.profiler = PaintProfiler()
+            self.dock_profiler = QDockWidget("Профилировщик", self)
+            self.dock_profiler.setWidget(ProfilerPanel(self.profiler, lambda: self.scene))
+            self.addDockWidget(Qt.BottomDockWidgetArea, self.dock_profiler)
+        self.dock_profiler.setVisible(True); self.dock_profiler.raise_()
+    def show_overdraw(self):
+        if not self.dock_overdraw:
+            from ui import OverdrawPanel
+            panel = OverdrawPanel(lambda: self.root_frame, lambda: self.scene)
+            panel.overlay_changed.connect(lambda result: self.view.set_overdraw(result))
+            panel.item_chosen.connect(self.select_from_tree)
+            self.dock_overdraw = QDockWidget("Перерисовка", self)
+            self.dock_overdraw.setWidget(panel)
+            self.addDockWidget(Qt.BottomDockWidgetArea, self.dock_overdraw)
+        self.dock_overdraw.setVisible(True); self.dock_overdraw.raise_()
+        self.dock_overdraw.widget().refresh()
+    def show_cost(self):
+        if not self.dock_cost:
+            from ui import CostPanel
+            panel = CostPanel(lambda: self.root_frame)
+            panel.item_chosen.connect(self.select_from_tree)
+            self.dock_cost = QDockWidget("Бюджет", self)
+            self.dock_cost.setWidget(panel)
+            self.addDockWidget(Qt.BottomDockWidgetArea, self.dock_cost)
+        self.dock_cost.setVisible(True); self.dock_cost.raise_()
+        self.dock_cost.widget().refresh()
+    def apply_watchdog(self):
+        on = get_setting("stall_watchdog", False, type=bool)
+        if not on and self.watchdog is None: return
+        from stalls import stall_watchdog
+        self.watchdog = stall_watchdog()
+        self.watchdog.set_threshold(get_setting("stall_threshold_ms", 50, type=int))
+        if on: self.watchdog.start()
+        else: self.watchdog.stop()
+    def memory_report(self):
+        from memory import report
+        return report(self.root_frame, self.undo_stack, self.clipboard_data, self.view.tiles, load_budgets())
+    def show_memory(self):
+        if not self.dock_memory:
+            from ui import MemoryPanel
+            panel = MemoryPanel(self.memory_report)
+            panel.item_chosen.connect(self.select_from_tree)
+            self.dock_memory = QDockWidget("Память", self)
+            self.dock_memory.setWidget(panel)
+            self.addDockWidget(Qt.BottomDockWidgetArea, self.dock_memory)
+        self.dock_memory.setVisible(True); self.dock_memory.raise_()
+        self.dock_memory.widget().refresh()
     def get_docs_path(self): return get_setting("default_dir", QStandardPaths.writableLocation(QStandardPaths.DocumentsLocation))
-    def new_file(self):
-        if QMessageBox.question(self, "Новый", "Сбросить?", QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes:
-            for child in self.root_frame.childItems(): self.scene.removeItem(child)
-            self.root_frame.reset_settings(); self.tree_widget.refresh(self.root_frame); self.props.set_item(None); self.undo_stack.clear()
+    def new_file(self): self.add_document()
     def save_file(self):
-        path, _ = QFileDialog.getSaveFileName(self, "Сохранить", self.get_docs_path(), "Project (*.json)")
+        doc = self.doc
+        path, _ = QFileDialog.getSaveFileName(self, "Сохранить", doc.path or self.get_docs_path(), "Project (*.json)")
         if path: 
-            if ProjectManager.save_project(path, self.root_frame): self.statusBar().showMessage(f"Сохранено", 3000)
+            if ProjectManager.save_project(path, self.root_frame):
+                doc.path = path; doc.undo_stack.setClean(); self.update_tab_title(doc)
+                self.statusBar().showMessage(f"Сохранено", 3000)
+    # Открытый проект занимает текущую вкладку, только если она пустая
     def open_file(self):
         path, _ = QFileDialog.getOpenFileName(self, "Открыть", self.get_docs_path(), "Project (*.json)")
-        if path:
-            self.scene.clearSelection(); self.props.set_item(None)
-            ok, msg = ProjectManager.load_project(path, self.root_frame, self.scene)
-            if ok: self.tree_widget.refresh(self.root_frame); self.undo_stack.clear(); self.connect_items_signals()
-            else: QMessageBox.critical(self, "Ошибка", msg)
+        if not path: return
+        if not self.doc.is_blank(): self.add_document()
+        self.stream_project(path, clear_undo=True)
     def import_wgt(self):
         path, _ = QFileDialog.getOpenFileName(self, "Импорт", self.get_docs_path(), "WGT (*.wgt)")
-        if path:
-            self.scene.clearSelection(); self.props.set_item(None)
-            ok, msg = ProjectManager.import_wgt(path, self.root_frame, self.scene)
-            if ok: self.tree_widget.refresh(self.root_frame); self.connect_items_signals()
+        if path: self.stream_project(path, clear_undo=False)
+
+    # --- ПОТОКОВАЯ ЗАГРУЗКА ---
+    # Пока проект догружается, вид только панорамируется и масштабируется, меню и панели
+    # инструментов (сохранение, отмена правок) недоступны
+    def set_editing_enabled(self, on):
+        self.view.setInteractive(on); self.menuBar().setEnabled(on); self.search_box.setEnabled(on)
+        for toolbar in self.findChildren(QToolBar): toolbar.setEnabled(on)
+    def stream_project(self, path, clear_undo):
+        if self.loader.active: return
+        self.scene.clearSelection(); self.props.set_item(None)
+        self.doc.load_clears_undo = clear_undo; self.doc.load_path = path
+        self.set_editing_enabled(False)
+        self.load_bar.setRange(0, 0); self.load_bar.show(); self.load_cancel.show()
+        self.statusBar().showMessage("Загрузка…")
+        self.loader.start(path)
+    def on_items_built(self, doc, items):
+        for item in items:
+            item.interaction_started.connect(self.on_item_interaction_start)
+            item.interaction_finished.connect(self.on_item_interaction_end)
+        doc.adopt(items)
+        if doc.view.tiles is not None and not doc.suspended: doc.view.tiles.paint_items(items)
+    def on_load_progress(self, doc, done, total):
+        if doc is not self.doc: return
+        self.load_bar.setRange(0, max(1, total)); self.load_bar.setValue(done)
+        self.statusBar().showMessage(f"Загрузка: {done} из {total}")
+    def on_load_finished(self, doc, ok, msg):
+        if doc.view.tiles is not None and doc.view.tiles.hold: doc.view.tiles.set_hold(False, keep=ok and not doc.suspended)
+        if ok and doc.load_clears_undo: doc.undo_stack.clear(); doc.loader.release_retired(); doc.path = doc.load_path; self.update_tab_title(doc)
+        if doc is self.doc:
+            self.load_bar.hide(); self.load_cancel.hide()
+            self.set_editing_enabled(True)
+            if ok: self.tree_widget.refresh(doc.root_frame)
+        if ok: self.statusBar().showMessage(f"Загружено: {doc.title()}", 3000)
+        else:
+            self.statusBar().showMessage("Загрузка отменена" if not msg else "Ошибка загрузки", 3000)
+            if msg: QMessageBox.critical(self, "Ошибка", msg)
     def export_product(self):
         path, _ = QFileDialog.getSaveFileName(self, "Экспорт", self.get_docs_path(), "WGT (*.wgt)")
         if path: ProjectManager.export_product_wgt(path, self.root_frame)
+    def export_optimized(self):
+        from ui import ExportDialog
+        dlg = ExportDialog(self)
+        if not dlg.exec_(): return
+        path, _ = QFileDialog.getSaveFileName(self, "Экспорт", self.get_docs_path(), "WGT (*.wgt)")
+        if not path: return
+        report = ProjectManager.export_product_wgt(path, self.root_frame, **dlg.options())
+        lines = [f"{a['atlas']}: {a['width']}×{a['height']}, спрайтов {a['sprites']}, заполнение {a['fill']:.0%}" for a in report]
+        QMessageBox.information(self, "Экспорт", "Экспортировано.\n" + ("\n".join(lines) if lines else "Атласы не создавались."))
     def open_settings(self):
         dlg = SettingsDialog(self)
-        if dlg.exec_(): self.apply_theme(get_setting("theme", "Light", type=str))
+        if dlg.exec_(): self.apply_theme(get_setting("theme", "Light", type=str)); self.apply_layout(); self.apply_watchdog()
     def check_updates(self): pass 
     def copy_item(self):
         items = [i for i in self.scene.selectedItems() if isinstance(i, WidgetItem)]
@@ -419,6 +931,9 @@ class App(QMainWindow):
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    startup.mark("QApplication")
     window = App()
+    startup.mark("App()")
     window.show()
+    startup.mark("show()")
     sys.exit(app.exec())
\ No newline at end of file
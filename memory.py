@@ -0,0 +1,204 @@
+# memory.py - Отчёт о памяти редактора по подсистемам
+# Пример (CI): python memory.py project.json --json --budget budget_widget_kb=48
+import os
+import sys
+import json
+import argparse
+import tracemalloc
+
+from PySide6.QtCore import QObject
+from PySide6.QtGui import QPixmapCache
+from PySide6.QtWidgets import QGraphicsItem, QGraphicsTextItem
+from shiboken6 import Shiboken
+
+from config import BUDGET_DEFAULTS
+from items import WidgetItem
+from images import CACHED_KEYS, image_loader
+from cost import walk
+
+# Оценки Qt-стороны, байт. API для размера C++-объектов нет; числа грубые и нужны,
+# чтобы сравнивать подсистемы между собой и ловить рост между прогонами.
+QT_ITEM_BYTES = 640        # QGraphicsItem с приватными данными и обёрткой PySide
+QT_OBJECT_BYTES = 256      # QObject (таймер виджета)
+QT_COMMAND_BYTES = 96      # QUndoCommand
+TEXT_DOC_BYTES = 4096      # QTextDocument: корневой фрейм, коллекция форматов, раскладка
+TEXT_BLOCK_BYTES = 256
+TEXT_CHAR_BYTES = 24       # UTF-16 и глифы раскладки
+GRADIENT_BYTES = 160       # QLinearGradient с двумя стопами; живёт только на время отрисовки
+
+SUBSYSTEMS = [("scene_items", "Элементы сцены (Qt)"), ("data_models", "data_model"), ("pixmaps", "Картинки и тайлы"),
+              ("gradients", "Градиенты"), ("undo", "История отмены"), ("clipboard", "Буфер обмена"),
+              ("text_documents", "Текстовые документы")]
+
+def kb(n): return round(n / 1024, 1)
+
+def pixmap_bytes(pixmap): return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+def text_size(doc): return TEXT_DOC_BYTES + doc.blockCount() * TEXT_BLOCK_BYTES + doc.characterCount() * TEXT_CHAR_BYTES
+
+# Python-данные вместе с вложенными контейнерами. Элементы сцены разворачиваются
+# только снятые с неё (удаления в истории отмены): живые считаются отдельно.
+def deep_size(obj, seen):
+    if id(obj) in seen: return 0
+    seen.add(id(obj))
+    if isinstance(obj, Shiboken.Object):
+        try:
+            if isinstance(obj, QGraphicsItem): return 0 if obj.scene() is not None else subtree_size(obj, seen)
+        except RuntimeError: return 0
+        return QT_OBJECT_BYTES if isinstance(obj, QObject) else 0
+    size = sys.getsizeof(obj)
+    t = type(obj)
+    if t is dict: size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif t in (list, tuple, set, frozenset): size += sum(deep_size(v, seen) for v in obj)
+    return size
+
+# --- ОДИН ВИДЖЕТ ---
+# Служебные дети (ручка, текстовый прокси) входят в виджет. Картинка общая для всех
+# виджетов с тем же файлом и засчитывается каждому из них.
+def widget_memory(item, seen, images):
+    parts = [c for c in item.childItems() if not isinstance(c, WidgetItem)]
+    model = deep_size(item.data_model, seen)
+    attrs = sum(deep_size(v, seen) for k, v in vars(item).items() if k != 'data_model')
+    return {"model": model, "qt": QT_ITEM_BYTES * (1 + len(parts)) + attrs,
+            "text": sum(text_size(c.document()) for c in parts if isinstance(c, QGraphicsTextItem)),
+            "image": images.get(item.data_model.get('style', {}).get('bg_image'), 0)}
+
+def subtree_size(item, seen):
+    total, stack = 0, [item]
+    while stack:
+        it = stack.pop()
+        if not isinstance(it, WidgetItem): total += QT_ITEM_BYTES; continue
+        total += sum(widget_memory(it, seen, {}).values())
+        stack.extend(c for c in it.childItems() if isinstance(c, WidgetItem))
+    return total
+
+def command_size(cmd, seen):
+    size = QT_COMMAND_BYTES + sum(deep_size(v, seen) for v in getattr(cmd, '__dict__', {}).values())
+    return size + sum(command_size(cmd.child(i), seen) for i in range(cmd.childCount()))
+
+def uses_gradients(data):
+    style, content = data.get('style', {}), data.get('content', {})
+    return sum(1 for d, key in ((style, 'use_gradient'), (content, 'use_gradient'), (content, 'use_text_gradient')) if d.get(key))
+
+# QPixmapCache вытесняет картинки сам; ключи без картинки забываются
+def cached_pixmaps():
+    out = {}
+    for key in list(CACHED_KEYS):
+        pixmap = QPixmapCache.find(key)
+        if pixmap is None: CACHED_KEYS.discard(key)
+        else: out[key] = pixmap_bytes(pixmap)
+    return out
+
+# Python-куча по файлам; без запущенной трассировки (--trace-memory или флажок в
+# панели) tracemalloc ничего не знает о уже сделанных выделениях
+def python_heap(top=10):
+    if not tracemalloc.is_tracing(): return {"tracing": False}
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    stats = snapshot.statistics('filename')
+    return {"tracing": True, "current_kb": kb(current), "peak_kb": kb(peak),
+            "by_file": [{"file": os.path.basename(s.traceback[0].filename), "kb": kb(s.size), "blocks": s.count} for s in stats[:top]]}
+
+# --- ОТЧЁТ ---
+# Бюджет budget_widget_kb относится к собственной памяти виджета (данные, Qt-объекты,
+# текст); картинки ограничиваются отдельным бюджетом в cost.py
+def report(root, undo_stack=None, clipboard=None, tiles=None, budgets=None, top=20):
+    budgets = dict(BUDGET_DEFAULTS, **(budgets or {}))
+    scene = root.scene()
+    cached = cached_pixmaps()
+    images = {}
+    for (path, _), key in image_loader().latest.items(): images[path] = max(images.get(path, 0), cached.get(key, 0))
+
+    seen = set()
+    rows, sums = [], {"model": 0, "qt": 0, "text": 0, "image": 0}
+    counted = texts = gradients = 0
+    for item in walk(root):
+        m = widget_memory(item, seen, images)
+        for k in sums: sums[k] += m[k]
+        parts = [c for c in item.childItems() if not isinstance(c, WidgetItem)]
+        counted += 1 + len(parts); texts += sum(1 for c in parts if isinstance(c, QGraphicsTextItem))
+        gradients += uses_gradients(item.data_model)
+        own = m['model'] + m['qt'] + m['text']
+        rows.append({"item": item, "id": item.data_model.get('id'), "name": item.data_model.get('name', ''),
+                     "type": item.data_model.get('type', ''), "kb": kb(own + m['image']), "own_kb": kb(own),
+                     "model_kb": kb(m['model']), "qt_kb": kb(m['qt']), "text_kb": kb(m['text']), "image_kb": kb(m['image']),
+                     "over": own / 1024 > budgets['budget_widget_kb']})
+    others = len(scene.items()) - counted if scene is not None else 0
+
+    tile_maps = list(tiles.tiles.values()) + list(tiles.stale.values()) if tiles is not None else []
+    undo = [undo_stack.command(i) for i in range(undo_stack.count())] if undo_stack is not None else []
+    subsystems = {
+        "scene_items": {"bytes": sums['qt'] + QT_ITEM_BYTES * max(0, others), "count": counted + max(0, others)},
+        "data_models": {"bytes": sums['model'] + deep_size(root.data_model, seen), "count": len(rows) + 1},
+        "pixmaps": {"bytes": sum(cached.values()) + sum(pixmap_bytes(p) for p in tile_maps), "count": len(cached) + len(tile_maps),
+                    "cache_kb": kb(sum(cached.values())), "tiles_kb": kb(sum(pixmap_bytes(p) for p in tile_maps))},
+        "gradients": {"bytes": gradients * GRADIENT_BYTES, "count": gradients},
+        "undo": {"bytes": sum(command_size(c, seen) for c in undo), "count": len(undo)},
+        "clipboard": {"bytes": deep_size(clipboard, seen) if clipboard else 0, "count": 1 if clipboard else 0},
+        "text_documents": {"bytes": sums['text'], "count": texts}}
+    for s in subsystems.values(): s['kb'] = kb(s.pop('bytes'))
+
+    rows.sort(key=lambda r: r['kb'], reverse=True)
+    sizes = [r['own_kb'] for r in rows]
+    return {"subsystems": subsystems, "total_kb": round(sum(s['kb'] for s in subsystems.values()), 1),
+            "python_heap": python_heap(), "estimates": {"qt_item_bytes": QT_ITEM_BYTES, "text_doc_bytes": TEXT_DOC_BYTES},
+            "widget_count": len(rows), "mean_widget_kb": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            "max_widget_kb": max(sizes) if sizes else 0.0, "budget_widget_kb": budgets['budget_widget_kb'],
+            "over_budget": [r['id'] for r in rows if r['over']], "widgets": rows if top is None else rows[:top]}
+
+def report_json(result):
+    out = dict(result)
+    out['widgets'] = [{k: v for k, v in w.items() if k != 'item'} for w in result['widgets']]
+    return out
+
+# --- CLI ---
+def main(argv=None):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    ap = argparse.ArgumentParser(description="Память редактора по подсистемам и виджетам")
+    ap.add_argument("project", help="проект .json или .wgt")
+    ap.add_argument("--budget", action="append", default=[], metavar="KEY=VALUE", help="переопределить бюджет")
+    ap.add_argument("--json", action="store_true", help="вывести отчёт в JSON")
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args(argv)
+
+    budgets = {}
+    for spec in args.budget:
+        key, _, value = spec.partition("=")
+        if key not in BUDGET_DEFAULTS: ap.error(f"неизвестный бюджет {key}")
+        budgets[key] = type(BUDGET_DEFAULTS[key])(float(value))
+
+    tracemalloc.start()
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtCore import QRectF
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    from main import GridScene, ProjectManager
+    from items import RootFrameItem
+    from project import read_project
+    from config import SCREEN_WIDTH, SCREEN_HEIGHT
+    scene = GridScene(2500, 1500)
+    root = RootFrameItem(QRectF(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)); scene.addItem(root)
+    ProjectManager.load_project_data(read_project(args.project), root, scene)
+    # Картинки декодируются при отрисовке: один кадр корня вне экрана, чтобы кэш
+    # картинок в отчёте был таким же, как в открытом редакторе
+    from PySide6.QtGui import QImage, QPainter
+    area = root.sceneBoundingRect()
+    frame = QImage(max(1, int(area.width())), max(1, int(area.height())), QImage.Format_ARGB32_Premultiplied)
+    p = QPainter(frame); scene.render(p, QRectF(frame.rect()), area); p.end()
+    result = report(root, budgets=budgets, top=None if args.json else args.top)
+
+    if args.json: print(json.dumps(report_json(result), indent=4, ensure_ascii=False))
+    else:
+        for key, label in SUBSYSTEMS:
+            s = result['subsystems'][key]
+            print(f"{label:<28}{s['kb']:>12.1f} КБ{s['count']:>10}")
+        print(f"{'Всего (оценка)':<28}{result['total_kb']:>12.1f} КБ")
+        heap = result['python_heap']
+        if heap['tracing']: print(f"{'Python-куча (tracemalloc)':<28}{heap['current_kb']:>12.1f} КБ, пик {heap['peak_kb']:.1f}")
+        print(f"\nНа виджет: в среднем {result['mean_widget_kb']} КБ, максимум {result['max_widget_kb']} КБ, бюджет {result['budget_widget_kb']} КБ")
+        for w in result['widgets']:
+            mark = "  ПРЕВЫШЕН" if w['over'] else ""
+            print(f"  {w['name']:<28}{w['type']:<10}{w['kb']:>9.1f} КБ (данные {w['model_kb']}, Qt {w['qt_kb']}, текст {w['text_kb']}, картинки {w['image_kb']}){mark}")
+    return 1 if result['over_budget'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
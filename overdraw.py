@@ -0,0 +1,139 @@
+# overdraw.py - Анализ перерисовки: сколько слоёв закрашивает каждый пиксель
+from PySide6.QtCore import Qt, QRectF
+from PySide6.QtGui import QImage, QPainter, QPainterPath, QColor, QRegion, QTransform
+
+from items import WidgetItem, paints_fill
+
+HEAT_COLORS = [(0, QColor(0, 0, 0, 0)), (1, QColor(40, 90, 255, 90)), (2, QColor(40, 200, 80, 130)),
+               (3, QColor(255, 210, 0, 160)), (5, QColor(255, 120, 0, 180)), (8, QColor(230, 0, 40, 200))]
+
+def heat_table():
+    table = []
+    for n in range(256):
+        color = next(c for limit, c in reversed(HEAT_COLORS) if n >= limit)
+        table.append(color.rgba())
+    return table
+
+HEAT_TABLE = heat_table()
+HIST_CAP = 16   # всё, что закрашено 16 и более раз, попадает в одну корзину
+CAP_TABLE = bytes(min(n, HIST_CAP) for n in range(256))
+
+# --- СЛОИ ---
+# Порядок отрисовки сцены: родитель, затем дети по возрастанию z
+def paint_order(root):
+    out = []
+    def walk(item):
+        out.append(item)
+        for child in sorted((c for c in item.childItems() if isinstance(c, WidgetItem) and c.isVisible()), key=lambda c: c.zValue()):
+            walk(child)
+    walk(root)
+    return out
+
+def shape_path(item, rect):
+    style = item.data_model.get('style', {})
+    path = QPainterPath()
+    if item.data_model.get('type') == 'circle': path.addEllipse(rect)
+    else:
+        radius = int(style.get('radius', 0))
+        path.addRoundedRect(rect, radius, radius)
+    return path
+
+def is_opaque(style):
+    if float(style.get('opacity', 1.0)) < 1.0 or style.get('bg_color', '#ffffff') == 'transparent': return False
+    if QColor(style.get('bg_color', '#ffffff')).alpha() < 255: return False
+    if style.get('use_gradient'):
+        return QColor(style.get('grad_start', '#ffffff')).alpha() == 255 and QColor(style.get('grad_end', '#000000')).alpha() == 255
+    return True
+
+# Гарантированно непрозрачная часть фона (внутренность скругления/эллипса)
+def opaque_region(item, to_scene):
+    rect = item.rect()
+    radius = int(item.data_model.get('style', {}).get('radius', 0))
+    if item.data_model.get('type') == 'circle':
+        k = 0.5 - 0.5 / 2 ** 0.5
+        inner = rect.adjusted(rect.width() * k, rect.height() * k, -rect.width() * k, -rect.height() * k)
+        return QRegion(to_scene.mapRect(inner).toAlignedRect())
+    if radius <= 0: return QRegion(to_scene.mapRect(rect).toAlignedRect())
+    r = min(radius, rect.width() / 2, rect.height() / 2)
+    a = QRegion(to_scene.mapRect(rect.adjusted(r, 0, -r, 0)).toAlignedRect())
+    return a.united(QRegion(to_scene.mapRect(rect.adjusted(0, r, 0, -r)).toAlignedRect()))
+
+# Слои, которые элемент реально закрашивает: фон (с учётом clip-пути) и контент
+def item_layers(item):
+    layers = []
+    style = item.data_model.get('style', {})
+    rect = item.rect()
+    if paints_fill(style): layers.append(shape_path(item, rect))
+    b = int(style.get('border_width', 0)) / 2
+    if b > 0: layers.append(shape_path(item, rect.adjusted(-b, -b, b, b)).subtracted(shape_path(item, rect.adjusted(b, b, -b, -b))))
+    if item.data_model.get('type') == 'progress':
+        content = item.data_model.get('content', {})
+        max_val = float(content.get('max_value', 100)) or 1
+        ratio = min(max(float(content.get('value', 0)) / max_val, 0), 1)
+        path = QPainterPath(); path.addRect(QRectF(0, 0, rect.width() * ratio, rect.height()))
+        layers.append(path.intersected(shape_path(item, rect)))
+    proxy = getattr(item, 'content_proxy', None)
+    if proxy is not None and not proxy.document().isEmpty():
+        path = QPainterPath(); path.addRect(proxy.mapRectToParent(proxy.boundingRect()))
+        layers.append(path)
+    return layers
+
+# --- АНАЛИЗ ---
+class OverdrawResult:
+    def __init__(self, image, rect, histogram, occluded, items, max_layers):
+        self.image = image           # Indexed8 с тепловой палитрой, 1 пиксель = 1/scale сцены
+        self.rect = rect             # область сцены, к которой относится карта
+        self.histogram = histogram   # {число слоёв: число пикселей}, последняя корзина — HIST_CAP и больше
+        self.occluded = occluded     # полностью перекрытые виджеты
+        self.items = items
+        self.max_layers = max_layers
+
+    @property
+    def pixels(self): return sum(self.histogram.values())
+    @property
+    def mean_layers(self): return sum(n * c for n, c in self.histogram.items()) / max(1, self.pixels)
+    def share_at_least(self, n): return sum(c for k, c in self.histogram.items() if k >= n) / max(1, self.pixels)
+
+# Счётчики накапливаются растеризатором Qt: каждый слой добавляет 1 к RGB (CompositionMode_Plus),
+# затем буфер переводится в Grayscale8 и переинтерпретируется как Indexed8 с палитрой —
+# без попиксельных циклов на Python.
+def analyze(root, scale=1.0):
+    area = root.sceneBoundingRect() if not hasattr(root, 'rect') else root.mapRectToScene(root.rect())
+    w = max(1, int(area.width() * scale)); h = max(1, int(area.height() * scale))
+    acc = QImage(w, h, QImage.Format_RGB32)
+    acc.fill(Qt.black)
+    p = QPainter(acc)
+    p.setCompositionMode(QPainter.CompositionMode_Plus)
+    p.setPen(Qt.NoPen)
+    one = QColor(1, 1, 1)
+    view = QTransform().scale(scale, scale).translate(-area.left(), -area.top())
+    order = paint_order(root)
+    layers = [item_layers(item) for item in order]
+    for item, paths in zip(order, layers):
+        p.setTransform(item.sceneTransform() * view)
+        for path in paths: p.fillPath(path, one)
+    p.end()
+
+    gray = acc.convertToFormat(QImage.Format_Grayscale8)
+    bpl = gray.bytesPerLine()
+    raw = bytes(gray.constBits())[:gray.sizeInBytes()]
+    heat = QImage(raw, w, h, bpl, QImage.Format_Indexed8)
+    heat.setColorTable(HEAT_TABLE)
+    heat = heat.copy()
+
+    if bpl != w: raw = b"".join(raw[y * bpl:y * bpl + w] for y in range(h))
+    capped = raw.translate(CAP_TABLE)
+    histogram = {n: c for n in range(HIST_CAP + 1) if (c := capped.count(n))}
+    max_layers = max(raw) if HIST_CAP in histogram else max(histogram, default=0)
+
+    # Перекрытие: сверху вниз копим регион непрозрачных фонов и проверяем, остаётся ли что-то видимым
+    occluded, covered = [], QRegion()
+    for item, paths in zip(reversed(order[1:]), reversed(layers[1:])):
+        if not paths: continue
+        to_scene = item.sceneTransform()
+        visible = QRegion(to_scene.mapRect(item.rect()).toAlignedRect())
+        if visible.subtracted(covered).isEmpty(): occluded.append(item)
+        if paints_fill(item.data_model.get('style', {})) and is_opaque(item.data_model.get('style', {})):
+            covered = covered.united(opaque_region(item, to_scene))
+    occluded.reverse()
+    return OverdrawResult(heat, area, histogram, occluded, len(order), max_layers)
@@ -0,0 +1,126 @@
+# profiler.py
+import json
+import math
+import time
+from collections import defaultdict, deque
+
+from items import BaseResizableItem, RootFrameItem, WidgetItem, GradientTextItem
+
+PAINT_FUNCS = ("WidgetItem.paint", "RootFrameItem.paint", "GradientTextItem.paint")
+MAX_TRACE_EVENTS = 200000
+
+def percentile(values, q):
+    if not values: return 0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+# --- ПРОФИЛИРОВЩИК ОТРИСОВКИ ---
+# Выключенный профилировщик ничего не оставляет на классах и элементах:
+# обёртки ставятся только на время записи и снимаются в disable().
+class PaintProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.scene = None
+        self.samples = defaultdict(list)
+        self.meta = {}
+        self.events = deque(maxlen=MAX_TRACE_EVENTS)
+        self.t0 = time.perf_counter_ns()
+        self._class_patches = {}
+        self._patched_items = []
+
+    def owner_of(self, item):
+        while item is not None and not isinstance(item, BaseResizableItem): item = item.parentItem()
+        return item
+
+    def record(self, func, item, start, end):
+        owner = self.owner_of(item)
+        if owner is None: return
+        uid = owner.uid
+        self.samples[(uid, func)].append(end - start)
+        if uid not in self.meta:
+            self.meta[uid] = (owner.data_model.get('name', uid), owner.data_model.get('type', 'rect'))
+        name, type_ = self.meta[uid]
+        self.events.append({"name": func, "cat": type_, "ph": "X", "pid": 1, "tid": 1,
+                            "ts": (start - self.t0) / 1000.0, "dur": (end - start) / 1000.0,
+                            "args": {"uid": uid, "widget": name}})
+
+    def wrap_method(self, func_name, original):
+        prof = self
+        def timed(self, *args, **kwargs):
+            start = time.perf_counter_ns()
+            try: return original(self, *args, **kwargs)
+            finally: prof.record(func_name, self, start, time.perf_counter_ns())
+        timed.__name__ = original.__name__
+        return timed
+
+    def patch_class(self, cls, attr, func_name):
+        original = cls.__dict__[attr]
+        self._class_patches[(cls, attr)] = original
+        setattr(cls, attr, self.wrap_method(func_name, original))
+
+    def patch_paint(self, item):
+        # Qt кэширует виртуальный paint для каждого экземпляра, поэтому подмена
+        # на классе не видна уже отрисованным элементам; ставим атрибут экземпляра.
+        if isinstance(item, RootFrameItem): func_name, original = "RootFrameItem.paint", RootFrameItem.paint
+        elif isinstance(item, WidgetItem): func_name, original = "WidgetItem.paint", WidgetItem.paint
+        elif isinstance(item, GradientTextItem): func_name, original = "GradientTextItem.paint", GradientTextItem.paint
+        else: return
+        if 'paint' in item.__dict__: return
+        timed = self.wrap_method(func_name, original)
+        item.paint = lambda painter, option, widget=None, _item=item: timed(_item, painter, option, widget)
+        self._patched_items.append(item)
+
+    def enable(self, scene):
+        if self.enabled: return
+        self.enabled = True; self.scene = scene
+        self.patch_class(BaseResizableItem, 'draw_styled_shape', "draw_styled_shape")
+        self.patch_class(WidgetItem, 'refresh_content', "refresh_content")
+        original_init = WidgetItem.__init__
+        self._class_patches[(WidgetItem, '__init__')] = original_init
+        prof = self
+        def init(self, *args, **kwargs):
+            original_init(self, *args, **kwargs)
+            prof.patch_paint(self)
+        WidgetItem.__init__ = init
+        # Текстовые прокси создаются лениво — патчим их в момент появления
+        original_proxy = WidgetItem.ensure_text_proxy
+        self._class_patches[(WidgetItem, 'ensure_text_proxy')] = original_proxy
+        def ensure_text_proxy(self):
+            proxy = original_proxy(self)
+            prof.patch_paint(proxy)
+            return proxy
+        WidgetItem.ensure_text_proxy = ensure_text_proxy
+        for item in scene.items(): self.patch_paint(item)
+        scene.update()
+
+    def disable(self):
+        if not self.enabled: return
+        for (cls, attr), original in self._class_patches.items(): setattr(cls, attr, original)
+        self._class_patches.clear()
+        for item in self._patched_items:
+            try: del item.paint
+            except (AttributeError, RuntimeError): pass
+        self._patched_items.clear()
+        self.enabled = False; self.scene = None
+
+    def reset(self):
+        self.samples.clear(); self.meta.clear(); self.events.clear()
+        self.t0 = time.perf_counter_ns()
+
+    def stats(self, group_by="uid"):
+        groups = defaultdict(list)
+        for (uid, func), durations in self.samples.items():
+            name, type_ = self.meta.get(uid, (uid, ""))
+            key = (uid, func) if group_by == "uid" else (type_, func)
+            groups[key].extend(durations)
+        rows = []
+        for (key, func), durations in groups.items():
+            name, type_ = self.meta.get(key, (key, key)) if group_by == "uid" else (key, key)
+            rows.append({"key": key, "name": name, "type": type_, "func": func, "count": len(durations),
+                         "total_ms": sum(durations) / 1e6, "p95_ms": percentile(durations, 0.95) / 1e6})
+        rows.sort(key=lambda r: r['total_ms'], reverse=True)
+        return rows
+
+    def export_chrome_trace(self, filepath):
+        trace = {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+        with open(filepath, 'w', encoding='utf-8') as f: json.dump(trace, f, ensure_ascii=False)
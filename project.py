@@ -0,0 +1,173 @@
+# project.py - Работа с файлами проектов без сцены и QApplication
+import os
+import json
+import copy
+import zipfile
+
+from config import WIDGET_TEMPLATES, APP_VERSION
+
+WGT_HTML = """<!DOCTYPE html><html><body><h1>WGT Export</h1></body></html>"""
+SCHEMA_VERSION = 2   # 2: разреженные виджеты (только отличия от шаблона)
+SECTIONS = ('style', 'content')
+COMPACT = {"separators": (',', ':'), "ensure_ascii": False}
+
+# --- РАЗРЕЖЕННЫЙ ФОРМАТ ---
+# Виджет хранит только id, type и ключи, отличающиеся от WIDGET_TEMPLATES своего типа.
+# Ключи шаблона, которых не было в исходном виджете, перечислены в "unset" — так
+# обратное преобразование в плотный формат точное.
+def same(a, b): return type(a) is type(b) and a == b
+def clone(v): return copy.deepcopy(v) if isinstance(v, (dict, list)) else v
+
+def sparse_widget(w):
+    template = WIDGET_TEMPLATES.get(w.get('type'))
+    if template is None: return copy.deepcopy(w)
+    out, unset = {}, [k for k in template if k not in w]
+    for key, value in w.items():
+        default = template.get(key)
+        if key in SECTIONS and isinstance(value, dict) and isinstance(default, dict):
+            diff = {k: clone(v) for k, v in value.items() if k not in default or not same(default[k], v)}
+            if diff: out[key] = diff
+            unset += [f"{key}.{k}" for k in default if k not in value]
+        elif key in ('id', 'type') or key not in template or not same(default, value): out[key] = clone(value)
+    if unset: out['unset'] = unset
+    return out
+
+# Сборка идёт через dict()/update() поверх шаблона; изменяемые значения по умолчанию
+# (например, overrides компонента) копируются, значения самого виджета переносятся как есть.
+def expand_widget(w):
+    template = WIDGET_TEMPLATES.get(w.get('type'))
+    if template is None: return copy.deepcopy(w)
+    out = dict(template)
+    for key in SECTIONS:
+        if isinstance(out.get(key), dict): out[key] = {k: clone(v) for k, v in out[key].items()}
+    for key in w.get('unset', ()):
+        section, _, name = key.partition('.')
+        if name: out.get(section, {}).pop(name, None)
+        else: out.pop(key, None)
+    for key, value in w.items():
+        if key in SECTIONS and isinstance(value, dict) and isinstance(out.get(key), dict): out[key].update(value)
+        elif key != 'unset': out[key] = value
+    return out
+
+def map_widgets(data, func):
+    out = dict(data)
+    out['widgets'] = [func(w) for w in data.get('widgets', [])]
+    if data.get('components'):
+        out['components'] = {k: dict(d, widgets=[func(w) for w in d.get('widgets', [])]) for k, d in data['components'].items()}
+    return out
+
+def pack_project(data): return dict(map_widgets(data, sparse_widget), schema=SCHEMA_VERSION)
+
+def unpack_project(data):
+    if not isinstance(data, dict) or data.get('schema', 1) < 2: return data
+    out = map_widgets(data, expand_widget)
+    out.pop('schema', None)
+    return out
+
+# --- ЧТЕНИЕ ---
+# extract=False оставляет bg_image путями внутри архива (пакетный WGT -> WGT переносит
+# сами файлы через wgt_files); base задаёт, рядом с каким файлом создаётся <имя>_assets/
+def read_project(path, extract=True, base=None):
+    if path.lower().endswith('.wgt'):
+        with zipfile.ZipFile(path, 'r') as zf:
+            if 'widget.json' not in zf.namelist(): raise ValueError("widget.json not found")
+            data = unpack_project(json.loads(zf.read('widget.json').decode('utf-8')))
+            return extract_assets(zf, base or path, data) if extract else data
+    with open(path, 'r', encoding='utf-8') as f: return unpack_project(json.load(f))
+
+# Файлы архива помимо описания проекта: атласы, запечённые слои
+def wgt_files(path):
+    with zipfile.ZipFile(path, 'r') as zf:
+        return {name: zf.read(name) for name in zf.namelist() if name not in ('widget.json', 'index.html') and not name.endswith('/')}
+
+# Картинки из самого архива (атласы, запечённые слои) распаковываются рядом с ним в
+# <имя>_assets/, и bg_image получает путь на диске: ссылка вида "atlas/atlas_0.png"
+# после импорта иначе указывала бы в никуда
+def extract_assets(zf, path, data):
+    names = set(zf.namelist()) - {'widget.json', 'index.html'}
+    styles = [w.get('style', {}) for w in data.get('widgets', [])] + [data.get('root', {}).get('style', {})]
+    used = {s.get('bg_image') for s in styles if isinstance(s, dict)} & names
+    if not used: return data
+    folder = os.path.splitext(os.path.abspath(path))[0] + "_assets"
+    paths = {}
+    for name in sorted(used):
+        target = os.path.normpath(os.path.join(folder, name))
+        if not target.startswith(folder + os.sep): continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f: f.write(zf.read(name))
+        paths[name] = target
+    for s in styles:
+        if isinstance(s, dict) and s.get('bg_image') in paths: s['bg_image'] = paths[s['bg_image']]
+    return data
+
+# --- ПРОВЕРКА ---
+def validate(data):
+    errors = []
+    if not isinstance(data, dict): return ["корень файла не является объектом"]
+    widgets = data.get('widgets', [])
+    if not isinstance(widgets, list): return ["'widgets' не является списком"]
+    ids = set()
+    for n, w in enumerate(widgets):
+        wid = w.get('id')
+        if not wid: errors.append(f"виджет #{n}: нет id"); continue
+        if wid in ids: errors.append(f"{wid}: повторяющийся id")
+        ids.add(wid)
+        if w.get('type') not in WIDGET_TEMPLATES: errors.append(f"{wid}: неизвестный тип {w.get('type')!r}")
+        for key in ('x', 'y', 'width', 'height'):
+            if not isinstance(w.get(key, 0), (int, float)): errors.append(f"{wid}: {key} не число")
+    for w in widgets:
+        parent = w.get('parent_id', 'root')
+        if parent != 'root' and parent not in ids: errors.append(f"{w.get('id')}: нет родителя {parent!r}")
+    components = data.get('components', {})
+    for w in widgets:
+        if w.get('type') == 'component' and w.get('content', {}).get('component_id') not in components:
+            errors.append(f"{w.get('id')}: нет определения компонента")
+    return errors
+
+# --- МИГРАЦИЯ ---
+# Недостающие ключи дополняются из текущих шаблонов, версия поднимается до APP_VERSION
+def migrate(data):
+    data = copy.deepcopy(data)
+    for w in data.get('widgets', []):
+        template = WIDGET_TEMPLATES.get(w.get('type'))
+        if template is None: continue
+        for key, value in template.items():
+            if isinstance(value, dict):
+                section = w.setdefault(key, {})
+                for k, v in value.items(): section.setdefault(k, copy.deepcopy(v))
+            else: w.setdefault(key, copy.deepcopy(value))
+        w.setdefault('parent_id', 'root'); w.setdefault('z_index', 0)
+    data['version'] = APP_VERSION
+    return data
+
+# --- ЭКСПОРТ ---
+# Тот же порядок, что и обход сцены в ProjectManager: дети после родителя, по возрастанию z
+def ordered_widgets(widgets):
+    children = {}
+    for w in widgets: children.setdefault(w.get('parent_id', 'root'), []).append(w)
+    out = []
+    def walk(parent_id):
+        for w in sorted(children.get(parent_id, []), key=lambda w: w.get('z_index', 0)):
+            out.append(w)
+            if w.get('is_container'): walk(w['id'])
+    walk('root')
+    return out
+
+def product_data(data):
+    out = {"root": data.get('root', {}), "widgets": ordered_widgets(data.get('widgets', []))}
+    if data.get('components'): out['components'] = data['components']
+    return out
+
+# WGT читает внешний рантайм ChronoDash, который ждёт полные словари виджетов:
+# архив всегда плотный (только без отступов), схема 2 — лишь для файлов проекта
+def write_wgt(data, path, files=None):
+    json_str = json.dumps(data, **COMPACT)
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('widget.json', json_str)
+        zf.writestr('index.html', WGT_HTML)
+        for name, payload in (files or {}).items(): zf.writestr(name, payload)
+
+def write_project(data, path, sparse=False):
+    with open(path, 'w', encoding='utf-8') as f:
+        if sparse: json.dump(pack_project(data), f, **COMPACT)
+        else: json.dump(data, f, indent=4, ensure_ascii=False)
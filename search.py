@@ -0,0 +1,152 @@
+# search.py - Поиск виджетов по имени, типу и свойствам
+import re
+import shlex
+from bisect import bisect_left, bisect_right, insort
+
+BULK = 256          # больше грязных элементов — числовые списки пересобираются сортировкой, а не точечно
+SEARCH_CHUNK = 100  # элементов за одну порцию переиндексации в простое
+TERM = re.compile(r'^([\w.]+)(<=|>=|!=|<|>|:|=)(.*)$')
+RANGE = ('<', '<=', '>', '>=')
+
+# --- ЗАПРОС ---
+# Термы через пробел, все должны выполняться: type:text font_family:Arial opacity<0.5.
+# Поля — ключи data_model и его разделов style/content (style.opacity == opacity).
+# key:val* — по префиксу, key!=val — не равно, слово без оператора — подстрока имени.
+# Значения с пробелами берутся в кавычки: name:"Мои часы".
+def parse_query(text):
+    try: tokens = shlex.split(text)
+    except ValueError: raise ValueError("незакрытая кавычка")
+    terms = []
+    for token in tokens:
+        m = TERM.match(token)
+        if m is None: terms.append(('name', '~', token.lower())); continue
+        field, op, value = m.groups()
+        field = field.rsplit('.', 1)[-1]
+        if op == '=': op = ':'
+        if op in RANGE:
+            try: value = float(value)
+            except ValueError: raise ValueError(f"{token}: ожидалось число")
+        terms.append((field, op, value))
+    return terms
+
+def normalize(v):
+    t = type(v)
+    if t is str: return v.lower()
+    if t is bool: return 'true' if v else 'false'
+    if t is int or t is float: return float(v)
+    return None
+
+# Плоский словарь полей: ключи верхнего уровня важнее одноимённых ключей разделов
+def flatten(data):
+    out, sections = {}, []
+    for k, v in data.items():
+        if type(v) is dict: sections.append(v); continue
+        v = normalize(v)
+        if v is not None: out[k] = v
+    for section in sections:
+        for k, v in section.items():
+            if k in out: continue
+            v = normalize(v)
+            if v is not None: out[k] = v
+    return out
+
+# --- ИНДЕКС ---
+# Инвертированные индексы по полям data_model: значение -> множество виджетов и
+# отсортированные списки (число, id) для сравнений. Виджеты помечаются грязными при
+# добавлении на сцену и изменении данных и переиндексируются порциями в простое или
+# перед ближайшим запросом; снятые со сцены удаляются сразу. После массовых изменений
+# числовые списки не правятся точечно, а пересобираются по полю при первом сравнении.
+class SearchIndex:
+    def __init__(self):
+        self.entries = {}    # виджет -> {поле: значение}
+        self.values = {}     # поле -> {значение: {виджеты}}
+        self.numbers = {}    # поле -> [(число, id виджета)]
+        self.partial = False # True: отсутствующие в numbers поля строятся при запросе
+        self.by_id = {}
+        self.seq = {}        # виджет -> порядковый номер (стабильный порядок результатов)
+        self.counter = 0
+        self.dirty = {}
+
+    def touch(self, item): self.dirty[item] = True
+
+    def remove(self, item):
+        self.dirty.pop(item, None)
+        self.drop(item)
+        self.seq.pop(item, None); self.by_id.pop(id(item), None)
+
+    def drop(self, item):
+        entry = self.entries.pop(item, None)
+        if entry is None: return
+        for field, value in entry.items():
+            bucket = self.values[field][value]
+            bucket.discard(item)
+            if not bucket: del self.values[field][value]
+            numbers = self.numbers.get(field) if type(value) is float else None
+            if numbers is not None:
+                i = bisect_left(numbers, (value, id(item)))
+                if i < len(numbers) and numbers[i] == (value, id(item)): del numbers[i]
+
+    def insert(self, item):
+        entry = self.entries[item] = flatten(item.data_model)
+        values = self.values
+        for field, value in entry.items():
+            by_value = values.get(field)
+            if by_value is None: by_value = values[field] = {}
+            bucket = by_value.get(value)
+            if bucket is None: by_value[value] = {item}
+            else: bucket.add(item)
+            if type(value) is not float: continue
+            numbers = self.numbers.get(field)
+            if numbers is None and not self.partial: numbers = self.numbers[field] = []
+            if numbers is not None: insort(numbers, (value, id(item)))
+        if item not in self.seq:
+            self.counter += 1; self.seq[item] = self.counter; self.by_id[id(item)] = item
+
+    def flush(self, limit=None):
+        if not self.dirty: return
+        if len(self.dirty) > BULK: self.numbers, self.partial = {}, True
+        items = list(self.dirty)[:limit]
+        for item in items: del self.dirty[item]
+        for item in items:
+            self.drop(item)
+            try: alive = item.scene() is not None
+            except RuntimeError: alive = False
+            if alive: self.insert(item)
+            else: self.seq.pop(item, None); self.by_id.pop(id(item), None)
+
+    def numbers_for(self, field):
+        numbers = self.numbers.get(field)
+        if numbers is None:
+            if not self.partial: return []
+            numbers = self.numbers[field] = sorted((e[field], id(i)) for i, e in self.entries.items() if type(e.get(field)) is float)
+        return numbers
+
+    def match(self, field, op, value):
+        values = self.values.get(field, {})
+        if op == '~': return {i for name, items in values.items() if value in name for i in items}
+        if op in RANGE:
+            numbers = self.numbers_for(field)
+            if op == '<': part = numbers[:bisect_left(numbers, (value,))]
+            elif op == '<=': part = numbers[:bisect_right(numbers, (value, float('inf')))]
+            elif op == '>': part = numbers[bisect_right(numbers, (value, float('inf'))):]
+            else: part = numbers[bisect_left(numbers, (value,)):]
+            return {self.by_id[key] for _, key in part}
+        if value.endswith('*'):
+            prefix = value[:-1].lower()
+            found = {i for v, items in values.items() if isinstance(v, str) and v.startswith(prefix) for i in items}
+        else:
+            found = set(values.get(value.lower(), ()))
+            try: found |= values.get(float(value), set())
+            except ValueError: pass
+        if op == '!=': return {i for items in values.values() for i in items} - found
+        return found
+
+    # Виджеты, удовлетворяющие всем термам, в порядке добавления в индекс
+    def query(self, text):
+        self.flush()
+        result = None
+        for field, op, value in parse_query(text):
+            found = self.match(field, op, value)
+            result = found if result is None else result & found
+            if not result: return []
+        return sorted(result, key=self.seq.get) if result else []
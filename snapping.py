@@ -0,0 +1,121 @@
+# snapping.py
+from bisect import bisect_left, insort
+from PySide6.QtCore import QLineF, QPointF
+
+SNAP_DISTANCE = 6
+
+# --- ИНДЕКС КРАЁВ ---
+# Для каждого контейнера хранятся отсортированные списки (координата, uid элемента)
+# по осям X и Y: левый край, центр и правый край каждого дочернего виджета.
+# Поиск ближайшего края — бинарный, обновление при перемещении — точечное.
+class EdgeIndex:
+    def __init__(self):
+        self.xs = []; self.ys = []
+        self.edges = {}
+
+    @staticmethod
+    def item_edges(item):
+        x, y = item.x(), item.y()
+        w, h = item.rect().width(), item.rect().height()
+        return (x, x + w / 2, x + w), (y, y + h / 2, y + h)
+
+    def add(self, item):
+        key = item.uid
+        ex, ey = self.item_edges(item)
+        self.edges[key] = (ex, ey)
+        for v in ex: insort(self.xs, (v, key))
+        for v in ey: insort(self.ys, (v, key))
+
+    def remove(self, item):
+        key = item.uid
+        old = self.edges.pop(key, None)
+        if old is None: return
+        for values, axis in ((old[0], self.xs), (old[1], self.ys)):
+            for v in values:
+                i = bisect_left(axis, (v, key))
+                if i < len(axis) and axis[i] == (v, key): del axis[i]
+
+    def move(self, item):
+        if item.uid not in self.edges: return
+        if self.edges[item.uid] == self.item_edges(item): return
+        self.remove(item); self.add(item)
+
+    # Бинарный поиск позиции и обход только краёв в пределах limit
+    @staticmethod
+    def nearest(axis, value, exclude, limit):
+        i = bisect_left(axis, (value - limit, ""))
+        best = None
+        while i < len(axis) and axis[i][0] <= value + limit:
+            if axis[i][1] != exclude:
+                d = axis[i][0] - value
+                if best is None or abs(d) < abs(best): best = d
+            i += 1
+        return best
+
+    # Лучшее смещение (delta, координата края) для любой из точек values
+    def snap(self, axis_name, values, exclude, limit):
+        axis = self.xs if axis_name == 'x' else self.ys
+        best = None
+        for v in values:
+            d = self.nearest(axis, v, exclude, limit)
+            if d is not None and (best is None or abs(d) < abs(best[0])): best = (d, v + d)
+        return best
+
+class SnapIndex:
+    def __init__(self):
+        self.containers = {}
+
+    def for_container(self, container):
+        index = self.containers.get(container.uid)
+        if index is None:
+            index = EdgeIndex()
+            for child in container.childItems():
+                if hasattr(child, 'uid') and child.isVisible(): index.add(child)
+            self.containers[container.uid] = index
+        return index
+
+    def item_moved(self, item):
+        parent = item.parentItem()
+        index = self.containers.get(getattr(parent, 'uid', None))
+        if index is not None: index.move(item)
+
+    def container_changed(self, container): self.containers.pop(getattr(container, 'uid', None), None)
+    def clear(self): self.containers.clear()
+
+# --- ПРИВЯЗКА ---
+def snap_grid(values, offset, grid_size, limit):
+    best = None
+    for v in values:
+        d = round((v + offset) / grid_size) * grid_size - offset - v
+        if abs(d) <= limit and (best is None or abs(d) < abs(best[0])): best = (d, v + d)
+    return best
+
+# Привязка точек values_x/values_y (в координатах родителя) к краям соседей и сетке.
+# Возвращает (dx, dy, направляющие в координатах сцены).
+def snap_points(item, values_x, values_y, grid_size=0, to_objects=True, limit=SNAP_DISTANCE):
+    parent = item.parentItem()
+    if parent is None or item.scene() is None: return 0, 0, []
+    sx = sy = None
+    if to_objects and hasattr(item.scene(), 'snap_index'):
+        index = item.scene().snap_index.for_container(parent)
+        sx = index.snap('x', values_x, item.uid, limit)
+        sy = index.snap('y', values_y, item.uid, limit)
+    if grid_size:
+        origin = parent.scenePos()
+        if sx is None: sx = snap_grid(values_x, origin.x(), grid_size, limit)
+        if sy is None: sy = snap_grid(values_y, origin.y(), grid_size, limit)
+    p_rect = parent.rect() if hasattr(parent, 'rect') else parent.boundingRect()
+    lines = []
+    if sx: lines.append(QLineF(parent.mapToScene(QPointF(sx[1], 0)), parent.mapToScene(QPointF(sx[1], p_rect.height()))))
+    if sy: lines.append(QLineF(parent.mapToScene(QPointF(0, sy[1])), parent.mapToScene(QPointF(p_rect.width(), sy[1]))))
+    return (sx[0] if sx else 0), (sy[0] if sy else 0), lines
+
+def snap_position(item, pos, **kw):
+    x, y = pos.x(), pos.y()
+    w, h = item.rect().width(), item.rect().height()
+    dx, dy, lines = snap_points(item, (x, x + w / 2, x + w), (y, y + h / 2, y + h), **kw)
+    return QPointF(x + dx, y + dy), lines
+
+def snap_size(item, w, h, **kw):
+    dx, dy, lines = snap_points(item, (item.x() + w,), (item.y() + h,), **kw)
+    return w + dx, h + dy, lines
@@ -0,0 +1,135 @@
+# stalls.py - Сторожевой поток: зависания GUI-потока со стеком
+import os
+import sys
+import json
+import time
+import threading
+from collections import deque
+from PySide6.QtCore import QObject, QStandardPaths, Signal
+
+THRESHOLD_MS = 50
+INTERVAL = 0.02        # пауза между пингами, с
+LOG_SIZE = 200         # записей в журнале; файл переписывается, когда вырастает вдвое
+STACK_DEPTH = 40
+BUCKETS_MS = (50, 100, 250, 500, 1000, 5000)
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Известные тяжёлые операции; операцией записи считается самая внешняя из них
+# (загрузка, а не refresh_content внутри неё), а если ни одной нет в стеке — внешний
+# обработчик приложения. Самая вложенная своя функция пишется отдельно в «where».
+OPERATIONS = ("ProjectManager.load_project_data", "ProjectManager.save_project", "ProjectManager.export_product_wgt",
+              "ProjectManager.import_wgt", "ProjectLoader.step", "HierarchyTree.refresh", "PropertiesPanel.set_item",
+              "TileCache.render", "TileCache.paint_items", "BaseResizableItem.draw_styled_shape",
+              "WidgetItem.refresh_content", "bake", "analyze", "estimate", "report")
+
+def log_path():
+    return os.path.join(QStandardPaths.writableLocation(QStandardPaths.GenericDataLocation), "ChronoBuilder", "stalls.jsonl")
+
+def read_log(path=None):
+    path = path or log_path()
+    if not os.path.exists(path): return []
+    with open(path, 'r', encoding='utf-8') as f: lines = f.readlines()[-LOG_SIZE:]
+    out = []
+    for line in lines:
+        try: out.append(json.loads(line))
+        except ValueError: pass
+    return out
+
+def clear_log(path=None):
+    path = path or log_path()
+    if os.path.exists(path): os.remove(path)
+    if _watchdog is not None and _watchdog.path == path: _watchdog.entries.clear(); _watchdog.lines = 0
+
+# Число зависаний по корзинам длительности: «50» — от 50 до 100 мс и т.д.
+def histogram(entries):
+    counts = dict.fromkeys(BUCKETS_MS, 0)
+    for e in entries:
+        bucket = max((b for b in BUCKETS_MS if e['ms'] >= b), default=None)
+        if bucket is not None: counts[bucket] += 1
+    return counts
+
+# Стек снаружи внутрь: (файл, строка, функция, свой ли модуль)
+def frame_stack(frame):
+    out = []
+    while frame is not None and len(out) < STACK_DEPTH:
+        code = frame.f_code
+        out.append((code.co_filename, frame.f_lineno, getattr(code, 'co_qualname', code.co_name)))
+        frame = frame.f_back
+    return [(os.path.basename(f), line, name, f.startswith(APP_DIR)) for f, line, name in reversed(out)]
+
+def operation_of(stack):
+    own = [name for _, _, name, mine in stack if mine and name != '<module>']
+    known = [name for name in own if name in OPERATIONS]
+    return known[0] if known else (own[0] if own else ""), own[-1] if own else ""
+
+# --- СТОРОЖЕВОЙ ПОТОК ---
+# Поток шлёт пинг в цикл событий и ждёт ответа. Не дождавшись за порог, он снимает
+# стек GUI-потока через sys._current_frames(), пока тот ещё занят, и после ответа
+# пишет длительность, операцию и стек в журнал. Если GUI-поток держит GIL внутри
+# Qt, стек снимается с опозданием, но длительность по ответу остаётся точной.
+class StallWatchdog(QObject):
+    ping = Signal()
+
+    def __init__(self, threshold_ms=THRESHOLD_MS, path=None):
+        super().__init__()
+        self.threshold = threshold_ms / 1000
+        self.path = path or log_path()
+        self.entries = deque(read_log(self.path), maxlen=LOG_SIZE)
+        self.lines = len(self.entries)
+        self.gui_ident = threading.get_ident()
+        self.answer = threading.Event()
+        self.replied = 0.0
+        self.running = False
+        self.generation = 0   # перезапуск не оставляет второй поток от прежнего запуска
+        self.ping.connect(self.pong)
+
+    def set_threshold(self, ms): self.threshold = ms / 1000
+
+    def start(self):
+        if self.running: return
+        self.running = True; self.generation += 1
+        threading.Thread(target=self.run, args=(self.generation,), daemon=True).start()
+
+    def stop(self): self.running = False
+
+    def pong(self):
+        self.replied = time.monotonic()
+        self.answer.set()
+
+    def alive(self, generation): return self.running and self.generation == generation
+
+    def run(self, generation):
+        while self.alive(generation):
+            self.answer.clear()
+            sent = time.monotonic()
+            self.ping.emit()
+            if not self.answer.wait(self.threshold):
+                frame = sys._current_frames().get(self.gui_ident)
+                stack = frame_stack(frame); del frame
+                while self.alive(generation) and not self.answer.wait(0.25): pass
+                if not self.alive(generation): return
+                self.record(self.replied - sent, stack)
+            time.sleep(INTERVAL)
+
+    def record(self, duration, stack):
+        operation, where = operation_of(stack)
+        entry = {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "ms": round(duration * 1000, 1), "operation": operation,
+                 "where": where, "stack": [f"{f}:{line} {name}" for f, line, name, _ in stack]}
+        self.entries.append(entry)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if self.lines >= 2 * LOG_SIZE:
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    for e in self.entries: f.write(json.dumps(e, ensure_ascii=False) + "\n")
+                self.lines = len(self.entries)
+            else:
+                with open(self.path, 'a', encoding='utf-8') as f: f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                self.lines += 1
+        except OSError: pass
+
+_watchdog = None
+
+def stall_watchdog():
+    global _watchdog
+    if _watchdog is None: _watchdog = StallWatchdog()
+    return _watchdog
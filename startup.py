@@ -0,0 +1,75 @@
+# startup.py - Профилирование холодного старта (--profile-startup) и трассировка памяти (--trace-memory)
+# Модуль не зависит от Qt: он подключается первым, чтобы учесть время импортов.
+import sys
+import json
+import time
+import builtins
+
+PROFILER = None
+
+class StartupProfiler:
+    def __init__(self, out_path=None):
+        self.t0 = time.perf_counter()
+        self.last = self.t0
+        self.out_path = out_path
+        self.phases = []
+        self.imports = []
+        self.depth = 0
+        self.finished = False
+        self.original_import = builtins.__import__
+
+    def install_import_hook(self):
+        prof = self
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules: return prof.original_import(name, globals, locals, fromlist, level)
+            prof.depth += 1
+            t = time.perf_counter()
+            try: return prof.original_import(name, globals, locals, fromlist, level)
+            finally:
+                prof.depth -= 1
+                prof.imports.append((prof.depth, name, time.perf_counter() - t))
+        builtins.__import__ = timed_import
+
+    def remove_import_hook(self): builtins.__import__ = self.original_import
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last, now - self.t0))
+        self.last = now
+
+    def report_data(self):
+        return {"total_ms": round((self.last - self.t0) * 1000, 2),
+                "phases": [{"phase": p, "ms": round(dt * 1000, 2), "at_ms": round(at * 1000, 2)} for p, dt, at in self.phases],
+                "imports": [{"module": n, "ms": round(dt * 1000, 2), "depth": d} for d, n, dt in self.imports]}
+
+    def finish(self):
+        if self.finished: return
+        self.finished = True
+        self.remove_import_hook()
+        data = self.report_data()
+        out = sys.stderr
+        print(f"\n=== Startup: {data['total_ms']:.1f} ms до первой отрисовки ===", file=out)
+        for p in data['phases']: print(f"  {p['phase']:<32}{p['ms']:>9.1f} ms  (t={p['at_ms']:.1f})", file=out)
+        top = sorted((i for i in data['imports'] if i['depth'] == 0), key=lambda i: i['ms'], reverse=True)[:15]
+        print("  --- импорты верхнего уровня ---", file=out)
+        for i in top: print(f"  {i['module']:<32}{i['ms']:>9.1f} ms", file=out)
+        if self.out_path:
+            with open(self.out_path, 'w', encoding='utf-8') as f: json.dump(data, f, indent=4, ensure_ascii=False)
+
+def enable(argv):
+    global PROFILER
+    for arg in list(argv):
+        if arg == "--profile-startup" or arg.startswith("--profile-startup="):
+            argv.remove(arg)
+            PROFILER = StartupProfiler(arg.partition("=")[2] or None)
+            PROFILER.install_import_hook()
+        elif arg == "--trace-memory":   # отчёт о памяти учитывает только выделения после старта трассировки
+            argv.remove(arg)
+            import tracemalloc; tracemalloc.start()
+    return PROFILER
+
+def mark(phase):
+    if PROFILER: PROFILER.mark(phase)
+
+def finish():
+    if PROFILER: PROFILER.finish()
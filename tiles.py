@@ -0,0 +1,220 @@
+# tiles.py
+import math
+from collections import OrderedDict
+from PySide6.QtCore import Qt, QRect, QRectF, QTimer, QElapsedTimer
+from PySide6.QtGui import QPixmap, QPainter, QRegion, QTransform
+from PySide6.QtWidgets import QStyleOptionGraphicsItem
+
+TILE = 256             # сторона тайла в пикселях вида
+MAX_TILES = 384        # ~96 МБ при DPR 1
+IDLE_BUDGET_MS = 8
+PREFETCH = 1           # кольцо тайлов вокруг видимой области, дозаполняемое в простое
+
+# --- ТАЙЛОВЫЙ КЭШ ВИДА ---
+# Содержимое сцены рендерится в тайлы фиксированного размера отдельно для каждого
+# масштаба. Сетка тайлов привязана к началу сцены, поэтому при панорамировании тайлы
+# только копируются. Изменения сцены (scene.changed) сбрасывают лишь пересечённые тайлы;
+# недостающие дорисовываются в простое, а до этого берутся из другого масштаба или
+# рисуются обычным путём. Выделенные элементы, направляющие и рамка выделения всегда
+# рисуются вживую поверх кэша.
+#
+# Во время потоковой загрузки проекта (hold) сцена меняется каждые несколько миллисекунд:
+# тайлы не сбрасываются, новые элементы дорисовываются поверх них (paint_items), а по
+# окончании загрузки весь кэш помечается устаревшим и перерисовывается в простое.
+class TileCache:
+    def __init__(self, view):
+        self.view = view
+        self.tiles = OrderedDict()   # (масштаб, i, j) -> QPixmap
+        self.queue = OrderedDict()
+        self.stale = {}              # ключ -> тайл, показываемый до перерисовки
+        self.hold = False
+        self.current = self.previous = None   # масштабы: текущий и предыдущий (для превью)
+        self.timer = QTimer(view); self.timer.setInterval(0)
+        self.timer.timeout.connect(self.fill_idle)
+        view.scene().changed.connect(self.invalidate)
+
+    def level(self): return round(self.view.transform().m11(), 4)
+    def offset(self):
+        t = self.view.viewportTransform()
+        return round(t.dx()), round(t.dy())
+
+    def usable(self):
+        t = self.view.transform()
+        return t.m12() == 0 and t.m21() == 0 and t.m11() == t.m22() and t.m11() > 0
+
+    def scene_rect(self, level, i, j):
+        side = TILE / level
+        return QRectF(i * side, j * side, side, side)
+
+    def tile_range(self, rect, dx, dy):
+        return (range(math.floor((rect.left() - dx) / TILE), math.floor((rect.right() - dx) / TILE) + 1),
+                range(math.floor((rect.top() - dy) / TILE), math.floor((rect.bottom() - dy) / TILE) + 1))
+
+    def clear(self):
+        self.tiles.clear(); self.queue.clear(); self.stale.clear(); self.timer.stop()
+
+    # keep=False (отмена загрузки): содержимое тайлов неверно, устаревшими их не показываем
+    def set_hold(self, on, keep=True):
+        self.hold = on
+        if on or not keep: self.clear()
+        else: self.stale.update(self.tiles); self.tiles.clear()
+        self.view.viewport().update()
+
+    def invalidate(self, rects):
+        if self.hold or not (self.tiles or self.stale): return
+        scene_rect = self.view.scene().sceneRect()
+        if any(r.contains(scene_rect) for r in rects): self.tiles.clear(); self.stale.clear(); return
+        for cache in (self.tiles, self.stale):
+            for key in [k for k in cache if any(self.scene_rect(*k).intersects(r) for r in rects)]: del cache[key]
+
+    # Области, которые не берутся из кэша: выделенные элементы, направляющие, рамка выделения
+    def live_region(self):
+        view, scene = self.view, self.view.scene()
+        region = QRegion()
+        for item in getattr(scene, 'selection', {}):
+            region += view.mapFromScene(item.dirty_rect()).boundingRect().adjusted(-2, -2, 2, 2)
+        for line in getattr(scene, 'guides', []):
+            region += view.mapFromScene(QRectF(line.p1(), line.p2()).normalized()).boundingRect().adjusted(-2, -2, 2, 2)
+        band = view.rubberBandRect()
+        if not band.isNull(): region += band.adjusted(-2, -2, 2, 2)
+        return region
+
+    # Раскладка области region: готовые тайлы, превью из другого масштаба и область,
+    # которую придётся рисовать обычным путём
+    def plan(self, region, live):
+        level = self.level(); dx, dy = self.offset()
+        if level != self.current: self.previous, self.current = self.current, level
+        blits, need = [], QRegion()
+        cols, rows = self.tile_range(region.boundingRect(), dx, dy)
+        for j in rows:
+            for i in cols:
+                rect = QRect(i * TILE + dx, j * TILE + dy, TILE, TILE)
+                if not region.intersects(rect) or live.intersected(rect) == QRegion(rect): continue
+                key = (level, i, j)
+                pixmap = self.tiles.get(key)
+                if pixmap is not None:
+                    self.tiles.move_to_end(key)
+                    blits.append((QRectF(rect), pixmap, QRectF(pixmap.rect())))
+                    continue
+                self.request(key)
+                pixmap = self.stale.get(key)
+                if pixmap is not None:
+                    blits.append((QRectF(rect), pixmap, QRectF(pixmap.rect()))); continue
+                preview = self.preview(level, i, j, dx, dy)
+                if preview is None: need += rect
+                else: blits.extend(preview)
+        return blits, need.intersected(region)
+
+    # QGraphicsView заливает фон по всему описывающему прямоугольнику своей области,
+    # поэтому кэш рисуется после него и с отсечением
+    def paint(self, blits, clip):
+        if clip.isEmpty(): return
+        painter = QPainter(self.view.viewport())
+        painter.setClipRegion(clip)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        for target, pixmap, source in blits: painter.drawPixmap(target, pixmap, source)
+        painter.end()
+
+    # Пока тайлов текущего масштаба нет, показываем растянутые тайлы предыдущего
+    def preview(self, level, i, j, dx, dy):
+        other = self.previous
+        if other is None or other == level: return None
+        area = self.scene_rect(level, i, j)
+        side = TILE / other
+        cell = QRectF(i * TILE + dx, j * TILE + dy, TILE, TILE)
+        parts = []
+        for oj in range(math.floor(area.top() / side), math.floor((area.bottom() - 1e-6) / side) + 1):
+            for oi in range(math.floor(area.left() / side), math.floor((area.right() - 1e-6) / side) + 1):
+                pixmap = self.tiles.get((other, oi, oj))
+                if pixmap is None: return None
+                src = self.scene_rect(other, oi, oj)
+                target = QRectF(src.left() * level + dx, src.top() * level + dy, src.width() * level, src.height() * level)
+                visible = target.intersected(cell)
+                scale = pixmap.width() / target.width()
+                source = QRectF((visible.left() - target.left()) * scale, (visible.top() - target.top()) * scale,
+                                visible.width() * scale, visible.height() * scale)
+                parts.append((visible, pixmap, source))
+        return parts
+
+    def request(self, key):
+        if key in self.queue: return
+        self.queue[key] = True
+        if not self.timer.isActive(): self.timer.start()
+
+    # scene.render() в Qt 6 обходит всех потомков корневого фрейма без отсечения,
+    # поэтому тайл рисует только элементы, которые индекс сцены вернул для его области
+    def render(self, key):
+        level, i, j = key
+        view, scene = self.view, self.view.scene()
+        area = self.scene_rect(level, i, j)
+        dpr = view.viewport().devicePixelRatioF()
+        pixmap = QPixmap(round(TILE * dpr), round(TILE * dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        p = QPainter(pixmap)
+        p.setRenderHints(view.renderHints())
+        to_tile = QTransform().scale(level, level).translate(-area.left(), -area.top())
+        scene.rendering_tiles = True
+        try:
+            p.setTransform(to_tile)
+            scene.drawBackground(p, area)
+            self.draw(p, scene.items(area, Qt.IntersectsItemBoundingRect, Qt.AscendingOrder), area, to_tile)
+            scene.drawForeground(p, area)
+        finally: scene.rendering_tiles = False
+        p.end()
+        return pixmap
+
+    def draw(self, p, items, area, to_tile):
+        option = QStyleOptionGraphicsItem()
+        for item in items:
+            if not item.isVisible(): continue
+            p.save()
+            p.setTransform(item.sceneTransform() * to_tile)
+            p.setOpacity(item.effectiveOpacity())
+            option.exposedRect = item.mapRectFromScene(area).intersected(item.boundingRect())
+            item.paint(p, option, None)
+            p.restore()
+
+    # Дорисовка только что созданных элементов (со служебными детьми вроде текстового
+    # прокси) поверх готовых тайлов без запроса к индексу сцены
+    def paint_items(self, items):
+        if not self.tiles: return
+        level = self.level(); dx, dy = self.offset()
+        side = TILE / level
+        groups = {}
+        for item in items:
+            parts = [item] + [c for c in item.childItems() if not hasattr(c, 'data_model')]
+            rect = item.sceneBoundingRect()
+            for part in parts[1:]: rect = rect.united(part.sceneBoundingRect())
+            for j in range(math.floor(rect.top() / side), math.floor(rect.bottom() / side) + 1):
+                for i in range(math.floor(rect.left() / side), math.floor(rect.right() / side) + 1):
+                    if (level, i, j) in self.tiles: groups.setdefault((level, i, j), []).extend(parts)
+        scene = self.view.scene()
+        scene.rendering_tiles = True
+        try:
+            for key, parts in groups.items():
+                area = self.scene_rect(*key)
+                p = QPainter(self.tiles[key])
+                p.setRenderHints(self.view.renderHints())
+                self.draw(p, parts, area, QTransform().scale(level, level).translate(-area.left(), -area.top()))
+                p.end()
+                self.view.viewport().update(QRect(key[1] * TILE + dx, key[2] * TILE + dy, TILE, TILE))
+        finally: scene.rendering_tiles = False
+
+    # Дозаполнение в простое: сначала запрошенные тайлы, затем кольцо вокруг видимой области
+    def fill_idle(self):
+        level = self.level(); dx, dy = self.offset()
+        clock = QElapsedTimer(); clock.start()
+        while self.queue and clock.elapsed() < IDLE_BUDGET_MS:
+            key, _ = self.queue.popitem(last=False)
+            if key[0] != level or key in self.tiles: continue
+            self.tiles[key] = self.render(key)
+            self.stale.pop(key, None)
+            while len(self.tiles) > MAX_TILES: self.tiles.popitem(last=False)
+            self.view.viewport().update(QRect(key[1] * TILE + dx, key[2] * TILE + dy, TILE, TILE))
+        if self.queue: return
+        self.timer.stop()
+        if self.hold: return
+        cols, rows = self.tile_range(QRectF(self.view.viewport().rect()), dx, dy)
+        for j in range(rows.start - PREFETCH, rows.stop + PREFETCH):
+            for i in range(cols.start - PREFETCH, cols.stop + PREFETCH):
+                if (level, i, j) not in self.tiles and len(self.tiles) + len(self.queue) < MAX_TILES: self.request((level, i, j))
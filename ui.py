@@ -3,19 +3,25 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QGridLayout, QLineEdit, QSp
                                QPushButton, QColorDialog, QGroupBox, QGraphicsView, 
                                QMenu, QMessageBox, QTreeWidget, QTreeWidgetItem, QLabel,
                                QAbstractItemView, QFileDialog, QCheckBox, QDoubleSpinBox,
-                               QHBoxLayout, QDialog, QFormLayout, QFrame, QComboBox, QFontComboBox,
-                               QScrollArea)
-from PySide6.QtCore import Qt, Signal, QEvent, QStandardPaths, QSettings
-from PySide6.QtGui import QAction, QPainter, QMouseEvent
+                               QHBoxLayout, QDialog, QFormLayout, QFrame, QComboBox,
+                               QScrollArea, QTableWidget, QTableWidgetItem, QHeaderView, QListWidget, QListWidgetItem,
+                               QPlainTextEdit)
+import copy
+import json
+import time
+from PySide6.QtCore import Qt, Signal, QEvent, QStandardPaths, QSettings, QTimer, QRectF
+from PySide6.QtGui import QAction, QPainter, QMouseEvent, QPaintEvent, QColor, QPen, QRegion
 
 from items import RootFrameItem, WidgetItem, BaseResizableItem, BgImageGizmo
-from config import APP_VERSION, APP_NAME, THEMES
+from config import APP_VERSION, APP_NAME, THEMES, LOD_DEFAULTS, CANVAS_DEFAULT, SCREENS_DEFAULT, parse_screens, load_lod_tiers, BUDGET_DEFAULTS, load_budgets, set_setting
+from fonts import FontPicker
+from components import OVERRIDE_KEYS
 
 class SettingsDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Настройки")
-        self.setFixedSize(450, 450)
+        self.setFixedSize(450, 860)
         self.settings = QSettings("Overl1te", "ChronoBuilder")
         layout = QVBoxLayout(self)
         
@@ -41,6 +47,15 @@ class SettingsDialog(QDialog):
         self.cb_kbd = QCheckBox("Клавиатурное управление")
         self.cb_kbd.setChecked(self.settings.value("kbd_control", False, type=bool))
         form.addRow(self.cb_kbd)
+        self.cb_snap_grid = QCheckBox("Привязка к сетке")
+        self.cb_snap_grid.setChecked(self.settings.value("snap_to_grid", True, type=bool))
+        form.addRow(self.cb_snap_grid)
+        self.cb_snap_obj = QCheckBox("Привязка к соседним объектам")
+        self.cb_snap_obj.setChecked(self.settings.value("snap_to_objects", True, type=bool))
+        form.addRow(self.cb_snap_obj)
+        self.cb_sparse = QCheckBox("Компактные файлы (только отличия от шаблонов)")
+        self.cb_sparse.setChecked(self.settings.value("sparse_files", False, type=bool))
+        form.addRow(self.cb_sparse)
         layout.addWidget(group_gen)
 
         group_theme = QGroupBox("Внешний вид")
@@ -51,6 +66,50 @@ class SettingsDialog(QDialog):
         self.combo_theme.setCurrentText(curr)
         form_t.addRow("Тема редактора:", self.combo_theme)
         layout.addWidget(group_theme)
+
+        group_lod = QGroupBox("Детализация при отдалении")
+        form_lod = QFormLayout(group_lod)
+        self.lod_spins = {}
+        for key, label in (("lod_text", "Текст плашками ниже:"), ("lod_gradient", "Градиенты заливкой ниже:"),
+                           ("lod_image", "Уменьшенные картинки ниже:")):
+            sb = QDoubleSpinBox()
+            sb.setRange(0.0, 2.0); sb.setSingleStep(0.05); sb.setSuffix("×")
+            sb.setValue(self.settings.value(key, LOD_DEFAULTS[key], type=float))
+            form_lod.addRow(label, sb)
+            self.lod_spins[key] = sb
+        layout.addWidget(group_lod)
+
+        group_canvas = QGroupBox("Холст")
+        form_c = QFormLayout(group_canvas)
+        self.screens_edit = QLineEdit(self.settings.value("screens", SCREENS_DEFAULT, type=str))
+        self.screens_edit.setPlaceholderText("3840x2160, 3840x2160, 3840x2160")
+        form_c.addRow("Экраны:", self.screens_edit)
+        self.canvas_spins = []
+        for key, default in zip(("canvas_width", "canvas_height"), CANVAS_DEFAULT):
+            sb = QSpinBox()
+            sb.setRange(500, 50000); sb.setSingleStep(100); sb.setSuffix(" px")
+            sb.setValue(self.settings.value(key, default, type=int))
+            self.canvas_spins.append((key, sb))
+        form_c.addRow("Ширина холста:", self.canvas_spins[0][1])
+        form_c.addRow("Высота холста:", self.canvas_spins[1][1])
+        self.cb_tiles = QCheckBox("Кэшировать холст тайлами")
+        self.cb_tiles.setChecked(self.settings.value("tile_cache", True, type=bool))
+        form_c.addRow(self.cb_tiles)
+        layout.addWidget(group_canvas)
+
+        group_diag = QGroupBox("Диагностика")
+        form_d = QFormLayout(group_diag)
+        self.cb_watchdog = QCheckBox("Записывать зависания интерфейса")
+        self.cb_watchdog.setChecked(self.settings.value("stall_watchdog", False, type=bool))
+        form_d.addRow(self.cb_watchdog)
+        self.sb_stall = QSpinBox()
+        self.sb_stall.setRange(16, 5000); self.sb_stall.setSuffix(" мс")
+        self.sb_stall.setValue(self.settings.value("stall_threshold_ms", 50, type=int))
+        btn_log = QPushButton("Журнал...")
+        btn_log.clicked.connect(lambda: StallLogDialog(self).exec())
+        h_stall = QHBoxLayout(); h_stall.addWidget(self.sb_stall); h_stall.addWidget(btn_log)
+        form_d.addRow("Порог:", h_stall)
+        layout.addWidget(group_diag)
         
         layout.addStretch()
         line = QFrame()
@@ -75,13 +134,76 @@ class SettingsDialog(QDialog):
         d = QFileDialog.getExistingDirectory(self, "Выбрать папку", self.path_edit.text())
         if d: self.path_edit.setText(d)
     def save_settings(self):
+        try: parse_screens(self.screens_edit.text())
+        except ValueError:
+            QMessageBox.warning(self, "Настройки", "Экраны задаются как 1920x1080 или 1920x1080+0+0 через запятую.")
+            return
+        self.settings.setValue("screens", self.screens_edit.text().strip())
+        for key, sb in self.canvas_spins: self.settings.setValue(key, sb.value())
+        self.settings.setValue("tile_cache", self.cb_tiles.isChecked())
+        self.settings.setValue("stall_watchdog", self.cb_watchdog.isChecked())
+        self.settings.setValue("stall_threshold_ms", self.sb_stall.value())
         self.settings.setValue("default_dir", self.path_edit.text())
         self.settings.setValue("autosave", self.cb_autosave.isChecked())
         self.settings.setValue("show_grid", self.cb_grid.isChecked())
         self.settings.setValue("kbd_control", self.cb_kbd.isChecked())
+        self.settings.setValue("snap_to_grid", self.cb_snap_grid.isChecked())
+        self.settings.setValue("snap_to_objects", self.cb_snap_obj.isChecked())
+        self.settings.setValue("sparse_files", self.cb_sparse.isChecked())
         self.settings.setValue("theme", self.combo_theme.currentText())
+        for key, sb in self.lod_spins.items(): self.settings.setValue(key, sb.value())
+        load_lod_tiers()
         self.accept()
 
+# Журнал сторожевого потока: гистограмма длительностей и записи со стеком GUI-потока
+class StallLogDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        from stalls import read_log, histogram, BUCKETS_MS
+        self.setWindowTitle("Зависания интерфейса")
+        self.resize(720, 560)
+        self.entries = list(reversed(read_log()))
+        layout = QVBoxLayout(self)
+
+        counts = histogram(self.entries)
+        peak = max(counts.values()) or 1
+        bounds = list(BUCKETS_MS) + [None]
+        rows = [f"{lo:>5}–{hi if hi else '∞':<5} мс  {'█' * round(24 * counts[lo] / peak):<24} {counts[lo]}" for lo, hi in zip(bounds, bounds[1:])]
+        hist = QLabel("\n".join(rows) if self.entries else "Зависаний не записано")
+        hist.setStyleSheet("font-family: monospace;")
+        layout.addWidget(hist)
+
+        self.table = QTableWidget(len(self.entries), 4)
+        self.table.setHorizontalHeaderLabels(["Время", "мс", "Операция", "Где"])
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        for r, e in enumerate(self.entries):
+            for c, v in enumerate([e['time'], e['ms'], e['operation'], e['where']]):
+                cell = QTableWidgetItem(); cell.setData(Qt.DisplayRole, v)
+                self.table.setItem(r, c, cell)
+        self.table.currentCellChanged.connect(lambda r, *_: self.show_stack(r))
+        layout.addWidget(self.table)
+
+        self.stack_view = QPlainTextEdit(); self.stack_view.setReadOnly(True)
+        self.stack_view.setStyleSheet("font-family: monospace;")
+        layout.addWidget(self.stack_view)
+
+        btns = QHBoxLayout()
+        btn_clear = QPushButton("Очистить"); btn_clear.clicked.connect(self.clear)
+        btn_close = QPushButton("Закрыть"); btn_close.clicked.connect(self.accept)
+        btns.addStretch(); btns.addWidget(btn_clear); btns.addWidget(btn_close)
+        layout.addLayout(btns)
+
+    def show_stack(self, row):
+        if 0 <= row < len(self.entries): self.stack_view.setPlainText("\n".join(reversed(self.entries[row]['stack'])))
+
+    def clear(self):
+        from stalls import clear_log
+        clear_log(); self.entries = []
+        self.table.setRowCount(0); self.stack_view.clear()
+
 class HierarchyTree(QTreeWidget):
     item_clicked_in_tree = Signal(object)
     hierarchy_reordered = Signal()
@@ -97,6 +219,7 @@ class HierarchyTree(QTreeWidget):
         self.setAcceptDrops(True)
         self.setDropIndicatorShown(True)
         self.setDragDropMode(QAbstractItemView.InternalMove)
+        self.nodes = {}   # элемент сцены -> узел дерева
     
     def dropEvent(self, event):
         super().dropEvent(event)
@@ -112,38 +235,54 @@ class HierarchyTree(QTreeWidget):
             child = tree_item.child(i)
             gfx = child.data(0, Qt.UserRole)
             if gfx:
+                old_rect = gfx.dirty_rect()
+                changed = gfx.zValue() != count - i
                 if not isinstance(gfx, RootFrameItem) and gfx.parentItem() != parent_gfx_item:
                     gfx.setParentItem(parent_gfx_item)
+                    changed = True
                 gfx.setZValue(count - i)
+                if changed: gfx.invalidate(old_rect)
                 self.recursive_sync(child, gfx)
                 
+    # Дерево собирается целиком до вставки в виджет: addChildren и один expandAll
+    # вместо addChild/setExpanded на каждый узел
     def refresh(self, root_frame):
         if self.state() == QAbstractItemView.DraggingState: return
-        self.clear()
+        self.clear(); self.nodes = {}
         self.blockSignals(True)
         root = QTreeWidgetItem(["Root Frame", "", ""])
         root.setData(0, Qt.UserRole, root_frame)
-        self.addTopLevelItem(root)
-        root.setExpanded(True)
         self.add_children_recursive(root_frame, root)
+        self.addTopLevelItem(root)
+        self.expandAll()
         self.blockSignals(False)
         
     def add_children_recursive(self, parent_item, parent_node):
         children = list(parent_item.childItems())
         children.sort(key=lambda x: x.zValue(), reverse=True)
+        nodes = []
         for child in children:
             if isinstance(child, WidgetItem):
                 lock = "🔒" if child.is_locked else "🔓"
                 vis = "👁" if child.isVisible() else "🚫"
                 node = QTreeWidgetItem([child.data_model.get('name', 'Widget'), lock, vis])
-                node.setData(0, Qt.UserRole, child)
+                node.setData(0, Qt.UserRole, child); self.nodes[child] = node
                 node.setTextAlignment(1, Qt.AlignCenter)
                 node.setTextAlignment(2, Qt.AlignCenter)
-                parent_node.addChild(node)
-                node.setExpanded(True)
+                nodes.append(node)
                 if getattr(child, 'is_container', False):
                     self.add_children_recursive(child, node)
-                    
+        parent_node.addChildren(nodes)
+
+    # Результаты поиска: выделение узлов без сигналов и прокрутка к первому
+    def highlight(self, items):
+        self.blockSignals(True)
+        self.clearSelection()
+        nodes = [self.nodes[i] for i in items if i in self.nodes]
+        for node in nodes: node.setSelected(True)
+        if nodes: self.scrollToItem(nodes[0])
+        self.blockSignals(False)
+
     def on_click(self, item, col):
         gfx = item.data(0, Qt.UserRole)
         if not gfx: return
@@ -159,9 +298,41 @@ class HierarchyTree(QTreeWidget):
         else:
             self.item_clicked_in_tree.emit(gfx)
 
+MISSING = object()
+
+# Общие поля нескольких элементов: значения берутся у первого, в differs — пути, где
+# значения расходятся. Ключ раздела общий, если есть у всех с одним и тем же типом.
+def common_data(items):
+    models = [i.data_model for i in items]
+    first, rest = models[0], models[1:]
+    data, differs = {}, set()
+    for k in ('x', 'y', 'width', 'height'):
+        data[k] = first.get(k, 0)
+        if any(m.get(k, 0) != data[k] for m in rest): differs.add(k)
+    if any(i.zValue() != items[0].zValue() for i in items[1:]): differs.add('z_index')
+    if all(m.get('type') == first.get('type') for m in rest): data['type'] = first.get('type')
+    for section in ('style', 'content'):
+        if not all(isinstance(m.get(section), dict) for m in models): continue
+        common = {}
+        for k, v in first[section].items():
+            others = [m[section].get(k, MISSING) for m in rest]
+            if any(type(o) is not type(v) for o in others): continue
+            common[k] = v
+            if any(o != v for o in others): differs.add(f"{section}.{k}")
+        data[section] = common
+    return data, differs
+
+# Был ли в поле ввод с клавиатуры после прошлой проверки (editingFinished приходит
+# и при простом уходе фокуса)
+def was_typed(line_edit):
+    modified = line_edit.isModified()
+    line_edit.setModified(False)
+    return modified
+
 class PropertiesPanel(QWidget):
     data_changed = Signal(object)
     property_committed = Signal(str, object, object)
+    properties_committed = Signal(str, list)   # несколько полей одной командой: [(путь, было, стало)]
     undo_refresh_requested = Signal(object)
     request_bg_edit = Signal(object)
 
@@ -181,11 +352,36 @@ class PropertiesPanel(QWidget):
         self.outer_layout.addWidget(scroll)
         
         self.current_item = None
+        self.selection = []
+        self.multi = False
+        self.differs = set()
         self.gradient_widgets = {} 
 
+    # Одиночный элемент перестраивает панель только при смене основного (первого)
+    # элемента; при множественном выделении меняется набор общих полей
+    def set_selection(self, items):
+        was_multi = self.multi
+        self.selection = list(items)
+        item = self.selection[0] if self.selection else None
+        if item is not self.current_item or was_multi or len(self.selection) > 1: return self.set_item(item)
+        if item is not None: self.title.setText(self.title_text(item))
+
+    # Правка применяется ко всему выделению, если панель показывает его основной элемент
+    def targets(self):
+        if self.current_item is None: return []
+        if len(self.selection) > 1 and self.current_item is self.selection[0]: return list(self.selection)
+        return [self.current_item]
+
+    def title_text(self, item):
+        extra = len(self.selection) - 1 if item in self.selection else 0
+        return item.data_model.get('name', 'Element') + (f"  (+{extra})" if extra > 0 else "")
+
     def set_item(self, item):
         self.current_item = item
         self.gradient_widgets.clear()
+        targets = self.targets()
+        self.multi = len(targets) > 1
+        data, self.differs = common_data(targets) if self.multi else (item.data_model if item else None, set())
         
         # Исправленная очистка (развернутый цикл)
         while self.layout.count():
@@ -199,14 +395,15 @@ class PropertiesPanel(QWidget):
             self.layout.addWidget(lbl)
             return
 
-        title = QLabel(item.data_model.get('name', 'Element'))
+        title = QLabel(self.title_text(item))
         title.setStyleSheet("font-weight: bold; font-size: 14px; margin-bottom: 5px;")
         title.setAlignment(Qt.AlignCenter)
         self.layout.addWidget(title)
+        self.title = title
         
         common_g = QGroupBox("Параметры")
         common_l = QGridLayout(common_g)
-        common_l.addWidget(QLabel("Z-Index"), 0, 0)
+        common_l.addWidget(self.mark(QLabel("Z-Index"), "z_index"), 0, 0)
         sb_z = QSpinBox()
         sb_z.setRange(-999, 999)
         sb_z.setValue(int(item.zValue()))
@@ -214,27 +411,91 @@ class PropertiesPanel(QWidget):
         common_l.addWidget(sb_z, 0, 1)
         self.layout.addWidget(common_g)
 
-        self.build_ui(item.data_model)
+        self.build_ui(data)
         self.add_action_buttons(item)
         self.layout.addStretch()
 
     def build_ui(self, data):
         grid = QGridLayout()
-        grid.addWidget(QLabel("X"), 0, 0)
+        grid.addWidget(self.mark(QLabel("X"), "x"), 0, 0)
         grid.addWidget(self.make_spin(data['x'], "x"), 0, 1)
-        grid.addWidget(QLabel("Y"), 0, 2)
+        grid.addWidget(self.mark(QLabel("Y"), "y"), 0, 2)
         grid.addWidget(self.make_spin(data['y'], "y"), 0, 3)
-        grid.addWidget(QLabel("W"), 1, 0)
+        grid.addWidget(self.mark(QLabel("W"), "width"), 1, 0)
         grid.addWidget(self.make_spin(data['width'], "width"), 1, 1)
-        grid.addWidget(QLabel("H"), 1, 2)
+        grid.addWidget(self.mark(QLabel("H"), "height"), 1, 2)
         grid.addWidget(self.make_spin(data['height'], "height"), 1, 3)
         
         container = QWidget()
         container.setLayout(grid)
         self.layout.addWidget(container)
 
+        # Переопределения компонентов правятся только у одного экземпляра
+        if data.get('type') == 'component' and not self.multi: return self.create_override_groups(data)
         if 'style' in data: self.create_group("Стиль", data['style'], "style")
-        if 'content' in data: self.create_group("Контент", data['content'], "content")
+        if 'content' in data and data.get('type') != 'component': self.create_group("Контент", data['content'], "content")
+
+    # Поле, значения которого у выделенных элементов различаются, показывает значение
+    # первого; правка выставит его всем
+    def mark(self, label, path):
+        if path not in self.differs: return label
+        label.setText(label.text() + " ≠")
+        label.setToolTip("Значения различаются")
+        label.setStyleSheet("font-style: italic;")
+        return label
+
+    # Экземпляр компонента: редактируются только переопределения поверх общего определения
+    def create_override_groups(self, data):
+        library = getattr(self.current_item.scene(), 'components', None)
+        definition = library.get(data['content'].get('component_id')) if library else None
+        if definition is None:
+            self.layout.addWidget(QLabel("Определение компонента не найдено")); return
+        overrides = data['content'].get('overrides', {})
+        for w_data in definition['widgets']:
+            group = QGroupBox(w_data.get('name', w_data['id']))
+            form = QGridLayout(); row = 0
+            for section, keys in OVERRIDE_KEYS.items():
+                base = w_data.get(section, {})
+                for k in keys:
+                    if k not in base: continue
+                    own = overrides.get(w_data['id'], {}).get(section, {})
+                    v = own.get(k, base[k])
+                    setter = lambda val, lid=w_data['id'], s=section, key=k: self.commit_override(lid, s, key, val)
+                    if "color" in k and isinstance(v, str) and v.startswith("#"):
+                        widget = QPushButton(v)
+                        widget.setStyleSheet(f"background: {v}; color: #555; border: 1px solid #999;")
+                        widget.clicked.connect(lambda _, old=v, f=setter: self.pick_override_color(old, f))
+                    elif isinstance(v, int) and not isinstance(v, bool):
+                        widget = QSpinBox(); widget.setRange(0, 9999); widget.setValue(v)
+                        widget.editingFinished.connect(lambda w=widget, f=setter: f(w.value()))
+                    elif k == "font_family":
+                        widget = FontPicker(str(v)); widget.family_chosen.connect(setter)
+                    else:
+                        widget = QLineEdit(str(v))
+                        widget.editingFinished.connect(lambda w=widget, f=setter: f(w.text()))
+                    lbl = QLabel(k.replace("_", " ").title() + (" *" if k in own else ""))
+                    form.addWidget(lbl, row, 0); form.addWidget(widget, row, 1); row += 1
+            if row:
+                btn_reset = QPushButton("Сбросить переопределения")
+                btn_reset.setEnabled(w_data['id'] in overrides)
+                btn_reset.clicked.connect(lambda _, lid=w_data['id']: self.reset_override(lid))
+                form.addWidget(btn_reset, row, 0, 1, 2)
+                group.setLayout(form); self.layout.addWidget(group)
+
+    def pick_override_color(self, old_val, setter):
+        c = QColorDialog.getColor(initial=QColor(old_val))
+        if c.isValid(): setter(c.name())
+
+    def commit_override(self, lid, section, key, val):
+        old = self.current_item.data_model['content'].get('overrides', {})
+        new = copy.deepcopy(old)
+        new.setdefault(lid, {}).setdefault(section, {})[key] = val
+        self.commit_prop("content.overrides", old, new)
+
+    def reset_override(self, lid):
+        old = self.current_item.data_model['content'].get('overrides', {})
+        new = copy.deepcopy(old); new.pop(lid, None)
+        self.commit_prop("content.overrides", old, new)
 
     def create_group(self, title, data_dict, prefix):
         group = QGroupBox(title)
@@ -251,9 +512,8 @@ class PropertiesPanel(QWidget):
 
             widget = None
             if k == "font_family":
-                widget = QFontComboBox()
-                widget.setCurrentText(str(v))
-                widget.currentFontChanged.connect(lambda f, p=path, old=v: self.commit_prop(p, old, f.family()))
+                widget = FontPicker(str(v))
+                widget.family_chosen.connect(lambda f, p=path, old=v: self.commit_prop(p, old, f, True))
             elif k in ["use_gradient", "use_text_gradient"]:
                 widget = QCheckBox()
                 widget.setChecked(v)
@@ -263,7 +523,7 @@ class PropertiesPanel(QWidget):
                 hl = QHBoxLayout(widget)
                 hl.setContentsMargins(0,0,0,0)
                 le = QLineEdit(str(v))
-                le.editingFinished.connect(lambda l=le, p=path, old=v: self.commit_prop(p, old, l.text()))
+                le.editingFinished.connect(lambda l=le, p=path, old=v: self.commit_prop(p, old, l.text(), was_typed(l)))
                 btn_file = QPushButton("...")
                 btn_file.setMaximumWidth(30)
                 btn_file.clicked.connect(lambda _, l=le: self.pick_file(l))
@@ -303,10 +563,10 @@ class PropertiesPanel(QWidget):
                 widget = self.make_spin(v, path)
             elif isinstance(v, str): 
                 widget = QLineEdit(str(v))
-                widget.editingFinished.connect(lambda l=widget, p=path, old=v: self.commit_prop(p, old, l.text()))
+                widget.editingFinished.connect(lambda l=widget, p=path, old=v: self.commit_prop(p, old, l.text(), was_typed(l)))
 
             if widget:
-                lbl = QLabel(k.replace("_", " ").title())
+                lbl = self.mark(QLabel(k.replace("_", " ").title()), path)
                 form.addWidget(lbl, row, 0)
                 form.addWidget(widget, row, 1)
                 full_key = f"{prefix}.{k}"
@@ -335,11 +595,15 @@ class PropertiesPanel(QWidget):
         sb = QSpinBox()
         sb.setRange(-9999, 9999)
         sb.setValue(int(val))
-        sb.valueChanged.connect(lambda v, p=path: self.update_data(p, v))
+        # Несколько элементов двигаются одной командой по окончании ввода, а не на каждый шаг
+        if self.multi: sb.editingFinished.connect(lambda s=sb, p=path, old=int(val): self.commit_prop(p, old, s.value(), was_typed(s.lineEdit())))
+        else: sb.valueChanged.connect(lambda v, p=path: self.update_data(p, v))
         return sb
 
-    def commit_prop(self, path, old_val, new_val):
-        if old_val == new_val: return
+    # Поле «≠» показывает значение первого элемента: если пользователь ввёл его сам
+    # (edited), оно применяется ко всему выделению; уход фокуса без ввода ничего не меняет
+    def commit_prop(self, path, old_val, new_val, edited=False):
+        if old_val == new_val and not (edited and self.multi and path in self.differs): return
         self.property_committed.emit(path, old_val, new_val)
 
     def pick_color(self, btn, path, old_val):
@@ -348,43 +612,39 @@ class PropertiesPanel(QWidget):
             new_val = c.name()
             btn.setText(new_val)
             btn.setStyleSheet(f"background: {new_val}; color: #555; border: 1px solid #999;")
-            self.commit_prop(path, old_val, new_val)
-            self.update_data(path, new_val)
+            self.commit_prop(path, old_val, new_val, True)
 
     def pick_file(self, line_edit):
         docs = QStandardPaths.writableLocation(QStandardPaths.DocumentsLocation)
         path, _ = QFileDialog.getOpenFileName(self, "Выбрать", docs, "Img (*.png *.jpg *.jpeg *.svg)")
         if path: 
-            line_edit.setText(path)
+            line_edit.setText(path); line_edit.setModified(True)
             line_edit.editingFinished.emit()
 
     def reset_bg_geo(self):
         if not self.current_item: return
-        self.update_data("style.bg_x", 0)
-        self.update_data("style.bg_y", 0)
-        self.update_data("style.bg_w", 0)
-        self.update_data("style.bg_h", 0)
+        style = self.current_item.data_model.get('style', {})
+        self.properties_committed.emit("Reset image geometry", [(f"style.{k}", style.get(k, 0), 0) for k in ("bg_x", "bg_y", "bg_w", "bg_h")])
 
     def update_data(self, path, value):
-        if not self.current_item: return
-        keys = path.split('.')
-        ref = self.current_item.data_model
-        try:
-            for k in keys[:-1]: 
-                ref = ref[k]
-            ref[keys[-1]] = value
-        except KeyError: return
-        
-        if keys[-1] in ['width', 'height', 'x', 'y']:
-            self.current_item.setRect(0, 0, self.current_item.data_model['width'], self.current_item.data_model['height'])
-            self.current_item.setPos(self.current_item.data_model['x'], self.current_item.data_model['y'])
-            self.current_item.update_handle_pos()
-            
-        if hasattr(self.current_item, 'refresh_content'): 
-            self.current_item.refresh_content()
-            
-        self.current_item.update()
-        self.data_changed.emit(self.current_item)
+        for item in self.targets():
+            keys = path.split('.')
+            ref = item.data_model
+            try:
+                for k in keys[:-1]: 
+                    ref = ref[k]
+                ref[keys[-1]] = value
+            except KeyError: continue
+
+            if keys[-1] in ['width', 'height', 'x', 'y']:
+                item.setRect(0, 0, item.data_model['width'], item.data_model['height'])
+                item.setPos(item.data_model['x'], item.data_model['y'])
+                item.update_handle_pos()
+
+            if hasattr(item, 'refresh_content'): 
+                item.refresh_content()
+
+            self.data_changed.emit(item)
 
     def add_action_buttons(self, item):
         self.layout.addSpacing(10)
@@ -399,13 +659,338 @@ class PropertiesPanel(QWidget):
             self.layout.addWidget(btn)
 
     def delete_widget(self):
-        if self.current_item and not isinstance(self.current_item, RootFrameItem):
-            scene = self.current_item.scene()
-            scene.removeItem(self.current_item)
-            self.set_item(None)
+        items = [i for i in self.targets() if not isinstance(i, RootFrameItem)]
+        if not items: return
+        for item in items:
+            if item.scene(): item.scene().removeItem(item)
+        self.set_item(None)
+
+class ProfilerPanel(QWidget):
+    COLUMNS = ["Элемент", "Тип", "Функция", "Вызовы", "Всего, мс", "p95, мс"]
+
+    def __init__(self, profiler, scene_getter):
+        super().__init__()
+        self.profiler = profiler
+        self.scene_getter = scene_getter
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(5, 5, 5, 5)
+
+        top = QHBoxLayout()
+        self.cb_record = QCheckBox("Запись")
+        self.cb_record.setChecked(profiler.enabled)
+        self.cb_record.toggled.connect(self.toggle_recording)
+        self.combo_group = QComboBox()
+        self.combo_group.addItem("По элементам", "uid")
+        self.combo_group.addItem("По типам", "type")
+        self.combo_group.currentIndexChanged.connect(self.refresh)
+        btn_reset = QPushButton("Сброс")
+        btn_reset.clicked.connect(self.reset)
+        btn_export = QPushButton("Экспорт трассы...")
+        btn_export.clicked.connect(self.export_trace)
+        top.addWidget(self.cb_record); top.addWidget(self.combo_group)
+        top.addStretch(); top.addWidget(btn_reset); top.addWidget(btn_export)
+        layout.addLayout(top)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSortingEnabled(True)
+        self.table.verticalHeader().setVisible(False)
+        layout.addWidget(self.table)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(1000)
+        self.refresh_timer.timeout.connect(self.refresh)
+        if profiler.enabled: self.refresh_timer.start()
+
+    def toggle_recording(self, on):
+        if on:
+            self.profiler.enable(self.scene_getter())
+            self.refresh_timer.start()
+        else:
+            self.profiler.disable()
+            self.refresh_timer.stop()
+            self.refresh()
+
+    def reset(self):
+        self.profiler.reset()
+        self.refresh()
+
+    def refresh(self):
+        if not self.isVisible(): return
+        rows = self.profiler.stats(self.combo_group.currentData())
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            values = [row['name'], row['type'], row['func'], row['count'], round(row['total_ms'], 3), round(row['p95_ms'], 3)]
+            for c, v in enumerate(values):
+                cell = QTableWidgetItem()
+                cell.setData(Qt.DisplayRole, v)
+                self.table.setItem(r, c, cell)
+        self.table.setSortingEnabled(True)
+
+    def export_trace(self):
+        docs = QStandardPaths.writableLocation(QStandardPaths.DocumentsLocation)
+        path, _ = QFileDialog.getSaveFileName(self, "Экспорт трассы", docs, "Chrome Trace (*.json)")
+        if path: self.profiler.export_chrome_trace(path)
+
+class OverdrawPanel(QWidget):
+    item_chosen = Signal(object)
+    overlay_changed = Signal(object)
+
+    def __init__(self, root_getter, scene_getter):
+        super().__init__()
+        self.root_getter = root_getter
+        self.scene_getter = scene_getter
+        self.result = None
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(5, 5, 5, 5)
+
+        top = QHBoxLayout()
+        self.cb_overlay = QCheckBox("Тепловая карта")
+        self.cb_overlay.toggled.connect(self.toggle_overlay)
+        self.combo_scale = QComboBox()
+        for label, k in (("1:1", 1.0), ("1:2", 0.5), ("1:4", 0.25)): self.combo_scale.addItem(label, k)
+        self.combo_scale.currentIndexChanged.connect(self.refresh)
+        btn_refresh = QPushButton("Обновить")
+        btn_refresh.clicked.connect(self.refresh)
+        top.addWidget(self.cb_overlay); top.addWidget(self.combo_scale); top.addStretch(); top.addWidget(btn_refresh)
+        layout.addLayout(top)
+
+        self.lbl_stats = QLabel("")
+        self.lbl_stats.setWordWrap(True)
+        layout.addWidget(self.lbl_stats)
+        layout.addWidget(QLabel("Полностью перекрытые виджеты:"))
+        self.list_occluded = QListWidget()
+        self.list_occluded.itemClicked.connect(lambda it: self.item_chosen.emit(it.data(Qt.UserRole)))
+        layout.addWidget(self.list_occluded)
+
+        # Пока карта включена, она пересчитывается после изменений сцены (с задержкой)
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(300)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def toggle_overlay(self, on):
+        scene = self.scene_getter()
+        if on: scene.changed.connect(self.schedule_refresh); self.refresh()
+        else:
+            scene.changed.disconnect(self.schedule_refresh)
+            self.overlay_changed.emit(None)
+
+    def schedule_refresh(self, rects):
+        if not self.refresh_timer.isActive(): self.refresh_timer.start()
+
+    def refresh(self):
+        from overdraw import analyze, HIST_CAP
+        self.result = r = analyze(self.root_getter(), self.combo_scale.currentData())
+        self.lbl_stats.setText(f"Виджетов: {r.items - 1}; слоёв на пиксель: в среднем {r.mean_layers:.2f}, максимум {r.max_layers}; "
+                               f"пикселей с 3+ слоями: {r.share_at_least(3):.1%}, с {HIST_CAP}+: {r.share_at_least(HIST_CAP):.1%}")
+        self.list_occluded.clear()
+        for item in r.occluded:
+            row = QListWidgetItem(f"{item.data_model.get('name', '')}  [{item.data_model.get('type', '')}]")
+            row.setData(Qt.UserRole, item)
+            self.list_occluded.addItem(row)
+        if self.cb_overlay.isChecked(): self.overlay_changed.emit(r)
+
+class ExportDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Экспорт WGT")
+        self.settings = QSettings("Overl1te", "ChronoBuilder")
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        self.cb_bake = QCheckBox("Запечь статичные слои в PNG")
+        self.cb_bake.setChecked(self.settings.value("export_bake", True, type=bool))
+        form.addRow(self.cb_bake)
+        self.sb_scale = QDoubleSpinBox()
+        self.sb_scale.setRange(0.5, 4.0); self.sb_scale.setSingleStep(0.25); self.sb_scale.setSuffix("×")
+        self.sb_scale.setValue(self.settings.value("export_scale", 1.0, type=float))
+        form.addRow("Плотность слоёв:", self.sb_scale)
+        self.cb_atlas = QCheckBox("Упаковать мелкие картинки в атласы")
+        self.cb_atlas.setChecked(self.settings.value("export_atlas", True, type=bool))
+        form.addRow(self.cb_atlas)
+        self.sb_sprite = QSpinBox()
+        self.sb_sprite.setRange(16, 2048); self.sb_sprite.setSuffix(" px")
+        self.sb_sprite.setValue(self.settings.value("export_max_sprite", 512, type=int))
+        form.addRow("Не больше по стороне:", self.sb_sprite)
+        self.sb_padding = QSpinBox()
+        self.sb_padding.setRange(0, 16); self.sb_padding.setSuffix(" px")
+        self.sb_padding.setValue(self.settings.value("export_padding", 2, type=int))
+        form.addRow("Отступ в атласе:", self.sb_padding)
+        layout.addLayout(form)
+        btns = QHBoxLayout()
+        btn_ok = QPushButton("Экспорт"); btn_ok.clicked.connect(self.accept)
+        btn_cancel = QPushButton("Отмена"); btn_cancel.clicked.connect(self.reject)
+        btns.addWidget(btn_ok); btns.addWidget(btn_cancel)
+        layout.addLayout(btns)
+
+    def options(self):
+        opts = {"bake_layers": self.cb_bake.isChecked(), "scale": self.sb_scale.value(), "atlas": self.cb_atlas.isChecked(),
+                "max_sprite": self.sb_sprite.value(), "padding": self.sb_padding.value()}
+        for key, value in (("export_bake", opts['bake_layers']), ("export_scale", opts['scale']), ("export_atlas", opts['atlas']),
+                           ("export_max_sprite", opts['max_sprite']), ("export_padding", opts['padding'])):
+            self.settings.setValue(key, value)
+        return opts
+
+class CostPanel(QWidget):
+    item_chosen = Signal(object)
+    WIDGET_COLUMNS = ["Элемент", "Тип", "Отрисовка, мс", "Картинки, МБ", "Превышения"]
+
+    def __init__(self, root_getter):
+        super().__init__()
+        from cost import METRICS
+        self.metrics = METRICS
+        self.root_getter = root_getter
+        self.result = None
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(5, 5, 5, 5)
+
+        top = QHBoxLayout()
+        self.cb_calibrate = QCheckBox("Калибровать рендером")
+        self.cb_calibrate.setToolTip("Замерить реальную отрисовку корневого фрейма и масштабировать модель")
+        btn_refresh = QPushButton("Оценить")
+        btn_refresh.clicked.connect(self.refresh)
+        self.lbl_status = QLabel("")
+        top.addWidget(self.cb_calibrate); top.addWidget(self.lbl_status); top.addStretch(); top.addWidget(btn_refresh)
+        layout.addLayout(top)
+
+        # Бюджеты редактируются прямо в таблице и сохраняются в настройках
+        budgets = load_budgets()
+        self.table_totals = QTableWidget(len(METRICS), 3)
+        self.table_totals.setHorizontalHeaderLabels(["Показатель", "Значение", "Бюджет"])
+        self.table_totals.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table_totals.verticalHeader().setVisible(False)
+        self.table_totals.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        for r, (key, label, budget) in enumerate(METRICS):
+            self.table_totals.setItem(r, 0, QTableWidgetItem(label))
+            self.table_totals.setItem(r, 1, QTableWidgetItem(""))
+            self.table_totals.setCellWidget(r, 2, self.make_budget_spin(budget, budgets[budget]))
+        layout.addWidget(self.table_totals)
+
+        per_widget = QHBoxLayout()
+        per_widget.addWidget(QLabel("На виджет: мс"))
+        per_widget.addWidget(self.make_budget_spin("budget_widget_ms", budgets["budget_widget_ms"]))
+        per_widget.addWidget(QLabel("МБ картинок"))
+        per_widget.addWidget(self.make_budget_spin("budget_widget_image_mb", budgets["budget_widget_image_mb"]))
+        layout.addLayout(per_widget)
+
+        self.table_widgets = QTableWidget(0, len(self.WIDGET_COLUMNS))
+        self.table_widgets.setHorizontalHeaderLabels(self.WIDGET_COLUMNS)
+        self.table_widgets.horizontalHeader().setStretchLastSection(True)
+        self.table_widgets.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table_widgets.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table_widgets.verticalHeader().setVisible(False)
+        self.table_widgets.cellClicked.connect(lambda r, c: self.item_chosen.emit(self.table_widgets.item(r, 0).data(Qt.UserRole)))
+        layout.addWidget(self.table_widgets)
+
+    def make_budget_spin(self, key, value):
+        sb = QDoubleSpinBox() if isinstance(BUDGET_DEFAULTS[key], float) else QSpinBox()
+        sb.setRange(0, 100000)
+        sb.setValue(value)
+        sb.valueChanged.connect(lambda v, k=key: set_setting(k, v))
+        return sb
+
+    def refresh(self):
+        from cost import estimate
+        self.result = r = estimate(self.root_getter(), load_budgets(), self.cb_calibrate.isChecked())
+        for row, (key, label, budget) in enumerate(self.metrics):
+            cell = QTableWidgetItem(str(r['totals'][key]))
+            if key in r['over_budget']: cell.setForeground(QColor("#e74c3c"))
+            self.table_totals.setItem(row, 1, cell)
+        self.lbl_status.setText(("Превышено: " + str(len(r['over_budget']))) if r['over_budget'] else "В пределах бюджета")
+        rows = [w for w in r['widgets'] if w['flags']] or r['widgets'][:20]
+        self.table_widgets.setRowCount(len(rows))
+        for i, w in enumerate(rows):
+            for c, v in enumerate([w['name'], w['type'], w['paint_ms'], w['image_mb'], ", ".join(w['flags'])]):
+                cell = QTableWidgetItem(); cell.setData(Qt.DisplayRole, v)
+                if c == 0: cell.setData(Qt.UserRole, w['item'])
+                self.table_widgets.setItem(i, c, cell)
+
+class MemoryPanel(QWidget):
+    item_chosen = Signal(object)
+    WIDGET_COLUMNS = ["Элемент", "Тип", "Всего, КБ", "Данные, КБ", "Qt, КБ", "Текст, КБ", "Картинки, КБ"]
+
+    def __init__(self, report_getter):
+        super().__init__()
+        from memory import SUBSYSTEMS
+        self.subsystems = SUBSYSTEMS
+        self.report_getter = report_getter
+        self.result = None
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(5, 5, 5, 5)
+
+        top = QHBoxLayout()
+        self.cb_trace = QCheckBox("tracemalloc")
+        self.cb_trace.setToolTip("Трассировать выделения Python (замедляет работу; учитываются выделения после включения)")
+        import tracemalloc
+        self.cb_trace.setChecked(tracemalloc.is_tracing())
+        self.cb_trace.toggled.connect(lambda on: tracemalloc.start() if on else tracemalloc.stop())
+        self.lbl_status = QLabel("")
+        btn_refresh = QPushButton("Обновить")
+        btn_refresh.clicked.connect(self.refresh)
+        btn_export = QPushButton("Экспорт JSON...")
+        btn_export.clicked.connect(self.export_json)
+        top.addWidget(self.cb_trace); top.addWidget(self.lbl_status); top.addStretch()
+        top.addWidget(btn_refresh); top.addWidget(btn_export)
+        layout.addLayout(top)
+
+        self.table_totals = QTableWidget(len(SUBSYSTEMS), 3)
+        self.table_totals.setHorizontalHeaderLabels(["Подсистема", "КБ", "Объектов"])
+        self.table_totals.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table_totals.verticalHeader().setVisible(False)
+        self.table_totals.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        for r, (key, label) in enumerate(SUBSYSTEMS): self.table_totals.setItem(r, 0, QTableWidgetItem(label))
+        layout.addWidget(self.table_totals)
+
+        per_widget = QHBoxLayout()
+        per_widget.addWidget(QLabel("На виджет, КБ (без картинок)"))
+        sb = QDoubleSpinBox(); sb.setRange(0, 100000)
+        sb.setValue(load_budgets()["budget_widget_kb"])
+        sb.valueChanged.connect(lambda v: set_setting("budget_widget_kb", v))
+        per_widget.addWidget(sb); per_widget.addStretch()
+        layout.addLayout(per_widget)
+
+        self.table_widgets = QTableWidget(0, len(self.WIDGET_COLUMNS))
+        self.table_widgets.setHorizontalHeaderLabels(self.WIDGET_COLUMNS)
+        self.table_widgets.horizontalHeader().setStretchLastSection(True)
+        self.table_widgets.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table_widgets.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table_widgets.verticalHeader().setVisible(False)
+        self.table_widgets.cellClicked.connect(lambda r, c: self.item_chosen.emit(self.table_widgets.item(r, 0).data(Qt.UserRole)))
+        layout.addWidget(self.table_widgets)
+
+    def refresh(self):
+        self.result = r = self.report_getter()
+        for row, (key, label) in enumerate(self.subsystems):
+            self.table_totals.setItem(row, 1, QTableWidgetItem(str(r['subsystems'][key]['kb'])))
+            self.table_totals.setItem(row, 2, QTableWidgetItem(str(r['subsystems'][key]['count'])))
+        heap = r['python_heap']
+        status = f"Оценка: {r['total_kb']} КБ"
+        if heap['tracing']: status += f", Python-куча {heap['current_kb']} КБ (пик {heap['peak_kb']})"
+        if r['over_budget']: status += f", сверх бюджета: {len(r['over_budget'])}"
+        self.lbl_status.setText(status)
+        self.table_widgets.setRowCount(len(r['widgets']))
+        for i, w in enumerate(r['widgets']):
+            for c, v in enumerate([w['name'], w['type'], w['kb'], w['model_kb'], w['qt_kb'], w['text_kb'], w['image_kb']]):
+                cell = QTableWidgetItem(); cell.setData(Qt.DisplayRole, v)
+                if c == 0: cell.setData(Qt.UserRole, w['item'])
+                if w['over']: cell.setForeground(QColor("#e74c3c"))
+                self.table_widgets.setItem(i, c, cell)
+
+    def export_json(self):
+        if self.result is None: self.refresh()
+        from memory import report_json
+        docs = QStandardPaths.writableLocation(QStandardPaths.DocumentsLocation)
+        path, _ = QFileDialog.getSaveFileName(self, "Экспорт отчёта о памяти", docs, "JSON (*.json)")
+        if not path: return
+        with open(path, 'w', encoding='utf-8') as f: json.dump(report_json(self.result), f, indent=4, ensure_ascii=False)
 
 class EditorView(QGraphicsView):
-    item_selected = Signal(object)
+    selection_changed = Signal(list)
     item_deleted = Signal()
     hierarchy_changed = Signal()
     request_properties = Signal()
@@ -416,6 +1001,11 @@ class EditorView(QGraphicsView):
         self.setAcceptDrops(True)
         self.scene().selectionChanged.connect(self.on_selection)
         self.bg_gizmo = None
+        self.emitted_selection = []
+        self.selection_timer = QTimer(self)
+        self.selection_timer.setSingleShot(True)
+        self.selection_timer.setInterval(0)
+        self.selection_timer.timeout.connect(self.flush_selection)
         
         self.setRenderHint(QPainter.Antialiasing)
         self.setRenderHint(QPainter.SmoothPixmapTransform)
@@ -423,6 +1013,77 @@ class EditorView(QGraphicsView):
         self.setResizeAnchor(QGraphicsView.AnchorUnderMouse)
         self.setDragMode(QGraphicsView.RubberBandDrag)
 
+        self.tiles = None
+        self.overdraw = None
+        self.flash_repaints = False
+        self.flashes = []
+        self.flash_timer = QTimer(self)
+        self.flash_timer.setInterval(50)
+        self.flash_timer.timeout.connect(self.fade_flashes)
+
+    # --- ОТЛАДКА: ПОДСВЕТКА ПЕРЕРИСОВКИ ---
+    FLASH_TIME = 0.4
+
+    def set_flash_repaints(self, on):
+        if on == self.flash_repaints: return
+        self.flash_repaints = on
+        if on: self.scene().changed.connect(self.flash_regions)
+        else:
+            self.scene().changed.disconnect(self.flash_regions)
+            self.flashes.clear(); self.flash_timer.stop(); self.viewport().update()
+
+    def flash_regions(self, rects):
+        now = time.monotonic()
+        self.flashes.extend((QRectF(r), now) for r in rects if not r.isEmpty())
+        if self.flashes and not self.flash_timer.isActive(): self.flash_timer.start()
+
+    # Перерисовываются только вспышки (и погасшие в этот раз — чтобы стереть их)
+    def fade_flashes(self):
+        now = time.monotonic()
+        region = QRegion()
+        for r, _ in self.flashes: region += self.mapFromScene(r).boundingRect().adjusted(-2, -2, 2, 2)
+        self.flashes = [(r, t) for r, t in self.flashes if now - t < self.FLASH_TIME]
+        if not self.flashes: self.flash_timer.stop()
+        self.viewport().update(region)
+
+    # --- ТАЙЛОВЫЙ КЭШ ---
+    def set_tile_cache(self, on):
+        if on and self.tiles is None:
+            from tiles import TileCache
+            self.tiles = TileCache(self)
+        elif not on and self.tiles is not None:
+            self.scene().changed.disconnect(self.tiles.invalidate)
+            self.tiles.clear(); self.tiles = None
+        self.viewport().update()
+
+    # То, чего нет в кэше, и живые области рисует QGraphicsView, остальное копируется из тайлов
+    def paintEvent(self, event):
+        if self.tiles is None or self.overdraw is not None or self.flashes or not self.tiles.usable():
+            return super().paintEvent(event)
+        live = self.tiles.live_region().intersected(event.region())
+        blits, need = self.tiles.plan(event.region(), live)
+        direct = need.united(live)
+        if not direct.isEmpty(): super().paintEvent(QPaintEvent(direct))
+        self.tiles.paint(blits, event.region().subtracted(direct))
+
+    def set_overdraw(self, result):
+        self.overdraw = result
+        self.viewport().update()
+
+    def drawForeground(self, painter, rect):
+        super().drawForeground(painter, rect)
+        if self.overdraw is not None:
+            painter.drawImage(self.overdraw.rect, self.overdraw.image)
+        if not self.flashes: return
+        now = time.monotonic()
+        painter.save()
+        for r, t in self.flashes:
+            alpha = max(0.0, 1.0 - (now - t) / self.FLASH_TIME)
+            painter.setPen(QPen(QColor(255, 0, 128, int(220 * alpha)), 0))
+            painter.setBrush(QColor(255, 0, 128, int(60 * alpha)))
+            painter.drawRect(r)
+        painter.restore()
+
     def wheelEvent(self, event):
         if event.modifiers() & Qt.ControlModifier:
             zoom_in = event.angleDelta().y() > 0
@@ -449,6 +1110,7 @@ class EditorView(QGraphicsView):
             super().mouseReleaseEvent(fake)
         else:
             super().mouseReleaseEvent(event)
+        self.on_selection()
 
     def keyPressEvent(self, event):
         if event.key() == Qt.Key_Space and not event.isAutoRepeat():
@@ -463,7 +1125,7 @@ class EditorView(QGraphicsView):
                     self.scene().removeItem(i)
                     changed = True
             if changed:
-                self.item_selected.emit(None)
+                self.flush_selection()
                 self.item_deleted.emit()
                 self.hierarchy_changed.emit()
         else:
@@ -504,15 +1166,22 @@ class EditorView(QGraphicsView):
         else:
             event.ignore()
 
+    # --- ВЫДЕЛЕНИЕ ---
+    # selectionChanged только помечает выделение грязным; во время рамочного выделения
+    # событие откладывается до отпускания мыши, иначе — до следующей итерации цикла.
+    # Подписчики получают одно событие со всем выделением (сцена ведёт его сама).
     def on_selection(self):
-        if self.bg_gizmo:
-            sel = self.scene().selectedItems()
-            if not sel or sel[0] != self.bg_gizmo:
-                self.remove_gizmo()
-        
-        sel = self.scene().selectedItems()
-        real = [i for i in sel if isinstance(i, BaseResizableItem)]
-        self.item_selected.emit(real[0] if real else None)
+        if not self.rubberBandRect().isNull(): return
+        if not self.selection_timer.isActive(): self.selection_timer.start()
+
+    def flush_selection(self):
+        self.selection_timer.stop()
+        if self.bg_gizmo and not self.bg_gizmo.isSelected(): self.remove_gizmo()
+        selection = self.scene().selected_widgets() if hasattr(self.scene(), 'selected_widgets') else \
+            [i for i in self.scene().selectedItems() if isinstance(i, BaseResizableItem)]
+        if selection == self.emitted_selection: return
+        self.emitted_selection = selection
+        self.selection_changed.emit(selection)
 
     def contextMenuEvent(self, event):
         item = self.scene().itemAt(self.mapToScene(event.pos()), self.transform())
@@ -542,7 +1211,7 @@ class EditorView(QGraphicsView):
 
     def delete_item_safe(self, item):
         self.scene().removeItem(item)
-        self.item_selected.emit(None)
+        self.flush_selection()
         self.hierarchy_changed.emit()
     
     def start_bg_edit(self, item):